@@ -0,0 +1,9 @@
+import pytest
+
+from core.query_budget import assert_view_budget
+
+
+@pytest.fixture
+def query_budget(db):
+    """Запрашивает адрес и проверяет бюджет запросов его представления."""
+    return assert_view_budget
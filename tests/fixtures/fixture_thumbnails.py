@@ -0,0 +1,9 @@
+import pytest
+
+from core.testing import ImmediateExecutor
+
+
+@pytest.fixture(autouse=True)
+def immediate_thumbnails(monkeypatch):
+    """Миниатюры строятся в потоке теста, а не в пуле процессов."""
+    monkeypatch.setattr('posts.thumbnails.executor', ImmediateExecutor)
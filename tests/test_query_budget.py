@@ -0,0 +1,28 @@
+import pytest
+from django.core.cache import cache
+
+from posts.models import Follow, Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+class TestQueryBudget:
+
+    @pytest.fixture
+    def feed(self, mixer, user, another_user, group):
+        Follow.objects.create(user=user, author=another_user)
+        return mixer.cycle(15).blend(
+            Post, author=another_user, group=group, image=''
+        )[0]
+
+    def test_views_query_budget(self, query_budget, user_client, feed):
+        urls = (
+            '/',
+            '/follow/',
+            f'/group/{feed.group.slug}/',
+            f'/profile/{feed.author.username}/',
+            f'/posts/{feed.id}/',
+        )
+        for url in urls:
+            cache.clear()
+            query_budget(user_client, url)
@@ -0,0 +1,101 @@
+"""
+Компактная сериализация для API.
+
+Поле ответа описывается колонками, которые нужно прочитать из базы,
+и функцией, строящей значение. Клиент выбирает поля параметром
+?fields=, и из базы читаются только нужные колонки.
+"""
+from django.core.exceptions import ValidationError
+
+from posts.counters import user_value
+
+
+def _image(post):
+    return post.image.url if post.image else None
+
+
+# поле ответа -> (колонки для only(), значение)
+POST_FIELDS = {
+    'id': (('id',), lambda post: post.pk),
+    'text': (('text',), lambda post: post.text),
+    'created': (('created',), lambda post: post.created.isoformat()),
+    'author': (
+        ('author', 'author__username'),
+        lambda post: post.author.username,
+    ),
+    'group': (
+        ('group', 'group__slug'),
+        lambda post: post.group.slug if post.group_id else None,
+    ),
+    'image': (('image',), _image),
+    'comments_count': (('comments_count',), lambda post: post.comments_count),
+}
+
+COMMENT_FIELDS = {
+    'id': (('id',), lambda comment: comment.pk),
+    'post': (('post',), lambda comment: comment.post_id),
+    'author': (
+        ('author', 'author__username'),
+        lambda comment: comment.author.username,
+    ),
+    'text': (('text',), lambda comment: comment.text),
+    'created': (('created',), lambda comment: comment.created.isoformat()),
+}
+
+GROUP_FIELDS = {
+    'slug': (('slug',), lambda group: group.slug),
+    'title': (('title',), lambda group: group.title),
+    'description': (('description',), lambda group: group.description),
+    'posts_count': (('posts_count',), lambda group: group.posts_count),
+}
+
+PROFILE_FIELDS = {
+    'username': (('username',), lambda user: user.username),
+    'first_name': (('first_name',), lambda user: user.first_name),
+    'last_name': (('last_name',), lambda user: user.last_name),
+    'posts_count': (
+        ('counters__posts_count',),
+        lambda user: user_value(user, 'posts_count'),
+    ),
+    'followers_count': (
+        ('counters__followers_count',),
+        lambda user: user_value(user, 'followers_count'),
+    ),
+    'following_count': (
+        ('counters__following_count',),
+        lambda user: user_value(user, 'following_count'),
+    ),
+}
+
+
+PERSON_FIELDS = {
+    'username': (('username',), lambda user: user.username),
+    'first_name': (('first_name',), lambda user: user.first_name),
+    'last_name': (('last_name',), lambda user: user.last_name),
+}
+
+
+def requested(fields, spec):
+    """
+    Имена полей из параметра fields; без параметра — все поля.
+    Неизвестное поле — ValidationError.
+    """
+    if not fields:
+        return list(spec)
+    names = [name for name in fields.split(',') if name]
+    unknown = [name for name in names if name not in spec]
+    if unknown:
+        raise ValidationError(f'Неизвестные поля: {", ".join(unknown)}')
+    return names
+
+
+def columns(names, spec, required=()):
+    """Колонки для only(): поля ответа и нужные паджинатору."""
+    result = list(required)
+    for name in names:
+        result.extend(spec[name][0])
+    return result
+
+
+def serialize(obj, names, spec):
+    return {name: spec[name][1](obj) for name in names}
@@ -0,0 +1,238 @@
+from http import HTTPStatus
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.query_budget import assert_view_budget
+
+from posts.models import (
+    Comment, Follow, Group, Post, User, UserCounters
+)
+
+
+@override_settings(API_PAGE_SIZE=2)
+class ApiTests(TestCase):
+    """Проверка JSON API"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='auth', first_name='Лев', last_name='Толстой'
+        )
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='Test_slug',
+            description='Тестовое описание',
+        )
+        cls.posts = [
+            Post.objects.create(
+                author=cls.user,
+                text=f'Пост {number}',
+                group=cls.group if number % 2 else None,
+            )
+            for number in range(5)
+        ]
+        Comment.objects.create(
+            post=cls.posts[0], author=cls.reader, text='Комментарий'
+        )
+        Follow.objects.create(user=cls.reader, author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def get(self, name, params=None, **kwargs):
+        response = self.client.get(reverse(f'api:{name}', kwargs=kwargs),
+                                   params or {})
+        return response, response.json()
+
+    def test_post_list_cursor(self):
+        """Посты отдаются страницами по курсору, новые первыми"""
+
+        seen = []
+        params = {}
+        while True:
+            response, data = self.get('post_list', params)
+            self.assertEqual(response.status_code, HTTPStatus.OK)
+            seen.extend(post['id'] for post in data['results'])
+            if not data['next']:
+                break
+            params = {'after': data['next']}
+        self.assertEqual(seen, [post.pk for post in reversed(self.posts)])
+
+    def test_filters(self):
+        """Посты фильтруются по группе и автору"""
+
+        _, data = self.get('post_list', {'group': 'Test_slug'})
+        self.assertEqual(
+            [post['group'] for post in data['results']],
+            ['Test_slug', 'Test_slug'],
+        )
+        _, data = self.get('post_list', {'author': 'reader'})
+        self.assertEqual(data['results'], [])
+
+    def test_sparse_fields(self):
+        """Ответ содержит только запрошенные поля"""
+
+        _, data = self.get('post_list', {'fields': 'id,author'})
+        self.assertEqual(set(data['results'][0]), {'id', 'author'})
+        self.assertEqual(data['results'][0]['author'], 'auth')
+        response, data = self.get('post_list', {'fields': 'id,secret'})
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+        self.assertIn('secret', data['error'])
+
+    def test_sparse_columns(self):
+        """Из базы читаются только колонки запрошенных полей"""
+
+        url = reverse('api:post_list')
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url, {'fields': 'id'})
+        self.assertNotIn('"text"', queries.captured_queries[-1]['sql'])
+        self.assertNotIn('auth_user', queries.captured_queries[-1]['sql'])
+
+    def test_batch(self):
+        """Посты по списку id в заданном порядке"""
+
+        ids = [self.posts[3].pk, 9999, self.posts[0].pk]
+        _, data = self.get(
+            'post_batch', {'ids': ','.join(map(str, ids)), 'fields': 'id'}
+        )
+        self.assertEqual(
+            data['results'],
+            [{'id': self.posts[3].pk}, {'id': self.posts[0].pk}],
+        )
+        response, _ = self.get('post_batch', {'ids': '1,x'})
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+        with self.settings(API_BATCH_LIMIT=1):
+            response, _ = self.get('post_batch', {'ids': '1,2'})
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+
+    def test_details(self):
+        """Пост, комментарии, группы и профиль"""
+
+        _, data = self.get('post_detail', post_id=self.posts[1].pk)
+        self.assertEqual(data['text'], 'Пост 1')
+        self.assertEqual(data['group'], 'Test_slug')
+        self.assertIsNone(data['image'])
+        _, data = self.get('post_comments', post_id=self.posts[0].pk)
+        self.assertEqual(data['results'][0]['author'], 'reader')
+        _, data = self.get('group_list')
+        self.assertEqual(data['results'][0]['posts_count'], 2)
+        _, data = self.get('group_detail', slug='Test_slug')
+        self.assertEqual(data['title'], 'Тестовая группа')
+        _, data = self.get('profile', username='auth')
+        self.assertEqual(data['posts_count'], 5)
+        self.assertEqual(data['followers_count'], 1)
+
+    def test_profile_without_counters(self):
+        """Профиль без строки счётчиков считает их по данным"""
+
+        UserCounters.objects.filter(user=self.user).delete()
+        response, data = self.get('profile', username='auth')
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(data['posts_count'], 5)
+        self.assertEqual(data['followers_count'], 1)
+        self.assertEqual(data['following_count'], 0)
+
+    def test_not_found(self):
+        """Несуществующие записи — 404 в JSON"""
+
+        for name, kwargs in (
+            ('post_detail', {'post_id': 9999}),
+            ('post_comments', {'post_id': 9999}),
+            ('group_detail', {'slug': 'missing'}),
+            ('profile', {'username': 'missing'}),
+        ):
+            with self.subTest(name=name):
+                response, data = self.get(name, **kwargs)
+                self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+                self.assertIn('error', data)
+
+    def test_follow_feed(self):
+        """Лента подписок доступна только авторизованному"""
+
+        response, _ = self.get('follow_feed')
+        self.assertEqual(response.status_code, HTTPStatus.UNAUTHORIZED)
+        self.client.force_login(self.reader)
+        _, data = self.get('follow_feed', {'fields': 'id'})
+        self.assertEqual(
+            [post['id'] for post in data['results']],
+            [self.posts[4].pk, self.posts[3].pk],
+        )
+
+    def test_cache_invalidated(self):
+        """Ответ кэшируется и сбрасывается новым постом"""
+
+        url = reverse('api:post_list')
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        self.assertEqual(len(queries), 0)
+        Post.objects.create(author=self.user, text='Свежий пост')
+        self.assertEqual(
+            self.client.get(url).json()['results'][0]['text'], 'Свежий пост'
+        )
+
+    def test_follow_lists(self):
+        """Подписчики и подписки пользователя"""
+
+        _, data = self.get('followers', username='auth')
+        self.assertEqual(
+            data['results'],
+            [{'username': 'reader', 'first_name': '', 'last_name': ''}],
+        )
+        _, data = self.get(
+            'following', {'fields': 'username'}, username='reader'
+        )
+        self.assertEqual(data['results'], [{'username': 'auth'}])
+        response, _ = self.get('followers', username='missing')
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_query_budgets(self):
+        """Представления укладываются в бюджет запросов"""
+
+        post_id = self.posts[0].pk
+        for path in (
+            reverse('api:post_list') + '?group=Test_slug',
+            reverse('api:post_detail', kwargs={'post_id': post_id}),
+            reverse('api:post_batch') + f'?ids={post_id}',
+            reverse('api:post_comments', kwargs={'post_id': post_id}),
+            reverse('api:group_list'),
+            reverse('api:group_detail', kwargs={'slug': 'Test_slug'}),
+            reverse('api:profile', kwargs={'username': 'auth'}),
+            reverse('api:followers', kwargs={'username': 'auth'}),
+            reverse('api:following', kwargs={'username': 'reader'}),
+            reverse('api:follow_feed'),
+        ):
+            for authorized in (False, True):
+                with self.subTest(path=path, authorized=authorized):
+                    cache.clear()
+                    client = Client()
+                    if authorized:
+                        client.force_login(self.reader)
+                    assert_view_budget(client, path)
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=0)
+    def test_follow_feed_with_pulled_authors(self):
+        """Лента подписок с крупными авторами укладывается в бюджет"""
+
+        for number in range(5):
+            author = User.objects.create_user(username=f'big_{number}')
+            Follow.objects.create(user=self.reader, author=author)
+            Post.objects.create(author=author, text=f'Пост {number}')
+        self.client.force_login(self.reader)
+        response = assert_view_budget(self.client, reverse('api:follow_feed'))
+        self.assertEqual(len(response.json()['results']), 2)
+
+    def test_get_only(self):
+        """API только для чтения"""
+
+        response = self.client.post(reverse('api:post_list'))
+        self.assertEqual(
+            response.status_code, HTTPStatus.METHOD_NOT_ALLOWED
+        )
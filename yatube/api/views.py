@@ -0,0 +1,310 @@
+"""
+JSON API только для чтения.
+
+Ответы собираются из моделей без шаблонов и кэшируются для анонимных
+клиентов так же, как страницы сайта (core.decorators). Списки
+постраничны по курсору: ответ содержит курсоры next и previous,
+которые передаются обратно параметрами after и before.
+
+Бюджеты запросов считаются для вошедшего клиента (сессия и
+пользователь — два запроса) и учитывают запрос условного GET, который
+находит владельца области кэша, пока тот не закэширован.
+"""
+from functools import wraps
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.http import Http404, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.views.decorators.http import require_GET
+
+from core.decorators import cache_for_anonymous, conditional_on
+from core.paginators import CursorPaginator
+from core.query_budget import query_budget
+from posts import caching, timelines
+from posts.models import Comment, Follow, Group, Post, User
+from . import serializers
+
+JSON_PARAMS = {'ensure_ascii': False, 'separators': (',', ':')}
+
+
+def error(message, status):
+    return JsonResponse(
+        {'error': message}, status=status, json_dumps_params=JSON_PARAMS
+    )
+
+
+def api_view(view_func):
+    """Только GET; ошибки запроса и 404 — тоже в JSON."""
+    @wraps(view_func)
+    @require_GET
+    def wrapper(request, *args, **kwargs):
+        try:
+            data = view_func(request, *args, **kwargs)
+        except Http404:
+            return error('Не найдено', 404)
+        except ValidationError as invalid:
+            return error(' '.join(invalid.messages), 400)
+        # Области кэша ответа представление кладёт в ключ _scopes.
+        scopes = data.pop('_scopes', ())
+        response = JsonResponse(data, json_dumps_params=JSON_PARAMS)
+        response.cache_scopes = scopes
+        return response
+    return wrapper
+
+
+def login_required_json(view_func):
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return error('Требуется авторизация', 401)
+        return view_func(request, *args, **kwargs)
+    return wrapper
+
+
+def sparse(queryset, names, spec, required=('id',)):
+    """Набор с колонками и связями, нужными выбранным полям."""
+    fields = serializers.columns(names, spec, required)
+    related = {field.rsplit('__', 1)[0] for field in fields if '__' in field}
+    if related:
+        queryset = queryset.select_related(*related)
+    return queryset.only(*fields)
+
+
+def page(request, queryset, names, spec, ordering=('-created', '-pk'),
+         item=None, paginator=None):
+    """
+    Страница списка по курсору с выбранными полями. item достаёт
+    из записи объект, который сериализуется (по умолчанию сама запись).
+    paginator задаёт готовый паджинатор вместо CursorPaginator.
+    """
+    if paginator is None:
+        paginator = CursorPaginator(
+            queryset, settings.API_PAGE_SIZE, ordering=ordering
+        )
+    page_obj = paginator.get_page(
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+    )
+    return {
+        'results': [
+            serializers.serialize(item(obj) if item else obj, names, spec)
+            for obj in page_obj
+        ],
+        'next': paginator.next_cursor,
+        'previous': paginator.previous_cursor,
+    }
+
+
+def posts_scopes(request):
+    if request.GET.get('group'):
+        return caching.group_scopes(request, request.GET['group'])
+    if request.GET.get('author'):
+        return caching.profile_scopes(request, request.GET['author'])
+    return caching.index_scopes(request)
+
+
+@conditional_on(posts_scopes)
+@cache_for_anonymous
+@api_view
+@query_budget(5)
+def post_list(request):
+    """Посты, новые первыми; фильтры ?group=slug и ?author=username."""
+    names = serializers.requested(
+        request.GET.get('fields'), serializers.POST_FIELDS
+    )
+    posts = Post.objects.all()
+    if request.GET.get('group'):
+        posts = posts.filter(group__slug=request.GET['group'])
+    if request.GET.get('author'):
+        posts = posts.filter(author__username=request.GET['author'])
+    posts = sparse(
+        posts, names, serializers.POST_FIELDS, required=('id', 'created')
+    )
+    data = page(request, posts, names, serializers.POST_FIELDS)
+    data['_scopes'] = posts_scopes(request) or ()
+    return data
+
+
+@conditional_on(caching.post_scopes)
+@cache_for_anonymous
+@api_view
+@query_budget(4)
+def post_detail(request, post_id):
+    names = serializers.requested(
+        request.GET.get('fields'), serializers.POST_FIELDS
+    )
+    post = get_object_or_404(
+        sparse(Post.objects.all(), names, serializers.POST_FIELDS),
+        pk=post_id,
+    )
+    data = serializers.serialize(post, names, serializers.POST_FIELDS)
+    data['_scopes'] = (caching.post_scope(post.pk),)
+    return data
+
+
+@api_view
+@query_budget(3)
+def post_batch(request):
+    """Посты по списку ?ids=1,2,3 в заданном порядке; ненайденных нет."""
+    names = serializers.requested(
+        request.GET.get('fields'), serializers.POST_FIELDS
+    )
+    try:
+        ids = [int(pk) for pk in request.GET.get('ids', '').split(',') if pk]
+    except ValueError:
+        raise ValidationError('ids — список чисел через запятую')
+    if len(ids) > settings.API_BATCH_LIMIT:
+        raise ValidationError(
+            f'Не больше {settings.API_BATCH_LIMIT} постов за запрос'
+        )
+    posts = sparse(Post.objects.all(), names, serializers.POST_FIELDS)
+    found = posts.in_bulk(ids) if ids else {}
+    return {'results': [
+        serializers.serialize(found[pk], names, serializers.POST_FIELDS)
+        for pk in ids
+        if pk in found
+    ]}
+
+
+@conditional_on(caching.post_scopes)
+@cache_for_anonymous
+@api_view
+@query_budget(5)
+def post_comments(request, post_id):
+    names = serializers.requested(
+        request.GET.get('fields'), serializers.COMMENT_FIELDS
+    )
+    get_object_or_404(Post.objects.only('pk'), pk=post_id)
+    comments = sparse(
+        Comment.objects.filter(post_id=post_id),
+        names,
+        serializers.COMMENT_FIELDS,
+        required=('id', 'created'),
+    )
+    data = page(request, comments, names, serializers.COMMENT_FIELDS)
+    data['_scopes'] = (caching.post_scope(post_id),)
+    return data
+
+
+@cache_for_anonymous
+@api_view
+@query_budget(3)
+def group_list(request):
+    names = serializers.requested(
+        request.GET.get('fields'), serializers.GROUP_FIELDS
+    )
+    groups = Group.objects.order_by('title').only(
+        *serializers.columns(names, serializers.GROUP_FIELDS)
+    )
+    return {
+        'results': [
+            serializers.serialize(group, names, serializers.GROUP_FIELDS)
+            for group in groups
+        ],
+        # Число постов групп меняется с каждым постом.
+        '_scopes': (caching.INDEX, caching.GROUPS),
+    }
+
+
+@conditional_on(caching.group_scopes)
+@cache_for_anonymous
+@api_view
+@query_budget(4)
+def group_detail(request, slug):
+    names = serializers.requested(
+        request.GET.get('fields'), serializers.GROUP_FIELDS
+    )
+    group = get_object_or_404(
+        Group.objects.only(
+            'id', *serializers.columns(names, serializers.GROUP_FIELDS)
+        ),
+        slug=slug,
+    )
+    data = serializers.serialize(group, names, serializers.GROUP_FIELDS)
+    data['_scopes'] = (caching.group_scope(group.pk),)
+    return data
+
+
+@conditional_on(caching.profile_scopes)
+@cache_for_anonymous
+@api_view
+@query_budget(4)
+def profile(request, username):
+    names = serializers.requested(
+        request.GET.get('fields'), serializers.PROFILE_FIELDS
+    )
+    author = get_object_or_404(
+        sparse(User.objects.all(), names, serializers.PROFILE_FIELDS),
+        username=username,
+    )
+    data = serializers.serialize(author, names, serializers.PROFILE_FIELDS)
+    data['_scopes'] = (caching.author_scope(author.pk),)
+    return data
+
+
+@login_required_json
+@conditional_on(caching.follow_scopes)
+@api_view
+@query_budget(5)
+def follow_feed(request):
+    """Посты авторов, на которых подписан пользователь."""
+    names = serializers.requested(
+        request.GET.get('fields'), serializers.POST_FIELDS
+    )
+    sources = [
+        sparse(source, names, serializers.POST_FIELDS, required=('id',))
+        for source in timelines.timeline_sources(request.user)
+    ]
+    return page(
+        request,
+        sources,
+        names,
+        serializers.POST_FIELDS,
+        paginator=timelines.paginator(
+            request.user, sources, settings.API_PAGE_SIZE
+        ),
+    )
+
+
+def follow_list(request, username, relation, filter_field):
+    names = serializers.requested(
+        request.GET.get('fields'), serializers.PERSON_FIELDS
+    )
+    author = get_object_or_404(
+        User.objects.only('pk'), username=username
+    )
+    follows = Follow.objects.filter(**{filter_field: author}).select_related(
+        relation
+    ).only('id', relation, *(
+        f'{relation}__{column}'
+        for column in serializers.columns(names, serializers.PERSON_FIELDS)
+    ))
+    data = page(
+        request,
+        follows,
+        names,
+        serializers.PERSON_FIELDS,
+        ordering=(f'-{relation}_id',),
+        item=lambda follow: getattr(follow, relation),
+    )
+    data['_scopes'] = (caching.author_scope(author.pk),)
+    return data
+
+
+@conditional_on(caching.profile_scopes)
+@cache_for_anonymous
+@api_view
+@query_budget(5)
+def followers(request, username):
+    """Подписчики пользователя."""
+    return follow_list(request, username, 'user', 'author')
+
+
+@conditional_on(caching.profile_scopes)
+@cache_for_anonymous
+@api_view
+@query_budget(5)
+def following(request, username):
+    """Авторы, на которых подписан пользователь."""
+    return follow_list(request, username, 'author', 'user')
@@ -0,0 +1,23 @@
+from django.contrib import admin
+
+from .models import Job
+
+
+class JobAdmin(admin.ModelAdmin):
+
+    list_display = (
+        'pk',
+        'task',
+        'status',
+        'priority',
+        'attempts',
+        'run_at',
+        'finished',
+    )
+    list_filter = ('status', 'task')
+    search_fields = ('task', 'key')
+    readonly_fields = ('created', 'locked_by', 'locked_at', 'last_error')
+    empty_value_display = '-пусто-'
+
+
+admin.site.register(Job, JobAdmin)
@@ -0,0 +1,84 @@
+"""
+Поколения кэша.
+
+Каждая область кэширования (например, «все посты» или «посты группы»)
+имеет поколение — метку времени последнего изменения. Поколение входит
+в ключ кэша, поэтому при изменении данных достаточно сдвинуть его:
+старые записи перестают читаться и вытесняются сами, а срок жизни
+кэша можно делать большим.
+
+Внутри snapshot() каждое поколение читается один раз: страница,
+построенная за время запроса, согласована с поколениями, прочитанными
+в его начале, даже если данные тем временем изменились.
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+from django.core.cache import cache
+from django.db import transaction
+
+KEY = 'generation:{}'
+
+_local = threading.local()
+
+
+def stamp():
+    return time.time_ns() // 1000
+
+
+def generations(*scopes):
+    """Поколения областей; неизвестным областям заводит новое."""
+    seen = getattr(_local, 'seen', None)
+    known = {} if seen is None else seen
+    keys = {KEY.format(scope): scope for scope in scopes if scope not in known}
+    if keys:
+        found = cache.get_many(list(keys))
+        missing = {key: stamp() for key in keys if key not in found}
+        if missing:
+            for key, value in missing.items():
+                cache.add(key, value, None)
+            found = {**missing, **found, **cache.get_many(list(missing))}
+        read = {keys[key]: value for key, value in found.items()}
+        known = {**known, **read}
+        if seen is not None:
+            seen.update(read)
+    return [known[scope] for scope in scopes]
+
+
+@contextmanager
+def snapshot():
+    """Запоминает поколения, впервые прочитанные внутри блока."""
+    outer = getattr(_local, 'seen', None)
+    if outer is None:
+        _local.seen = {}
+    try:
+        yield
+    finally:
+        if outer is None:
+            _local.seen = None
+
+
+def version(*scopes):
+    """Строка версии для ключа кэша, зависящего от областей."""
+    return '.'.join(str(value) for value in generations(*scopes))
+
+
+def _set(scopes):
+    value = stamp()
+    cache.set_many({KEY.format(scope): value for scope in scopes}, None)
+
+
+def bump(*scopes):
+    """
+    Сдвигает поколения областей после изменения данных.
+
+    Внутри транзакции поколения сдвигаются сразу (для чтений в той же
+    транзакции) и ещё раз после фиксации: параллельный запрос мог
+    прочитать новое поколение, но ещё старые строки, и сохранить
+    устаревшую страницу под свежим ключом. Повторный сдвиг делает такую
+    запись недействительной.
+    """
+    _set(scopes)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: _set(scopes))
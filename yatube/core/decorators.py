@@ -0,0 +1,147 @@
+"""
+Кэш целых страниц для анонимных посетителей.
+
+Ответ хранится сжатым вместе с заголовками под ключом из адреса
+и строки запроса. Представление перечисляет в response.cache_scopes
+области кэша (см. core.cache), от которых зависит страница: запись
+читается, только пока поколения этих областей не сдвинулись.
+
+Условные запросы: conditional_on вычисляет ETag и Last-Modified
+из тех же поколений ещё до построения страницы и отвечает 304,
+если у клиента актуальная копия.
+"""
+import hashlib
+import zlib
+from datetime import datetime, timezone
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+from .cache import generations, snapshot
+
+KEY = 'page:{}'
+
+
+def page_key(request):
+    address = f'{request.get_host()}{request.get_full_path()}'
+    return KEY.format(hashlib.md5(address.encode()).hexdigest())
+
+
+def is_cacheable(request, response):
+    """Ответ не зависит от посетителя и не ставит ему cookie."""
+    return (
+        response.status_code == 200
+        and not response.streaming
+        and not response.cookies
+        and not request.META.get('CSRF_COOKIE_USED')
+    )
+
+
+def restore(entry):
+    response = HttpResponse(
+        zlib.decompress(entry['content']), status=entry['status']
+    )
+    for header, value in entry['headers']:
+        response[header] = value
+    return response
+
+
+def store(request, response, key):
+    if not is_cacheable(request, response):
+        return
+    scopes = tuple(getattr(response, 'cache_scopes', ()))
+    cache.set(key, {
+        'scopes': scopes,
+        'generations': generations(*scopes),
+        'status': response.status_code,
+        'headers': list(response.items()),
+        'content': zlib.compress(response.content),
+    }, settings.CASH_SECONDS)
+
+
+def cache_for_anonymous(view_func):
+    """Отдаёт анонимным посетителям страницу из кэша."""
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        if (request.method not in ('GET', 'HEAD')
+                or request.user.is_authenticated):
+            return view_func(request, *args, **kwargs)
+        key = page_key(request)
+        # Поколения читаются до построения страницы: если данные
+        # изменятся, пока она строится, запись сразу окажется устаревшей.
+        with snapshot():
+            entry = cache.get(key)
+            if (entry is not None and generations(*entry['scopes'])
+                    == entry['generations']):
+                return restore(entry)
+            response = view_func(request, *args, **kwargs)
+            if hasattr(response, 'render') and not response.is_rendered:
+                response.add_post_render_callback(
+                    lambda rendered: store(request, rendered, key)
+                )
+            else:
+                store(request, response, key)
+        return response
+    return wrapper
+
+
+def visitor(request):
+    """
+    Часть ETag, зависящая от посетителя: от него зависят шапка и формы
+    страницы, а токен CSRF в формах — от секрета, который меняется
+    при входе.
+    """
+    if not request.user.is_authenticated:
+        return str(request.user.pk)
+    # get_token заводит секрет, если его ещё нет, и страница получит
+    # тот же секрет, что вошёл в ETag.
+    get_token(request)
+    return f'{request.user.pk}:{request.META["CSRF_COOKIE"]}'
+
+
+def conditional_on(scopes_func):
+    """
+    Поддержка условных GET-запросов для представления.
+
+    scopes_func(request, *args, **kwargs) возвращает области кэша
+    страницы или None, если страницы нет.
+    """
+    def page_generations(request, *args, **kwargs):
+        if not hasattr(request, '_page_generations'):
+            scopes = scopes_func(request, *args, **kwargs)
+            request._page_generations = (
+                None if scopes is None else generations(*scopes)
+            )
+        return request._page_generations
+
+    def etag(request, *args, **kwargs):
+        current = page_generations(request, *args, **kwargs)
+        if current is None:
+            return None
+        version = f'{visitor(request)}:{current}'
+        return hashlib.md5(version.encode()).hexdigest()
+
+    def last_modified(request, *args, **kwargs):
+        current = page_generations(request, *args, **kwargs)
+        # Дата не различает посетителей, поэтому отдаётся только гостям.
+        if not current or request.user.is_authenticated:
+            return None
+        return datetime.fromtimestamp(max(current) / 10**6, timezone.utc)
+
+    def decorator(view_func):
+        conditional_view = condition(etag, last_modified)(view_func)
+
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            with snapshot():
+                response = conditional_view(request, *args, **kwargs)
+            if response.has_header('ETag'):
+                patch_cache_control(response, no_cache=True)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,116 @@
+"""
+Очередь фоновых задач в базе данных.
+
+Задача — обычная функция модуля, аргументы — именованные и сериализуемые
+в JSON. enqueue() записывает задачу в той же транзакции, что и данные,
+поэтому задача не потеряется и не увидит незакоммиченных изменений.
+Выполняет задачи команда jobworker: она забирает их условным UPDATE,
+так что несколько обработчиков не возьмут одну задачу дважды.
+"""
+import json
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+
+def task_path(task):
+    if isinstance(task, str):
+        return task
+    return f'{task.__module__}.{task.__qualname__}'
+
+
+def enqueue(task, *, priority=0, delay=0, key='', max_attempts=None,
+            **kwargs):
+    """
+    Ставит задачу в очередь. Если задан key и такая задача уже ждёт
+    в очереди, новая не ставится: возвращается ожидающая.
+    """
+    if key:
+        waiting = Job.objects.filter(key=key, status=Job.QUEUED).first()
+        if waiting is not None:
+            return waiting
+    return Job.objects.create(
+        task=task_path(task),
+        kwargs=json.dumps(kwargs, ensure_ascii=False),
+        key=key,
+        priority=priority,
+        run_at=timezone.now() + timedelta(seconds=delay),
+        max_attempts=max_attempts or settings.JOB_MAX_ATTEMPTS,
+    )
+
+
+def claim(worker, batch=1):
+    """Забирает до batch готовых задач для обработчика worker."""
+    now = timezone.now()
+    candidates = Job.objects.filter(
+        status=Job.QUEUED, run_at__lte=now
+    ).order_by('-priority', 'run_at', 'pk').values_list('pk', flat=True)
+    claimed = []
+    for pk in candidates[:batch * 2]:
+        # Задачу получает тот, чей UPDATE изменил строку.
+        taken = Job.objects.filter(pk=pk, status=Job.QUEUED).update(
+            status=Job.RUNNING,
+            locked_by=worker,
+            locked_at=now,
+            attempts=F('attempts') + 1,
+        )
+        if taken:
+            claimed.append(pk)
+            if len(claimed) == batch:
+                break
+    return list(Job.objects.filter(pk__in=claimed, locked_by=worker))
+
+
+def backoff(attempts):
+    """Пауза перед повтором: растёт вдвое с каждой попыткой."""
+    return min(
+        settings.JOB_RETRY_BACKOFF * 2 ** (attempts - 1),
+        settings.JOB_RETRY_BACKOFF_MAX,
+    )
+
+
+def run(job):
+    """Выполняет задачу и записывает результат; ошибки не пробрасывает."""
+    try:
+        import_string(job.task)(**json.loads(job.kwargs))
+    except Exception:
+        error = traceback.format_exc()
+        logger.exception('Задача %s #%s упала', job.task, job.pk)
+        if job.attempts < job.max_attempts:
+            Job.objects.filter(pk=job.pk).update(
+                status=Job.QUEUED,
+                run_at=timezone.now() + timedelta(
+                    seconds=backoff(job.attempts)
+                ),
+                locked_by='',
+                locked_at=None,
+                last_error=error,
+            )
+        else:
+            Job.objects.filter(pk=job.pk).update(
+                status=Job.FAILED,
+                finished=timezone.now(),
+                last_error=error,
+            )
+        return False
+    Job.objects.filter(pk=job.pk).update(
+        status=Job.DONE, finished=timezone.now()
+    )
+    return True
+
+
+def release_stale():
+    """Возвращает в очередь задачи обработчиков, упавших посреди работы."""
+    expired = timezone.now() - timedelta(seconds=settings.JOB_LOCK_TIMEOUT)
+    return Job.objects.filter(
+        status=Job.RUNNING, locked_at__lt=expired
+    ).update(status=Job.QUEUED, locked_by='', locked_at=None)
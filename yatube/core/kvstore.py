@@ -0,0 +1,49 @@
+"""
+Хранилище метаданных миниатюр sorl в кэше Django.
+
+В отличие от стандартного cached_db, не ходит в базу и не кэширует
+промахи: отсутствующая запись значит, что миниатюру надо построить
+(или заново найти её файл), а get_many отдаёт записи для целой
+страницы за одно обращение к кэшу.
+"""
+from django.core.cache import InvalidCacheBackendError, cache, caches
+from sorl.thumbnail.conf import settings
+from sorl.thumbnail.images import deserialize_image_file
+from sorl.thumbnail.kvstores.base import KVStoreBase, add_prefix
+
+
+class KVStore(KVStoreBase):
+
+    @property
+    def cache(self):
+        try:
+            return caches[settings.THUMBNAIL_CACHE]
+        except InvalidCacheBackendError:
+            return cache
+
+    def get_many(self, image_files):
+        """Записи для нескольких миниатюр: {ключ файла: ImageFile}."""
+        keys = {
+            add_prefix(image_file.key): image_file.key
+            for image_file in image_files
+        }
+        found = self.cache.get_many(list(keys))
+        return {
+            keys[key]: deserialize_image_file(value)
+            for key, value in found.items()
+            if value
+        }
+
+    def _get_raw(self, key):
+        return self.cache.get(key)
+
+    def _set_raw(self, key, value):
+        self.cache.set(key, value, settings.THUMBNAIL_CACHE_TIMEOUT)
+
+    def _delete_raw(self, *keys):
+        self.cache.delete_many(keys)
+
+    def _find_keys_raw(self, prefix):
+        # Кэш не умеет перечислять ключи: очистка и cleanup
+        # сводятся к естественному вытеснению записей.
+        return []
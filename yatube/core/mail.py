@@ -0,0 +1,50 @@
+"""
+Отправка писем через очередь фоновых задач.
+
+QueuedEmailBackend только ставит письма в очередь, запрос не ждёт
+почтовый сервер. Задача deliver отправляет их бэкендом из
+QUEUED_EMAIL_BACKEND. Вложения не переносятся: сайт писем с ними
+не отправляет.
+"""
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+
+from . import jobs
+
+FIELDS = (
+    'subject', 'body', 'from_email', 'to', 'cc', 'bcc', 'reply_to',
+    'extra_headers',
+)
+
+
+def serialize(message):
+    data = {field: getattr(message, field) for field in FIELDS}
+    data['alternatives'] = list(getattr(message, 'alternatives', []))
+    return data
+
+
+def deliver(messages):
+    """Задача очереди: отправляет письма настоящим бэкендом."""
+    outgoing = [
+        EmailMultiAlternatives(
+            headers=data.pop('extra_headers'),
+            alternatives=[tuple(item) for item in data.pop('alternatives')],
+            **data
+        )
+        for data in messages
+    ]
+    get_connection(settings.QUEUED_EMAIL_BACKEND).send_messages(outgoing)
+
+
+class QueuedEmailBackend(BaseEmailBackend):
+
+    def send_messages(self, email_messages):
+        email_messages = list(email_messages)
+        if email_messages:
+            jobs.enqueue(
+                deliver,
+                priority=10,
+                messages=[serialize(message) for message in email_messages],
+            )
+        return len(email_messages)
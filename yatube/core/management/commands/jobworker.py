@@ -0,0 +1,70 @@
+import os
+import signal
+import socket
+import threading
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+
+from core import jobs
+
+
+class Command(BaseCommand):
+    help = 'Выполняет фоновые задачи из очереди'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency', type=int, default=2,
+            help='Сколько задач выполнять одновременно',
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=1.0,
+            help='Пауза в секундах, когда очередь пуста',
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выполнить готовые задачи и завершиться',
+        )
+
+    def handle(self, *args, **options):
+        self.stopping = threading.Event()
+        self.once = options['once']
+        self.poll_interval = options['poll_interval']
+        self.done = 0
+        self.lock = threading.Lock()
+        if not self.once:
+            signal.signal(signal.SIGTERM, self.stop)
+            signal.signal(signal.SIGINT, self.stop)
+        released = jobs.release_stale()
+        if released:
+            self.stdout.write(f'Возвращено в очередь задач: {released}')
+        name = f'{socket.gethostname()}:{os.getpid()}'
+        threads = [
+            threading.Thread(target=self.work, args=(f'{name}:{number}',))
+            for number in range(options['concurrency'])
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.stdout.write(f'Выполнено задач: {self.done}')
+
+    def stop(self, signum, frame):
+        self.stopping.set()
+
+    def work(self, worker):
+        try:
+            while not self.stopping.is_set():
+                close_old_connections()
+                claimed = jobs.claim(worker)
+                if not claimed:
+                    if self.once:
+                        break
+                    self.stopping.wait(self.poll_interval)
+                    continue
+                for job in claimed:
+                    succeeded = jobs.run(job)
+                    with self.lock:
+                        self.done += succeeded
+        finally:
+            connection.close()
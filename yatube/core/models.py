@@ -1,4 +1,7 @@
+from contextlib import contextmanager
+
 from django.db import models
+from django.utils import timezone
 
 
 class CreatedModel(models.Model):
@@ -10,3 +13,83 @@ class CreatedModel(models.Model):
 
     class Meta:
         abstract = True
+
+
+@contextmanager
+def preserve_created(*models):
+    """
+    Отключает auto_now_add у поля created моделей, чтобы при импорте
+    сохранялись исходные даты. Действует на весь процесс, поэтому
+    предназначено для команд управления, а не для запросов.
+    """
+    fields = [model._meta.get_field('created') for model in models]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+class Job(models.Model):
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнено'),
+        (FAILED, 'Ошибка'),
+    )
+
+    task = models.CharField(
+        'Задача',
+        max_length=200,
+        help_text='Путь к функции, например posts.thumbnails.build'
+    )
+    kwargs = models.TextField('Аргументы', default='{}')
+    key = models.CharField(
+        'Ключ',
+        max_length=200,
+        blank=True,
+        help_text='Задача с ключом не ставится, пока такая же ждёт в очереди'
+    )
+    priority = models.SmallIntegerField(
+        'Приоритет',
+        default=0,
+        help_text='Задачи с большим приоритетом выполняются раньше'
+    )
+    status = models.CharField(
+        'Состояние',
+        max_length=10,
+        choices=STATUSES,
+        default=QUEUED,
+    )
+    run_at = models.DateTimeField('Выполнить после', default=timezone.now)
+    attempts = models.PositiveSmallIntegerField('Попыток', default=0)
+    max_attempts = models.PositiveSmallIntegerField(
+        'Максимум попыток',
+        default=5,
+    )
+    locked_by = models.CharField('Обработчик', max_length=100, blank=True)
+    locked_at = models.DateTimeField('Взята в работу', null=True, blank=True)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    created = models.DateTimeField('Поставлена', auto_now_add=True)
+    finished = models.DateTimeField('Завершена', null=True, blank=True)
+
+    class Meta:
+        ordering = ('-priority', 'run_at')
+        indexes = (
+            models.Index(
+                fields=('status', '-priority', 'run_at'),
+                name='job_queue_idx',
+            ),
+            models.Index(fields=('key', 'status'), name='job_key_idx'),
+        )
+        verbose_name = 'Фоновая задача'
+        verbose_name_plural = 'Фоновые задачи'
+
+    def __str__(self):
+        return f'{self.task} ({self.get_status_display()})'
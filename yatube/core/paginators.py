@@ -0,0 +1,337 @@
+import base64
+import binascii
+import datetime
+import hashlib
+import json
+import threading
+import time
+from functools import reduce
+from operator import attrgetter, or_
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import (
+    EmptyResultSet, FieldDoesNotExist, FieldError, ValidationError
+)
+from django.core.paginator import Page, Paginator
+from django.db import connection
+from django.db.models import Q, prefetch_related_objects
+from django.utils.functional import cached_property
+
+
+def encode_cursor(values):
+    """Упаковывает значения ключа сортировки в непрозрачный токен."""
+    values = [
+        value.isoformat() if isinstance(value, datetime.datetime) else value
+        for value in values
+    ]
+    raw = json.dumps(values, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Распаковывает токен; для испорченного токена возвращает None."""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        values = json.loads(raw.decode())
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+    if not isinstance(values, list):
+        return None
+    return values
+
+
+class CursorPaginator(Paginator):
+    """
+    Постраничный вывод по ключу сортировки (по умолчанию created, id).
+
+    Страница выбирается условием WHERE по значениям ключа последней
+    (или первой) записи соседней страницы, поэтому запрос не зависит
+    от глубины страницы и не требует COUNT(*) и OFFSET.
+    """
+
+    is_cursor = True
+
+    def __init__(self, object_list, per_page, ordering=('-created', '-pk')):
+        super().__init__(object_list, per_page)
+        self.ordering = tuple(ordering)
+        self.next_cursor = None
+        self.previous_cursor = None
+        self._has_next = False
+        self._has_previous = False
+
+    @property
+    def num_pages(self):
+        # Общее число страниц неизвестно: паджинатор знает только
+        # текущую страницу и наличие соседних.
+        return self._number + self._has_next
+
+    @property
+    def _number(self):
+        return 2 if self._has_previous else 1
+
+    def _values(self, obj):
+        return [getattr(obj, name.lstrip('-')) for name in self.ordering]
+
+    @property
+    def _queryset(self):
+        return self.object_list
+
+    def _field(self, name):
+        """Поле модели или аннотации, по которому идёт сортировка."""
+        queryset = self._queryset
+        if name == 'pk':
+            return queryset.model._meta.pk
+        try:
+            return queryset.model._meta.get_field(name)
+        except FieldDoesNotExist:
+            pass
+        try:
+            return queryset.query.annotations[name].output_field
+        except (KeyError, FieldError):
+            return None
+
+    def _to_python(self, values):
+        """Значения ключа из курсора или None, если курсор испорчен."""
+        if len(values) != len(self.ordering):
+            return None
+        result = []
+        for name, value in zip(self.ordering, values):
+            # В запрос попадают только скаляры: None и вложенные
+            # списки и словари из подделанного курсора отбрасываются.
+            if value is None or isinstance(value, (dict, list)):
+                return None
+            field = self._field(name.lstrip('-'))
+            if field is not None:
+                try:
+                    value = field.to_python(value)
+                except (TypeError, ValueError, ValidationError):
+                    return None
+            if value is None:
+                return None
+            result.append(value)
+        return result
+
+    def _seek(self, values, reverse):
+        """Условие «строго после ключа» в заданном направлении обхода."""
+        condition = Q()
+        equal = {}
+        for name, value in zip(self.ordering, values):
+            descending = name.startswith('-') != reverse
+            name = name.lstrip('-')
+            lookup = '__lt' if descending else '__gt'
+            condition |= Q(**equal, **{name + lookup: value})
+            equal[name] = value
+        return condition
+
+    def _reversed_ordering(self):
+        return [
+            name[1:] if name.startswith('-') else '-' + name
+            for name in self.ordering
+        ]
+
+    def _rows(self, condition, ordering, limit):
+        """Первые limit записей после условия курсора."""
+        queryset = self.object_list
+        if condition is not None:
+            queryset = queryset.filter(condition)
+        return list(queryset.order_by(*ordering)[:limit])
+
+    def get_page(self, after=None, before=None):
+        """
+        Возвращает страницу после курсора `after` или перед `before`.
+        Без курсоров (или с испорченным курсором) — первую страницу.
+        """
+        after = after and self._to_python(decode_cursor(after) or [])
+        before = before and self._to_python(decode_cursor(before) or [])
+        if before and not after:
+            rows = self._rows(
+                self._seek(before, reverse=True),
+                self._reversed_ordering(),
+                self.per_page + 1,
+            )
+            self._has_previous = len(rows) > self.per_page
+            self._has_next = True
+            rows = rows[:self.per_page][::-1]
+        else:
+            rows = self._rows(
+                self._seek(after, reverse=False) if after else None,
+                self.ordering,
+                self.per_page + 1,
+            )
+            self._has_next = len(rows) > self.per_page
+            self._has_previous = bool(after)
+            rows = rows[:self.per_page]
+        if rows:
+            if self._has_next:
+                self.next_cursor = encode_cursor(self._values(rows[-1]))
+            if self._has_previous:
+                self.previous_cursor = encode_cursor(self._values(rows[0]))
+        else:
+            self._has_next = self._has_previous = False
+        return Page(rows, self._number, self)
+
+
+class MergedCursorPaginator(CursorPaginator):
+    """
+    Постраничный вывод по курсору из нескольких наборов с общим
+    ключом сортировки.
+
+    Каждый набор выбирается своим запросом с тем же условием курсора
+    и LIMIT per_page + 1, поэтому идёт по своему индексу; страница
+    собирается из этих выборок в памяти, и объединение наборов целиком
+    не сортируется. prefetch_related, общий у наборов, выполняется
+    один раз для готовой страницы.
+
+    partitions — {номер набора: (поле, значения)}: такой набор делится
+    на части по значениям поля (например, по авторам), у каждой части
+    свой подзапрос с LIMIT по индексу, а все части читаются одним
+    запросом. Число запросов не зависит от числа частей.
+    """
+
+    def __init__(self, sources, per_page, ordering=('-created', '-pk'),
+                 partitions=None):
+        super().__init__(list(sources), per_page, ordering=ordering)
+        self.partitions = partitions or {}
+
+    @property
+    def _queryset(self):
+        return self.object_list[0]
+
+    def _rows(self, condition, ordering, limit):
+        rows = []
+        lookups = self._queryset._prefetch_related_lookups
+        for number, queryset in enumerate(self.object_list):
+            queryset = queryset.prefetch_related(None)
+            if condition is not None:
+                queryset = queryset.filter(condition)
+            if number in self.partitions:
+                field, values = self.partitions[number]
+                rows.extend(self._partitioned(
+                    queryset, ordering, limit, field, values
+                ))
+            else:
+                rows.extend(queryset.order_by(*ordering)[:limit])
+        # Сортировка устойчива: проходы от младшего поля ключа
+        # к старшему дают порядок по всему ключу.
+        for name in reversed(ordering):
+            rows.sort(
+                key=attrgetter(name.lstrip('-')),
+                reverse=name.startswith('-'),
+            )
+        rows = rows[:limit]
+        prefetch_related_objects(rows, *lookups)
+        return rows
+
+    @staticmethod
+    def _partitioned(queryset, ordering, limit, field, values):
+        seeks = [
+            Q(pk__in=queryset.filter(**{field: value}).order_by(
+                *ordering
+            ).values('pk')[:limit])
+            for value in values
+        ]
+        if not seeks:
+            return []
+        # Части уже ограничены и упорядочены подзапросами: внешний
+        # запрос не сортирует, строки сливаются в _rows.
+        return list(queryset.filter(reduce(or_, seeks)).order_by())
+
+
+def _count_key(queryset):
+    try:
+        sql = str(queryset.query)
+    except EmptyResultSet:
+        return None
+    digest = hashlib.md5(sql.encode()).hexdigest()
+    return f'count:{queryset.model._meta.label_lower}:{digest}'
+
+
+def _refresh_count(queryset, key):
+    try:
+        cache.set(key, (queryset.count(), time.time()), None)
+    finally:
+        cache.delete(key + ':lock')
+
+
+def _refresh_in_background(queryset, key):
+    def run():
+        try:
+            _refresh_count(queryset, key)
+        finally:
+            connection.close()
+    threading.Thread(target=run, daemon=True).start()
+
+
+def cached_count(queryset):
+    """
+    Число записей из кэша. Устаревшее значение отдаётся сразу, а
+    пересчёт уходит в фоновый поток; считает синхронно только первый
+    запрос, когда значения в кэше ещё нет.
+    """
+    key = _count_key(queryset)
+    if key is None:
+        return 0
+    cached = cache.get(key)
+    if cached is None:
+        count = queryset.count()
+        cache.set(key, (count, time.time()), None)
+        return count
+    count, counted_at = cached
+    stale = time.time() - counted_at > settings.COUNT_CACHE_SECONDS
+    if stale and cache.add(key + ':lock', True, 60):
+        _refresh_in_background(queryset, key)
+    return count
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Нумерованный паджинатор без точного COUNT(*) на каждый запрос.
+
+    Число записей берётся из переданной подсказки (например,
+    денормализованного счётчика) или из cached_count. Для навигации
+    страница получает сокращённый список номеров elided_page_range.
+    """
+
+    ELLIPSIS = '…'
+
+    def __init__(self, object_list, per_page, count=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self._count_hint = count
+
+    @cached_property
+    def count(self):
+        if self._count_hint is not None:
+            return self._count_hint
+        return cached_count(self.object_list)
+
+    def get_elided_page_range(self, number=1, on_each_side=3, on_ends=1):
+        """
+        Номера страниц: первая и последняя, по on_each_side вокруг
+        текущей, пропуски обозначены ELLIPSIS.
+        """
+        number = self.validate_number(number)
+        if self.num_pages <= (on_each_side + on_ends) * 2:
+            yield from self.page_range
+            return
+        if number > (1 + on_each_side + on_ends) + 1:
+            yield from range(1, on_ends + 1)
+            yield self.ELLIPSIS
+            yield from range(number - on_each_side, number + 1)
+        else:
+            yield from range(1, number + 1)
+        if number < (self.num_pages - on_each_side - on_ends) - 1:
+            yield from range(number + 1, number + on_each_side + 1)
+            yield self.ELLIPSIS
+            yield from range(
+                self.num_pages - on_ends + 1, self.num_pages + 1
+            )
+        else:
+            yield from range(number + 1, self.num_pages + 1)
+
+    def get_page(self, number):
+        page = super().get_page(number)
+        page.elided_page_range = list(
+            self.get_elided_page_range(page.number)
+        )
+        return page
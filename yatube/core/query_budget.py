@@ -0,0 +1,90 @@
+"""
+Бюджеты SQL-запросов на представление.
+
+Представление объявляет бюджет декоратором @query_budget(n), тесты
+проверяют его через QueryBudget или assert_view_budget. При превышении
+бюджета выводится список запросов и повторяющиеся шаблоны запросов —
+обычно это и есть N+1.
+"""
+import re
+from collections import Counter
+from urllib.parse import urlsplit
+
+from django.db import connections, DEFAULT_DB_ALIAS
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+
+
+def query_budget(max_queries):
+    """Объявляет максимальное число запросов представления."""
+    def decorator(view_func):
+        view_func.query_budget = max_queries
+        return view_func
+    return decorator
+
+
+def fingerprint(sql):
+    """Шаблон запроса без литералов: одинаков у запросов N+1."""
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _IN_LIST.sub('(...)', sql)
+    return ' '.join(sql.split())
+
+
+def duplicates(queries):
+    """Шаблоны запросов, выполненные больше одного раза, по убыванию."""
+    counts = Counter(fingerprint(query['sql']) for query in queries)
+    return [(sql, count) for sql, count in counts.most_common() if count > 1]
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class QueryBudget(CaptureQueriesContext):
+    """Контекстный менеджер: падает, если запросов больше бюджета."""
+
+    def __init__(self, max_queries, label='', using=DEFAULT_DB_ALIAS):
+        super().__init__(connections[using])
+        self.max_queries = max_queries
+        self.label = label
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        super().__exit__(exc_type, exc_value, traceback)
+        if exc_type is None and len(self) > self.max_queries:
+            raise QueryBudgetExceeded(self.report())
+
+    def report(self):
+        lines = [
+            f'{self.label or "Блок"}: {len(self)} запросов '
+            f'при бюджете {self.max_queries}',
+        ]
+        lines.extend(
+            f'{number}. {query["sql"]}'
+            for number, query in enumerate(self.captured_queries, start=1)
+        )
+        repeated = duplicates(self.captured_queries)
+        if repeated:
+            lines.append('Повторяющиеся запросы:')
+            lines.extend(f'{count}x {sql}' for sql, count in repeated)
+        return '\n'.join(lines)
+
+
+def view_budget(path):
+    """Бюджет, объявленный у представления, обслуживающего адрес."""
+    view = resolve(urlsplit(path).path).func
+    budget = getattr(view, 'query_budget', None)
+    if budget is None:
+        raise LookupError(f'У представления {path} не объявлен query_budget')
+    return budget
+
+
+def assert_view_budget(client, path, **extra):
+    """Запрашивает адрес клиентом и проверяет бюджет его представления."""
+    with QueryBudget(view_budget(path), label=path):
+        response = client.get(path, **extra)
+    return response
@@ -0,0 +1,19 @@
+from django import template
+
+register = template.Library()
+
+PAGE_PARAMS = ('page', 'after', 'before')
+
+
+@register.simple_tag(takes_context=True)
+def page_url(context, **params):
+    """
+    Ссылка на другую страницу списка: параметры запроса (например,
+    строка поиска) сохраняются, прежние параметры страницы заменяются.
+    """
+    query = context['request'].GET.copy()
+    for name in PAGE_PARAMS:
+        query.pop(name, None)
+    for name, value in params.items():
+        query[name] = value
+    return f'?{query.urlencode()}' if query else '?'
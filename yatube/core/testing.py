@@ -0,0 +1,21 @@
+"""
+Помощники тестов.
+"""
+from concurrent.futures import Executor, Future
+
+
+class ImmediateExecutor(Executor):
+    """
+    Исполнитель, выполняющий задачу сразу в вызывающем потоке. Процессы
+    пула не видят тестовую базу в памяти, поэтому тесты подменяют им
+    thumbnails.executor; обратные вызовы Future при этом срабатывают
+    как обычно.
+    """
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as error:
+            future.set_exception(error)
+        return future
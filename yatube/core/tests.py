@@ -0,0 +1,169 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core import mail
+from django.core.cache import cache
+from django.core.cache.backends.db import DatabaseCache
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from . import jobs
+from .cache import bump, generations
+from .mail import QueuedEmailBackend
+from .models import Job
+
+CALLS = []
+
+
+def record(value):
+    CALLS.append(value)
+
+
+def fail():
+    raise ValueError('Сбой задачи')
+
+
+class JobQueueTests(TestCase):
+    """Проверка очереди фоновых задач"""
+
+    def setUp(self):
+        CALLS.clear()
+
+    def test_claim_once(self):
+        """Одну задачу нельзя забрать дважды"""
+
+        jobs.enqueue(record, value=1)
+        self.assertEqual(len(jobs.claim('первый')), 1)
+        self.assertEqual(jobs.claim('второй'), [])
+
+    def test_key_deduplicates_waiting_jobs(self):
+        """Задача с ключом не дублируется, пока ждёт в очереди"""
+
+        first = jobs.enqueue(record, key='ключ', value=1)
+        self.assertEqual(jobs.enqueue(record, key='ключ', value=2), first)
+        self.assertEqual(Job.objects.count(), 1)
+
+    @override_settings(JOB_RETRY_BACKOFF=10)
+    def test_retry_with_backoff(self):
+        """Упавшая задача повторяется с растущей паузой, затем сдаётся"""
+
+        job = jobs.enqueue(fail, max_attempts=2)
+        [claimed] = jobs.claim('обработчик')
+        with self.assertLogs('core.jobs', 'ERROR'):
+            self.assertFalse(jobs.run(claimed))
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.QUEUED)
+        self.assertIn('Сбой задачи', job.last_error)
+        self.assertGreater(
+            job.run_at, timezone.now() + timedelta(seconds=5)
+        )
+
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        [claimed] = jobs.claim('обработчик')
+        with self.assertLogs('core.jobs', 'ERROR'):
+            self.assertFalse(jobs.run(claimed))
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(job.attempts, 2)
+
+    @override_settings(JOB_LOCK_TIMEOUT=60)
+    def test_release_stale(self):
+        """Задачи упавшего обработчика возвращаются в очередь"""
+
+        job = jobs.enqueue(record, value=1)
+        jobs.claim('обработчик')
+        Job.objects.filter(pk=job.pk).update(
+            locked_at=timezone.now() - timedelta(minutes=5)
+        )
+        self.assertEqual(jobs.release_stale(), 1)
+        self.assertEqual(len(jobs.claim('другой')), 1)
+
+
+class JobWorkerTests(TransactionTestCase):
+    """Проверка команды jobworker: её потоки работают со своими соединениями"""
+
+    def setUp(self):
+        CALLS.clear()
+
+    def test_run_in_priority_order(self):
+        """Задачи выполняются по приоритету, затем по времени"""
+
+        jobs.enqueue(record, value='обычная')
+        jobs.enqueue(record, priority=5, value='срочная')
+        jobs.enqueue(record, delay=60, value='отложенная')
+        out = StringIO()
+        call_command('jobworker', once=True, concurrency=1, stdout=out)
+        self.assertEqual(CALLS, ['срочная', 'обычная'])
+        self.assertIn('Выполнено задач: 2', out.getvalue())
+        self.assertEqual(
+            Job.objects.filter(status=Job.QUEUED).count(), 1
+        )
+
+    @override_settings(
+        QUEUED_EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend'
+    )
+    def test_queued_email(self):
+        """Письмо уходит не из запроса, а из очереди"""
+
+        message = mail.EmailMessage(
+            'Тема', 'Текст', 'from@yatube.ru', ['to@yatube.ru'],
+            connection=QueuedEmailBackend(),
+        )
+        message.send()
+        self.assertEqual(mail.outbox, [])
+        call_command('jobworker', once=True, stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].subject, 'Тема')
+
+
+@override_settings(CACHES={
+    'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'test_cache_table',
+    }
+})
+class SharedCacheTests(TestCase):
+    """Проверка кэша, общего для процессов"""
+
+    def setUp(self):
+        call_command('createcachetable', verbosity=0)
+        # Отдельный экземпляр бэкенда ничего не держит в памяти
+        # текущего: так кэш видит другой процесс.
+        self.other = DatabaseCache('test_cache_table', {})
+
+    def test_worker_writes_visible(self):
+        """Запись из другого процесса видна веб-процессу"""
+
+        self.other.set('shared', 'значение')
+        self.assertEqual(cache.get('shared'), 'значение')
+
+    def test_add_is_exclusive(self):
+        """Блокировку через add() получает только один процесс"""
+
+        self.assertTrue(cache.add('lock', 'веб'))
+        self.assertFalse(self.other.add('lock', 'воркер'))
+        self.assertEqual(cache.get('lock'), 'веб')
+
+
+class BumpOnCommitTests(TransactionTestCase):
+    """Проверка сдвига поколений при фиксации транзакции"""
+
+    def test_bumped_again_after_commit(self):
+        """Поколение, прочитанное внутри транзакции, устаревает после неё"""
+
+        with transaction.atomic():
+            bump('scope')
+            inside = generations('scope')
+        self.assertNotEqual(generations('scope'), inside)
+
+    def test_rolled_back_bump_not_repeated(self):
+        """После отката повторного сдвига нет"""
+
+        with self.assertRaises(ValueError):
+            with transaction.atomic():
+                bump('scope')
+                inside = generations('scope')
+                raise ValueError
+        self.assertEqual(generations('scope'), inside)
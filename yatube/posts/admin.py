@@ -1,9 +1,50 @@
 from django.contrib import admin
+from django.db.models import Q
 
+from core.paginators import EstimatedCountPaginator
+from . import caching, search
 from .models import Post, Group, Comment, Follow
 
 
-class PostAdmin(admin.ModelAdmin):
+class LargeTableAdmin(admin.ModelAdmin):
+    """
+    Список, который не сканирует таблицу целиком: число записей берётся
+    из кэша (cached_count), а не COUNT(*) на каждый запрос, и полное
+    число без учёта фильтров не считается.
+
+    exact_search_fields ищутся точным совпадением, чтобы запрос шёл
+    по уникальному индексу, а не LIKE по всей таблице; остальные поля
+    из search_fields — по вхождению, как обычно.
+    """
+
+    show_full_result_count = False
+    exact_search_fields = ()
+
+    def get_paginator(self, request, queryset, per_page, orphans=0,
+                      allow_empty_first_page=True):
+        return EstimatedCountPaginator(
+            queryset,
+            per_page,
+            orphans=orphans,
+            allow_empty_first_page=allow_empty_first_page,
+        )
+
+    def get_search_results(self, request, queryset, search_term):
+        term = search_term.strip()
+        if not term or not self.exact_search_fields:
+            return super().get_search_results(
+                request, queryset, search_term
+            )
+        condition = Q()
+        for field in self.exact_search_fields:
+            condition |= Q(**{field: term})
+        for field in self.search_fields:
+            if field not in self.exact_search_fields:
+                condition |= Q(**{f'{field}__icontains': term})
+        return queryset.filter(condition), False
+
+
+class PostAdmin(LargeTableAdmin):
 
     list_display = (
         'pk',
@@ -13,12 +54,34 @@ class PostAdmin(admin.ModelAdmin):
         'group'
     )
     list_editable = ('group',)
+    list_select_related = ('author', 'group')
+    raw_id_fields = ('author',)
     search_fields = ('text',)
     list_filter = ('created',)
     empty_value_display = '-пусто-'
 
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        formfield = super().formfield_for_foreignkey(
+            db_field, request, **kwargs
+        )
+        if db_field.name == 'group':
+            # Без этого выпадающий список групп в каждой строке
+            # списка делает свой запрос.
+            empty = [('', formfield.empty_label)]
+            formfield.choices = empty + caching.group_choices()
+        return formfield
+
+    def get_search_results(self, request, queryset, search_term):
+        # Поиск по тексту идёт через полнотекстовый индекс, а не LIKE
+        # по всей таблице.
+        if not search.match_query(search_term) or not search.available():
+            return super().get_search_results(
+                request, queryset, search_term
+            )
+        return search.matching(queryset, search_term), False
+
 
-class GroupAdmin(admin.ModelAdmin):
+class GroupAdmin(LargeTableAdmin):
 
     list_display = (
         'pk',
@@ -27,26 +90,33 @@ class GroupAdmin(admin.ModelAdmin):
         'description'
     )
     search_fields = ('title',)
+    exact_search_fields = ('slug',)
     empty_value_display = '-пусто-'
 
 
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(LargeTableAdmin):
 
     list_display = (
         'post',
         'author',
         'text',
     )
-    search_fields = ('text', 'post')
+    list_select_related = ('post', 'author')
+    raw_id_fields = ('post', 'author')
+    search_fields = ('author__username',)
+    exact_search_fields = ('author__username',)
 
 
-class FollowAdmin(admin.ModelAdmin):
+class FollowAdmin(LargeTableAdmin):
 
     list_display = (
         'user',
         'author',
     )
-    search_fields = ('user', 'author')
+    list_select_related = ('user', 'author')
+    raw_id_fields = ('user', 'author')
+    search_fields = ('user__username', 'author__username')
+    exact_search_fields = ('user__username', 'author__username')
 
 
 admin.site.register(Post, PostAdmin)
@@ -0,0 +1,83 @@
+"""
+Планы и время запросов лент.
+
+Для каждого запроса ленты строится план (EXPLAIN) и проверяется, что
+выборка идёт по индексу: без полного просмотра таблицы и без
+сортировки во временном дереве. Используется командой
+benchmark_queries и тестами индексов.
+"""
+import re
+import time
+
+from django.conf import settings
+from django.db import connection
+
+from . import queries, timelines
+from .models import Follow, Group, Post, User
+
+_FULL_SCAN = re.compile(r'\bSCAN (?:TABLE )?(\w+)\b(?! USING)')
+_TEMP_SORT = 'USE TEMP B-TREE FOR'
+_INDEX = re.compile(r'USING (?:COVERING )?INDEX (\w+)')
+
+
+def feed_queries():
+    """Запросы лент в том виде, в каком их выполняют представления."""
+    group = Group.objects.only('pk').first() or Group(pk=0)
+    author = User.objects.only('pk').first() or User(pk=0)
+    post_id = Post.objects.values_list('pk', flat=True).first() or 0
+    reader = User.objects.filter(
+        pk=Follow.objects.values('user_id')[:1]
+    ).only('pk').first() or author
+    page = settings.MAX_COUNT_POST + 1
+    ordering = ('-created', '-pk')
+    # Лента подписок: записи ленты и подзапрос части подтягиваемых
+    # постов (одного автора), которые слияние читает с тем же курсором.
+    follow_feed, follow_pulled = queries.follow_posts(reader)
+    return {
+        'follow': follow_feed.order_by(*timelines.ORDERING)[:page],
+        'follow_pulled': follow_pulled.filter(
+            author_id=author.pk
+        ).order_by(*timelines.ORDERING)[:page],
+        'follow_pulled_authors': timelines.pulled_authors(reader),
+        'index': queries.index_posts().order_by(*ordering)[:page],
+        'group': queries.group_posts(group).order_by(*ordering)[:page],
+        'profile': queries.author_posts(author).order_by(*ordering)[:page],
+        'comments': queries.post_comments(post_id).order_by(
+            *ordering
+        )[:settings.COMMENTS_PER_PAGE + 1],
+        'followers': queries.followers(author).order_by(
+            '-user_id'
+        )[:settings.FOLLOWS_PER_PAGE + 1],
+        'following': queries.following(author).order_by(
+            '-author_id'
+        )[:settings.FOLLOWS_PER_PAGE + 1],
+        'recommendations': queries.recommendations(author),
+        'is_following': Follow.objects.filter(
+            user=author, author=author
+        ).order_by().values('pk')[:1],
+    }
+
+
+def problems(plan):
+    """Что в плане мешает запросу идти по индексу."""
+    found = [f'полный просмотр {table}' for table in _FULL_SCAN.findall(plan)]
+    if _TEMP_SORT in plan:
+        found.append('сортировка или группировка во временном дереве')
+    return found
+
+
+def indexes(plan):
+    return _INDEX.findall(plan)
+
+
+def timing(queryset, repeat):
+    """Среднее время выполнения запроса в миллисекундах."""
+    started = time.perf_counter()
+    for _ in range(repeat):
+        list(queryset.all())
+    return (time.perf_counter() - started) * 1000 / repeat
+
+
+def supported():
+    # Разбор плана написан для вывода EXPLAIN QUERY PLAN SQLite.
+    return connection.vendor == 'sqlite'
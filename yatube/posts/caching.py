@@ -0,0 +1,134 @@
+"""
+Области кэша постов.
+
+Карточка поста выводится на главной, в группе и в профиле автора,
+поэтому изменение поста или его комментариев сдвигает все эти области.
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+from core.cache import bump, version
+from .models import Group, Post, User
+
+INDEX = 'posts'
+# Список групп: меняется только при изменении самих групп.
+GROUPS = 'groups'
+
+
+def group_scope(group_id):
+    return f'group:{group_id}'
+
+
+def author_scope(user_id):
+    return f'author:{user_id}'
+
+
+def follow_scope(user_id):
+    return f'follow:{user_id}'
+
+
+def post_scope(post_id):
+    return f'post:{post_id}'
+
+
+def bump_post(post, *group_ids):
+    """Сбрасывает кэш страниц, на которых выводится пост."""
+    scopes = [INDEX, author_scope(post.author_id), post_scope(post.pk)]
+    scopes.extend(
+        group_scope(group_id)
+        for group_id in {post.group_id, *group_ids}
+        if group_id is not None
+    )
+    bump(*scopes)
+
+
+def group_choices():
+    """Варианты выбора группы (id, название), общие для всех форм."""
+    key = f'group-choices:{version(GROUPS)}'
+    choices = cache.get(key)
+    if choices is None:
+        choices = list(Group.objects.values_list('pk', 'title'))
+        cache.set(key, choices, settings.CASH_SECONDS)
+    return choices
+
+
+def index_version():
+    return version(INDEX)
+
+
+def group_version(group):
+    return version(group_scope(group.pk))
+
+
+def profile_version(author):
+    return version(author_scope(author.pk))
+
+
+def follow_version(user):
+    return version(INDEX, follow_scope(user.pk))
+
+
+def post_version(post):
+    return version(post_scope(post.pk))
+
+
+# Области страниц для условных запросов вычисляются до построения
+# страницы. Связь адреса с владельцем области не меняется (у переименованной
+# группы всё равно сдвигается поколение), поэтому она кэшируется; при
+# удалении владельца запись удаляется.
+
+def _owner_key(kind, key):
+    return f'owner:{kind}:{key}'
+
+
+def forget_owner(kind, key):
+    cache.delete(_owner_key(kind, key))
+
+
+def _owner_id(kind, key, queryset):
+    cache_key = _owner_key(kind, key)
+    owner_id = cache.get(cache_key)
+    if owner_id is None:
+        owner_id = queryset.first()
+        if owner_id is not None:
+            cache.set(cache_key, owner_id, settings.CASH_SECONDS)
+    return owner_id
+
+
+def index_scopes(request):
+    return (INDEX,)
+
+
+def group_scopes(request, slug):
+    group_id = _owner_id('group', slug, Group.objects.filter(
+        slug=slug
+    ).values_list('pk', flat=True))
+    return None if group_id is None else (group_scope(group_id),)
+
+
+def profile_scopes(request, username):
+    author_id = _owner_id('user', username, User.objects.filter(
+        username=username
+    ).values_list('pk', flat=True))
+    return None if author_id is None else (author_scope(author_id),)
+
+
+def profile_page_scopes(request, username):
+    """Профиль с подборкой авторов, которая зависит от посетителя."""
+    scopes = profile_scopes(request, username)
+    if scopes is None or not request.user.is_authenticated:
+        return scopes
+    return (*scopes, follow_scope(request.user.pk))
+
+
+def follow_scopes(request):
+    return (INDEX, follow_scope(request.user.pk))
+
+
+def post_scopes(request, post_id):
+    author_id = _owner_id('post', post_id, Post.objects.filter(
+        pk=post_id
+    ).values_list('author_id', flat=True))
+    if author_id is None:
+        return None
+    return (post_scope(post_id), author_scope(author_id))
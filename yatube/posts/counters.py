@@ -0,0 +1,87 @@
+"""
+Денормализованные счётчики постов, комментариев и подписок.
+
+Счётчики меняются атомарными UPDATE ... SET x = x + 1 из сигналов
+моделей Post, Comment и Follow. Команда recount_counters сверяет их
+с фактическими данными и исправляет расхождения.
+"""
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from core.paginators import cached_count
+from .models import Comment, Follow, Group, Post, UserCounters
+
+# (модель, поле счётчика, считаемая модель, внешний ключ на модель)
+COUNTERS = (
+    (Group, 'posts_count', Post, 'group'),
+    (Post, 'comments_count', Comment, 'post'),
+    (UserCounters, 'posts_count', Post, 'author'),
+    (UserCounters, 'followers_count', Follow, 'author'),
+    (UserCounters, 'following_count', Follow, 'user'),
+)
+
+
+def actual(counted_model, foreign_key):
+    """Выражение с фактическим значением счётчика для строки."""
+    return Coalesce(
+        Subquery(
+            counted_model.objects.filter(**{foreign_key: OuterRef('pk')})
+            .order_by()
+            .values(foreign_key)
+            .annotate(count=Count('pk'))
+            .values('count')
+        ),
+        0,
+    )
+
+
+def change(model, pk, **deltas):
+    """Сдвигает счётчики строки на заданные величины, не уходя в минус."""
+    if pk is None:
+        return 0
+    return model.objects.filter(pk=pk).update(**{
+        field: F(field) + delta if delta > 0
+        else Greatest(F(field) + delta, 0)
+        for field, delta in deltas.items()
+    })
+
+
+def change_user(user_id, **deltas):
+    """Сдвигает счётчики пользователя, создавая строку при её отсутствии."""
+    if not change(UserCounters, user_id, **deltas):
+        counters = UserCounters(user_id=user_id)
+        for model, field, counted_model, foreign_key in COUNTERS:
+            if model is UserCounters:
+                setattr(counters, field, counted_model.objects.filter(
+                    **{foreign_key + '_id': user_id}
+                ).count())
+        counters.save()
+
+
+def user_value(user, field):
+    """
+    Счётчик пользователя. У пользователей из фикстур и из импорта без
+    финализации строки счётчиков может не быть: тогда число берётся
+    из cached_count.
+    """
+    counters = getattr(user, 'counters', None)
+    if counters is not None:
+        return getattr(counters, field)
+    for model, counter_field, counted_model, foreign_key in COUNTERS:
+        if model is UserCounters and counter_field == field:
+            return cached_count(counted_model.objects.filter(
+                **{foreign_key + '_id': user.pk}
+            ))
+    raise LookupError(f'Нет счётчика пользователя {field}')
+
+
+def repair(model, field, counted_model, foreign_key, pks):
+    """Исправляет расхождения счётчика у строк с заданными pk."""
+    expected = actual(counted_model, foreign_key)
+    drifted = model.objects.filter(pk__in=pks).annotate(
+        expected=expected
+    ).exclude(**{field: F('expected')})
+    repaired = 0
+    for pk, value in drifted.values_list('pk', 'expected'):
+        repaired += model.objects.filter(pk=pk).update(**{field: value})
+    return repaired
@@ -0,0 +1,109 @@
+"""
+Архив данных пользователя.
+
+Архив собирается на лету: zipfile пишет в поток, который отдаёт
+накопленные байты после каждого куска, а записи читаются из базы
+итератором по EXPORT_CHUNK_SIZE. Память не зависит от размера архива.
+"""
+import io
+import json
+import posixpath
+import zipfile
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+
+FILE_CHUNK_SIZE = 64 * 1024
+
+
+class _Stream(io.RawIOBase):
+    """Поток без перемотки: копит записанные байты до drain()."""
+
+    def __init__(self):
+        super().__init__()
+        self.buffer = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.buffer.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        """Отдаёт накопленные байты, если они есть."""
+        if self.buffer:
+            data = b''.join(self.buffer)
+            self.buffer = []
+            yield data
+
+
+def _lines(queryset, row):
+    for obj in queryset.iterator(chunk_size=settings.EXPORT_CHUNK_SIZE):
+        yield (json.dumps(row(obj), ensure_ascii=False) + '\n').encode()
+
+
+def _post_row(post):
+    return {
+        'id': post.pk,
+        'text': post.text,
+        'created': post.created.isoformat(),
+        'group': post.group.slug if post.group else None,
+        'image': post.image.name or None,
+    }
+
+
+def _comment_row(comment):
+    return {
+        'id': comment.pk,
+        'post': comment.post_id,
+        'text': comment.text,
+        'created': comment.created.isoformat(),
+    }
+
+
+def _follow_row(follow):
+    return {
+        'author': follow.author.username,
+        'created': follow.created.isoformat(),
+    }
+
+
+def _image_chunks(name):
+    try:
+        file = default_storage.open(name)
+    except OSError:
+        return
+    with file:
+        yield from iter(lambda: file.read(FILE_CHUNK_SIZE), b'')
+
+
+def entries(user):
+    """Файлы архива: (имя, сжимать ли, итератор кусков содержимого)."""
+    posts = user.posts.select_related('group').order_by('pk')
+    yield 'posts.jsonl', True, _lines(posts, _post_row)
+    comments = user.comments.order_by('pk')
+    yield 'comments.jsonl', True, _lines(comments, _comment_row)
+    follows = user.follower.select_related('author').order_by('pk')
+    yield 'follows.jsonl', True, _lines(follows, _follow_row)
+    images = posts.exclude(image='').values_list('image', flat=True)
+    for name in images.iterator(chunk_size=settings.EXPORT_CHUNK_SIZE):
+        # Картинки уже сжаты: повторно их не сжимаем.
+        yield posixpath.join('images', name), False, _image_chunks(name)
+
+
+def archive(user):
+    """Куски ZIP-архива с постами, комментариями, подписками и картинками."""
+    stream = _Stream()
+    with zipfile.ZipFile(stream, 'w') as zip_file:
+        for name, compress, chunks in entries(user):
+            info = zipfile.ZipInfo(name)
+            info.compress_type = (
+                zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED
+            )
+            with zip_file.open(info, 'w', force_zip64=True) as entry:
+                for chunk in chunks:
+                    entry.write(chunk)
+                    yield from stream.drain()
+            yield from stream.drain()
+    yield from stream.drain()
@@ -0,0 +1,134 @@
+"""
+RSS и Atom лент постов: всех, группы и автора.
+
+Ленты опрашиваются программами чтения постоянно, поэтому готовый
+документ кэшируется так же, как страницы (core.decorators): запись
+сбрасывается новым поколением областей кэша, а опрос с актуальным
+ETag или If-Modified-Since получает 304 без построения ленты.
+"""
+from django.conf import settings
+from django.contrib.syndication.views import Feed
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.feedgenerator import Atom1Feed
+from django.utils.text import Truncator
+
+from core.decorators import cache_for_anonymous, conditional_on
+from . import caching
+from .models import Group, Post, User
+
+
+def cached_feed(feed, scopes_func):
+    """Представление ленты с кэшем и условными запросами."""
+    @conditional_on(scopes_func)
+    @cache_for_anonymous
+    def view(request, *args, **kwargs):
+        response = feed(request, *args, **kwargs)
+        # Feed ставит дату последнего поста, а условный запрос сверяет
+        # дату поколения областей: заголовок ставит conditional_on.
+        del response['Last-Modified']
+        response.cache_scopes = scopes_func(request, *args, **kwargs) or ()
+        return response
+    return view
+
+
+class PostsFeed(Feed):
+    title = 'Yatube: последние записи'
+    description = 'Последние записи на сайте'
+
+    def link(self):
+        return reverse('posts:index')
+
+    def posts(self, obj):
+        return Post.objects.all()
+
+    def items(self, obj):
+        return self.posts(obj).select_related('author', 'group')[
+            :settings.FEED_ITEMS
+        ]
+
+    def item_title(self, post):
+        return Truncator(post.text).words(settings.FEED_TITLE_WORDS)
+
+    def item_description(self, post):
+        return post.text
+
+    def item_link(self, post):
+        return reverse('posts:post_detail', kwargs={'post_id': post.pk})
+
+    def item_pubdate(self, post):
+        return post.created
+
+    def item_author_name(self, post):
+        return post.author.get_full_name() or post.author.username
+
+    def item_author_link(self, post):
+        return reverse('posts:profile', kwargs={
+            'username': post.author.username
+        })
+
+    def item_categories(self, post):
+        return (post.group.title,) if post.group else ()
+
+
+class GroupPostsFeed(PostsFeed):
+
+    def get_object(self, request, slug):
+        return get_object_or_404(Group, slug=slug)
+
+    def title(self, group):
+        return f'Yatube: {group.title}'
+
+    def description(self, group):
+        return group.description
+
+    def link(self, group):
+        return reverse('posts:group', kwargs={'slug': group.slug})
+
+    def posts(self, group):
+        return group.posts.all()
+
+
+class AuthorPostsFeed(PostsFeed):
+
+    def get_object(self, request, username):
+        return get_object_or_404(User, username=username)
+
+    def title(self, author):
+        return f'Yatube: записи {author.get_full_name() or author.username}'
+
+    def description(self, author):
+        return f'Последние записи {author.username}'
+
+    def link(self, author):
+        return reverse('posts:profile', kwargs={'username': author.username})
+
+    def posts(self, author):
+        return author.posts.all()
+
+
+class AtomMixin:
+    feed_type = Atom1Feed
+
+    def subtitle(self, obj):
+        return self._get_dynamic_attr('description', obj)
+
+
+class PostsAtomFeed(AtomMixin, PostsFeed):
+    pass
+
+
+class GroupPostsAtomFeed(AtomMixin, GroupPostsFeed):
+    pass
+
+
+class AuthorPostsAtomFeed(AtomMixin, AuthorPostsFeed):
+    pass
+
+
+index_rss = cached_feed(PostsFeed(), caching.index_scopes)
+index_atom = cached_feed(PostsAtomFeed(), caching.index_scopes)
+group_rss = cached_feed(GroupPostsFeed(), caching.group_scopes)
+group_atom = cached_feed(GroupPostsAtomFeed(), caching.group_scopes)
+author_rss = cached_feed(AuthorPostsFeed(), caching.profile_scopes)
+author_atom = cached_feed(AuthorPostsAtomFeed(), caching.profile_scopes)
@@ -0,0 +1,47 @@
+"""
+Метаданные картинок постов.
+
+Размеры, объём и хэш картинки считаются один раз, при загрузке,
+и хранятся в полях поста: шаблонам и миниатюрам не нужно открывать
+файл, чтобы узнать его размеры.
+"""
+import hashlib
+
+from django.core.files.images import get_image_dimensions
+
+
+def metadata(file):
+    """
+    Метаданные файла картинки. Файл читается кусками, размеры берутся
+    из заголовка, без декодирования картинки.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    file.seek(0)
+    for chunk in file.chunks():
+        digest.update(chunk)
+        size += len(chunk)
+    width, height = get_image_dimensions(file)
+    return {
+        'image_width': width,
+        'image_height': height,
+        'image_size': size,
+        'image_hash': digest.hexdigest(),
+    }
+
+
+def empty():
+    """Метаданные поста без картинки."""
+    return {
+        'image_width': None,
+        'image_height': None,
+        'image_size': None,
+        'image_hash': '',
+    }
+
+
+def dimensions(post):
+    """Сохранённые размеры картинки поста или None."""
+    if post.image_width and post.image_height:
+        return post.image_width, post.image_height
+    return None
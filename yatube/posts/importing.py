@@ -0,0 +1,257 @@
+"""
+Массовый импорт пользователей, групп, постов, комментариев и подписок.
+
+Строки читаются потоком из JSONL или CSV и записываются пачками через
+bulk_create, каждая пачка — в своей транзакции. Ссылки на другие
+записи задаются естественными ключами (имя пользователя, slug группы,
+id поста) и разрешаются одним запросом на пачку.
+
+bulk_create не вызывает сигналы, поэтому счётчики, ленты и кэш после
+импорта приводятся в порядок отдельно (см. команду import_content).
+"""
+import csv
+import io
+import json
+import sys
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from core.models import preserve_created
+from . import timelines
+from .models import Comment, Follow, Group, Post, User, UserCounters
+
+
+class RowError(ValueError):
+    """Строку нельзя импортировать: её пропускают и считают."""
+
+
+def read_rows(path, data_format=None):
+    """Строки файла словарями; path '-' — стандартный ввод."""
+    if data_format is None:
+        data_format = 'csv' if path.endswith('.csv') else 'jsonl'
+    if path == '-':
+        stream = io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8')
+    else:
+        stream = open(path, encoding='utf-8', newline='')
+    with stream:
+        if data_format == 'csv':
+            yield from csv.DictReader(stream)
+            return
+        for line in stream:
+            if line.strip():
+                yield json.loads(line)
+
+
+def chunks(rows, size):
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _created(row):
+    value = row.get('created') or row.get('date_joined')
+    if not value:
+        return timezone.now()
+    created = parse_datetime(value)
+    if created is None:
+        raise RowError(f'Неверная дата: {value}')
+    if timezone.is_naive(created):
+        created = timezone.make_aware(created)
+    return created
+
+
+def _require(row, *names):
+    for name in names:
+        if not row.get(name):
+            raise RowError(f'Нет поля {name}')
+
+
+def _id(row):
+    """id записи из строки; пустой id — новая запись."""
+    value = row.get('id')
+    if value is None or value == '':
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise RowError(f'Неверный id: {value}')
+
+
+def _user_ids(rows, *names):
+    usernames = {row[name] for row in rows for name in names if row.get(name)}
+    return dict(User.objects.filter(
+        username__in=usernames
+    ).values_list('username', 'pk'))
+
+
+def _lookup(ids, value, what):
+    if value not in ids:
+        raise RowError(f'Не найден {what}: {value}')
+    return ids[value]
+
+
+def no_refs(rows):
+    return {}
+
+
+def build_user(row, refs):
+    _require(row, 'username')
+    return User(
+        username=row['username'],
+        email=row.get('email', ''),
+        first_name=row.get('first_name', ''),
+        last_name=row.get('last_name', ''),
+        # Хэши паролей переносятся как есть; без хэша войти можно
+        # будет только после сброса пароля.
+        password=row.get('password') or make_password(None),
+        date_joined=_created(row),
+    )
+
+
+def build_group(row, refs):
+    _require(row, 'title', 'slug')
+    return Group(
+        title=row['title'],
+        slug=row['slug'],
+        description=row.get('description', ''),
+    )
+
+
+def post_refs(rows):
+    return {
+        'authors': _user_ids(rows, 'author'),
+        'groups': dict(Group.objects.filter(
+            slug__in={row['group'] for row in rows if row.get('group')}
+        ).values_list('slug', 'pk')),
+    }
+
+
+def build_post(row, refs):
+    _require(row, 'text', 'author')
+    return Post(
+        pk=_id(row),
+        text=row['text'],
+        author_id=_lookup(refs['authors'], row['author'], 'автор'),
+        group_id=(
+            _lookup(refs['groups'], row['group'], 'группа')
+            if row.get('group') else None
+        ),
+        image=row.get('image', ''),
+        created=_created(row),
+    )
+
+
+def comment_refs(rows):
+    post_ids = set()
+    for row in rows:
+        try:
+            post_ids.add(int(row['post']))
+        except (KeyError, TypeError, ValueError):
+            pass
+    return {
+        'authors': _user_ids(rows, 'author'),
+        'posts': set(Post.objects.filter(
+            pk__in=post_ids
+        ).values_list('pk', flat=True)),
+    }
+
+
+def build_comment(row, refs):
+    _require(row, 'text', 'author', 'post')
+    post_id = int(row['post'])
+    if post_id not in refs['posts']:
+        raise RowError(f'Не найден пост: {post_id}')
+    return Comment(
+        pk=_id(row),
+        post_id=post_id,
+        author_id=_lookup(refs['authors'], row['author'], 'автор'),
+        text=row['text'],
+        created=_created(row),
+    )
+
+
+def follow_refs(rows):
+    return {'users': _user_ids(rows, 'user', 'author')}
+
+
+def build_follow(row, refs):
+    _require(row, 'user', 'author')
+    if row['user'] == row['author']:
+        raise RowError(f'Подписка на себя: {row["user"]}')
+    return Follow(
+        user_id=_lookup(refs['users'], row['user'], 'пользователь'),
+        author_id=_lookup(refs['users'], row['author'], 'автор'),
+        created=_created(row),
+    )
+
+
+def create_counters(users):
+    """
+    Заводит строки счётчиков новым пользователям пачки: сигнал
+    create_user_counters при bulk_create не срабатывает.
+    """
+    user_ids = User.objects.filter(
+        username__in=[user.username for user in users]
+    ).values_list('pk', flat=True)
+    UserCounters.objects.bulk_create(
+        (UserCounters(user_id=user_id) for user_id in user_ids),
+        ignore_conflicts=True,
+    )
+
+
+def backfill_follows(follows):
+    """
+    Подписки на авторов, чьи посты уже разосланы по лентам, получают
+    эти посты в ленту, как при обычной подписке.
+    """
+    fanned_out = set(Post.objects.filter(
+        author_id__in={follow.author_id for follow in follows},
+        in_timelines=True,
+    ).values_list('author_id', flat=True).distinct())
+    for follow in follows:
+        if follow.author_id in fanned_out:
+            timelines.backfill(follow.user_id, follow.author_id)
+
+
+# вид данных -> (модель, ссылки пачки, построитель строки,
+# действие после записи пачки)
+KINDS = {
+    'users': (User, no_refs, build_user, create_counters),
+    'groups': (Group, no_refs, build_group, None),
+    'posts': (Post, post_refs, build_post, None),
+    'comments': (Comment, comment_refs, build_comment, None),
+    'follows': (Follow, follow_refs, build_follow, backfill_follows),
+}
+
+
+def import_rows(kind, rows, chunk_size=1000):
+    """
+    Импортирует строки вида kind пачками по chunk_size. После каждой
+    пачки отдаёт (число строк, ошибки пачки). Уже существующие записи
+    (тот же id, имя, slug или пара подписки) пропускаются.
+    """
+    model, refs_func, build, after_chunk = KINDS[kind]
+    with preserve_created(Post, Comment, Follow):
+        for chunk in chunks(rows, chunk_size):
+            refs = refs_func(chunk)
+            objects = []
+            errors = []
+            for row in chunk:
+                try:
+                    objects.append(build(row, refs))
+                except (RowError, TypeError, ValueError) as error:
+                    errors.append(str(error))
+            with transaction.atomic():
+                model.objects.bulk_create(
+                    objects, batch_size=chunk_size, ignore_conflicts=True
+                )
+                if after_chunk is not None:
+                    after_chunk(objects)
+            yield len(chunk), errors
@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts import images
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Заполняет размеры, объём и хэш картинок старых постов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=200,
+            help='Сколько постов обрабатывать за одну транзакцию',
+        )
+
+    def handle(self, *args, **options):
+        pending = Post.objects.exclude(image='').filter(
+            image_hash=''
+        ).order_by('pk')
+        last_pk = 0
+        filled = 0
+        missing = 0
+        while True:
+            chunk = list(
+                pending.filter(pk__gt=last_pk)
+                .only('pk', 'image')[:options['chunk_size']]
+            )
+            if not chunk:
+                break
+            with transaction.atomic():
+                for post in chunk:
+                    try:
+                        with post.image.open('rb') as file:
+                            values = images.metadata(file)
+                    except (OSError, ValueError):
+                        missing += 1
+                        continue
+                    # update(), а не save(): метаданные не меняют
+                    # содержимое страниц, сигналы здесь не нужны.
+                    filled += Post.objects.filter(pk=post.pk).update(
+                        **values
+                    )
+            last_pk = chunk[-1].pk
+        self.stdout.write(f'Заполнено постов: {filled}')
+        if missing:
+            self.stdout.write(f'Файлы не найдены: {missing}')
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import benchmark
+
+
+class Command(BaseCommand):
+    help = 'Показывает планы и время запросов лент и проверяет их индексы'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--repeat', type=int, default=20,
+            help='Сколько раз выполнить запрос для замера времени',
+        )
+
+    def handle(self, *args, **options):
+        if not benchmark.supported():
+            raise CommandError('Разбор планов поддерживается только в SQLite')
+        failed = []
+        for name, queryset in benchmark.feed_queries().items():
+            plan = queryset.explain()
+            problems = benchmark.problems(plan)
+            milliseconds = benchmark.timing(queryset, options['repeat'])
+            used = ', '.join(benchmark.indexes(plan)) or '-'
+            self.stdout.write(
+                f'{name}: {milliseconds:.2f} мс, индексы: {used}'
+            )
+            for line in plan.splitlines():
+                self.stdout.write(f'    {line}')
+            if problems:
+                failed.append(name)
+                self.stdout.write(f'    ! {"; ".join(problems)}')
+        if failed:
+            raise CommandError(
+                f'Запросы идут не по индексу: {", ".join(failed)}'
+            )
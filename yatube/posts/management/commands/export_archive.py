@@ -0,0 +1,37 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import export
+from posts.models import User
+
+
+class Command(BaseCommand):
+    help = 'Выгружает архив данных пользователя в ZIP'
+
+    def add_arguments(self, parser):
+        parser.add_argument('username', help='Чей архив выгрузить')
+        parser.add_argument(
+            '--output', default='-',
+            help='Файл архива или - для стандартного вывода',
+        )
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(username=options['username']).first()
+        if user is None:
+            raise CommandError(
+                f'Пользователь {options["username"]} не найден'
+            )
+        if options['output'] == '-':
+            self.write(user, sys.stdout.buffer)
+            return
+        with open(options['output'], 'wb') as output:
+            written = self.write(user, output)
+        self.stderr.write(f'Записано байт: {written}')
+
+    def write(self, user, output):
+        written = 0
+        for chunk in export.archive(user):
+            output.write(chunk)
+            written += len(chunk)
+        return written
@@ -0,0 +1,74 @@
+import time
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+
+from posts import importing
+
+
+class Command(BaseCommand):
+    help = (
+        'Импортирует пользователей, группы, посты, комментарии '
+        'и подписки из JSONL или CSV'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'kind', choices=sorted(importing.KINDS),
+            help='Что импортировать',
+        )
+        parser.add_argument(
+            'path', help='Файл с данными или - для стандартного ввода',
+        )
+        parser.add_argument(
+            '--format', choices=('jsonl', 'csv'), dest='data_format',
+            help='Формат данных; по умолчанию по расширению файла',
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=1000,
+            help='Сколько строк записывать за одну транзакцию',
+        )
+        parser.add_argument(
+            '--skip-finalize', action='store_true',
+            help=(
+                'Не пересчитывать счётчики и ленты после импорта '
+                '(если импорт идёт несколькими файлами подряд)'
+            ),
+        )
+
+    def handle(self, *args, **options):
+        kind = options['kind']
+        rows = importing.read_rows(options['path'], options['data_format'])
+        started = time.monotonic()
+        total = 0
+        skipped = 0
+        for count, errors in importing.import_rows(
+            kind, rows, options['chunk_size']
+        ):
+            total += count
+            skipped += len(errors)
+            for error in errors:
+                self.stderr.write(f'Пропущена строка: {error}')
+            self.stdout.write(
+                f'{kind}: {total} строк, {self.rate(total, started)} строк/с'
+            )
+        self.stdout.write(
+            f'Импорт {kind} закончен: {total} строк, пропущено {skipped}, '
+            f'{self.rate(total, started)} строк/с'
+        )
+        if options['skip_finalize']:
+            return
+        # bulk_create обходит сигналы: счётчики, ленты и кэш
+        # приводятся в порядок одним проходом после импорта. Кэш общий
+        # с веб-процессами; записи миниатюр sorl, удалённые вместе
+        # с ним, восстанавливаются по уже готовым файлам.
+        call_command('recount_counters', stdout=self.stdout)
+        if kind == 'posts':
+            call_command('rebuild_timelines', stdout=self.stdout)
+        cache.clear()
+
+    @staticmethod
+    def rate(total, started):
+        elapsed = time.monotonic() - started
+        return round(total / elapsed) if elapsed else total
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from posts import timelines
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Рассылает по лентам подписчиков посты, ещё не записанные в ленты'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=500,
+            help='Сколько постов обрабатывать за один проход',
+        )
+
+    def handle(self, *args, **options):
+        pending = Post.objects.filter(in_timelines=False).order_by('pk')
+        last_pk = 0
+        fanned_out = 0
+        while True:
+            chunk = list(
+                pending.filter(pk__gt=last_pk)
+                .only('pk', 'author_id', 'created')[:options['chunk_size']]
+            )
+            if not chunk:
+                break
+            for post in chunk:
+                timelines.fan_out(post)
+                fanned_out += post.in_timelines
+            last_pk = chunk[-1].pk
+        self.stdout.write(f'Разослано постов: {fanned_out}')
@@ -0,0 +1,32 @@
+import time
+
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand
+
+from posts import recommendations
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает подборки авторов «На кого подписаться»'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=1000,
+            help='Сколько читателей записывать за одну транзакцию',
+        )
+
+    def handle(self, *args, **options):
+        if isinstance(caches['default'], LocMemCache):
+            # Поколения сдвигаются в кэше этого процесса: страницы
+            # с подборками будут отвечать 304 до истечения кэша.
+            self.stderr.write(
+                'Кэш LocMemCache не общий с веб-процессами: '
+                'новые подборки появятся на страницах не сразу'
+            )
+        started = time.monotonic()
+        users, written = recommendations.rebuild(options['chunk_size'])
+        self.stdout.write(
+            f'Подборки: {users} читателей, {written} рекомендаций, '
+            f'{time.monotonic() - started:.1f} с'
+        )
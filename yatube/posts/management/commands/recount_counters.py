@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts import counters
+from posts.models import User, UserCounters
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счётчики постов, комментариев и подписок'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=1000,
+            help='Сколько строк сверять за одну транзакцию',
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        missing = User.objects.filter(counters__isnull=True)
+        created = UserCounters.objects.bulk_create(
+            UserCounters(user_id=user_id)
+            for user_id in missing.values_list('pk', flat=True)
+        )
+        if created:
+            self.stdout.write(f'Созданы счётчики: {len(created)}')
+        for model, field, counted_model, foreign_key in counters.COUNTERS:
+            pks = model.objects.order_by('pk').values_list('pk', flat=True)
+            last_pk = None
+            repaired = 0
+            while True:
+                chunk = pks if last_pk is None else pks.filter(pk__gt=last_pk)
+                chunk = list(chunk[:chunk_size])
+                if not chunk:
+                    break
+                with transaction.atomic():
+                    repaired += counters.repair(
+                        model, field, counted_model, foreign_key, chunk
+                    )
+                last_pk = chunk[-1]
+            self.stdout.write(
+                f'{model._meta.object_name}.{field}: исправлено {repaired}'
+            )
@@ -0,0 +1,61 @@
+from django.conf import settings
+from django.db import migrations, transaction
+from django.db.models import Count, Min
+
+CHUNK_SIZE = 1000
+
+
+def dedupe_follows(apps, schema_editor):
+    """
+    Удаляет повторные подписки перед добавлением уникального
+    ограничения (user, author): остаётся самая ранняя. Пачки идут
+    в отдельных транзакциях, счётчики затронутых пользователей
+    пересчитываются в той же транзакции.
+    """
+    Follow = apps.get_model('posts', 'Follow')
+    UserCounters = apps.get_model('posts', 'UserCounters')
+    pairs = Follow.objects.order_by('user', 'author').values(
+        'user', 'author'
+    ).annotate(
+        count=Count('pk'), keep=Min('pk')
+    ).filter(count__gt=1)
+    last = None
+    while True:
+        chunk = pairs
+        if last is not None:
+            chunk = chunk.filter(user__gte=last[0]).exclude(
+                user=last[0], author__lte=last[1]
+            )
+        chunk = list(chunk[:CHUNK_SIZE])
+        if not chunk:
+            break
+        with transaction.atomic(using=schema_editor.connection.alias):
+            for pair in chunk:
+                Follow.objects.filter(
+                    user=pair['user'], author=pair['author']
+                ).exclude(pk=pair['keep']).delete()
+                UserCounters.objects.filter(user=pair['user']).update(
+                    following_count=Follow.objects.filter(
+                        user=pair['user']
+                    ).count()
+                )
+                UserCounters.objects.filter(user=pair['author']).update(
+                    followers_count=Follow.objects.filter(
+                        author=pair['author']
+                    ).count()
+                )
+        last = (chunk[-1]['user'], chunk[-1]['author'])
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0014_post_search'),
+    ]
+
+    operations = [
+        migrations.RunPython(dedupe_follows, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,6 @@
 from django.conf import settings
 from django.db import models
+from django.db.models import Q
 from django.contrib.auth import get_user_model
 
 from core.models import CreatedModel
@@ -18,6 +19,11 @@ class Group(models.Model):
         unique=True,
     )
     description = models.TextField('Описание')
+    posts_count = models.PositiveIntegerField(
+        'Число постов',
+        default=0,
+        editable=False,
+    )
 
     class Meta:
         verbose_name = 'Группа'
@@ -53,9 +59,65 @@ class Post(CreatedModel):
         blank=True,
         help_text='Загрузка картинки'
     )
+    in_timelines = models.BooleanField(
+        'Разослан по лентам',
+        default=False,
+        editable=False,
+        help_text='Пост записан в ленты подписчиков автора'
+    )
+    comments_count = models.PositiveIntegerField(
+        'Число комментариев',
+        default=0,
+        editable=False,
+    )
+    image_width = models.PositiveIntegerField(
+        'Ширина картинки',
+        null=True,
+        editable=False,
+    )
+    image_height = models.PositiveIntegerField(
+        'Высота картинки',
+        null=True,
+        editable=False,
+    )
+    image_size = models.PositiveIntegerField(
+        'Размер картинки в байтах',
+        null=True,
+        editable=False,
+    )
+    image_hash = models.CharField(
+        'Хэш картинки',
+        max_length=64,
+        blank=True,
+        editable=False,
+        help_text='SHA-256 содержимого файла картинки'
+    )
+    image_placeholder = models.TextField(
+        'Заглушка картинки',
+        blank=True,
+        editable=False,
+        help_text='Размытая уменьшенная копия картинки в виде data URI'
+    )
 
     class Meta:
         ordering = ('-created', )
+        indexes = (
+            models.Index(
+                fields=('author', '-created', '-id'),
+                condition=Q(in_timelines=False),
+                name='post_pulled_author_idx',
+            ),
+            # Ленты сортируются по (created, id): id в индексе избавляет
+            # от досортировки постов с одинаковой датой.
+            models.Index(
+                fields=('author', '-created', '-id'),
+                name='post_author_created_idx',
+            ),
+            models.Index(
+                fields=('group', '-created', '-id'),
+                name='post_group_created_idx',
+            ),
+        )
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
 
@@ -63,6 +125,45 @@ class Post(CreatedModel):
         return self.text[:settings.MAX_SYMBOLS_IN_TAB]
 
 
+class PostImageVariant(models.Model):
+    FORMATS = (
+        ('avif', 'AVIF'),
+        ('webp', 'WebP'),
+    )
+
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='image_variants',
+        verbose_name='Пост'
+    )
+    format = models.CharField(
+        'Формат',
+        max_length=4,
+        choices=FORMATS,
+    )
+    width = models.PositiveIntegerField('Ширина')
+    height = models.PositiveIntegerField('Высота')
+    file = models.FileField(
+        'Файл',
+        upload_to='posts/variants/',
+    )
+
+    class Meta:
+        ordering = ('format', 'width')
+        constraints = (
+            models.UniqueConstraint(
+                fields=('post', 'format', 'width'),
+                name='unique_post_image_variant',
+            ),
+        )
+        verbose_name = 'Вариант картинки'
+        verbose_name_plural = 'Варианты картинок'
+
+    def __str__(self):
+        return f'{self.file.name} ({self.width}x{self.height})'
+
+
 class Comment(CreatedModel):
     post = models.ForeignKey(
         Post,
@@ -86,6 +187,12 @@ class Comment(CreatedModel):
 
     class Meta:
         ordering = ('-created', )
+        indexes = (
+            models.Index(
+                fields=('post', '-created', '-id'),
+                name='comment_post_created_idx',
+            ),
+        )
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
 
@@ -109,8 +216,111 @@ class Follow(CreatedModel):
 
     class Meta:
         ordering = ('-created', )
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'author'),
+                name='unique_follow',
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=('author', 'user'),
+                name='follow_author_user_idx',
+            ),
+        )
         verbose_name = 'Подписка'
         verbose_name_plural = 'Подписки'
 
     def __str__(self):
         return f'{self.user} подписан на {self.author}'
+
+
+class TimelineEntry(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='Читатель',
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='Пост',
+    )
+    created = models.DateTimeField('Дата публикации')
+
+    class Meta:
+        ordering = ('-created', )
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'post'),
+                name='unique_timeline_entry',
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=('user', '-created', '-post'),
+                name='timeline_user_created_idx',
+            ),
+        )
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи лент'
+
+    def __str__(self):
+        return f'{self.post} в ленте {self.user}'
+
+
+class UserCounters(models.Model):
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='counters',
+        verbose_name='Пользователь',
+    )
+    posts_count = models.PositiveIntegerField('Число постов', default=0)
+    followers_count = models.PositiveIntegerField(
+        'Число подписчиков',
+        default=0,
+    )
+    following_count = models.PositiveIntegerField('Число подписок', default=0)
+
+    class Meta:
+        verbose_name = 'Счётчики пользователя'
+        verbose_name_plural = 'Счётчики пользователей'
+
+    def __str__(self):
+        return f'Счётчики {self.user}'
+
+
+class Recommendation(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='recommendations',
+        verbose_name='Читатель',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='recommended_to',
+        verbose_name='Рекомендуемый автор',
+    )
+    rank = models.PositiveSmallIntegerField('Место в подборке')
+    score = models.FloatField('Оценка')
+
+    class Meta:
+        ordering = ('rank', )
+        # Подборка читателя читается по этому индексу одним запросом.
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'rank'),
+                name='unique_recommendation_rank',
+            ),
+        )
+        verbose_name = 'Рекомендация'
+        verbose_name_plural = 'Рекомендации'
+
+    def __str__(self):
+        return f'{self.author} для {self.user}'
@@ -0,0 +1,135 @@
+"""
+Запросы лент и страниц постов.
+
+Все представления берут посты отсюда, чтобы связанные автор, группа
+и счётчики подтягивались одним запросом, а не по запросу на карточку.
+"""
+from django.db.models import Exists, OuterRef
+from django.shortcuts import get_object_or_404
+
+from . import timelines
+from .models import Comment, Follow, Post, Recommendation, User
+
+# Поля, которые выводит карточка поста в includes/posts.html.
+FEED_FIELDS = (
+    'id',
+    'text',
+    'created',
+    'image',
+    'comments_count',
+    'image_width',
+    'image_height',
+    'image_placeholder',
+    'author',
+    'author__username',
+    'author__first_name',
+    'author__last_name',
+    'group',
+    'group__title',
+    'group__slug',
+)
+
+COMMENT_FIELDS = (
+    'id',
+    'text',
+    'created',
+    'post',
+    'author',
+    'author__username',
+)
+
+
+# Поля пользователя в списках подписчиков и подписок.
+PERSON_FIELDS = ('username', 'first_name', 'last_name')
+
+
+def feed(queryset):
+    """Подготавливает набор постов к выводу карточками."""
+    return queryset.select_related('author', 'group').only(
+        *FEED_FIELDS
+    ).prefetch_related('image_variants')
+
+
+def index_posts():
+    return feed(Post.objects.all())
+
+
+def group_posts(group):
+    return feed(group.posts.all())
+
+
+def author_posts(author):
+    return feed(author.posts.all())
+
+
+def follow_posts(user):
+    """Наборы постов ленты подписок для timelines.paginator."""
+    return [feed(source) for source in timelines.timeline_sources(user)]
+
+
+def profile_author(username, viewer):
+    """
+    Автор профиля вместе со счётчиками и признаком подписки зрителя,
+    одним запросом.
+    """
+    authors = User.objects.select_related('counters')
+    if viewer.is_authenticated:
+        authors = authors.annotate(is_followed=Exists(
+            Follow.objects.filter(user=viewer, author=OuterRef('pk'))
+        ))
+    return get_object_or_404(authors, username=username)
+
+
+def post_detail(post_id):
+    """Пост для страницы поста вместе с автором, его счётчиками и группой."""
+    return get_object_or_404(
+        Post.objects.select_related(
+            'author__counters', 'group'
+        ).prefetch_related('image_variants'),
+        pk=post_id,
+    )
+
+
+def post_comments(post_id):
+    return Comment.objects.filter(post_id=post_id).select_related(
+        'author'
+    ).only(*COMMENT_FIELDS)
+
+
+def follows(relation, **filters):
+    """
+    Подписки с пользователем relation ('user' — подписчик, 'author' —
+    автор), который выводится в списке. Сортировка по его id идёт
+    по индексам Follow (author, user) и (user, author).
+    """
+    return Follow.objects.filter(**filters).select_related(relation).only(
+        'id', relation, *(f'{relation}__{name}' for name in PERSON_FIELDS)
+    )
+
+
+def followers(author):
+    return follows('user', author=author)
+
+
+def following(user):
+    return follows('author', user=user)
+
+
+def recommendations(user):
+    """
+    Подборка авторов для читателя одним запросом по индексу
+    (user, rank); подборки считает команда recommend_authors.
+    """
+    return Recommendation.objects.filter(user=user).select_related(
+        'author'
+    ).only('author', *(f'author__{name}' for name in PERSON_FIELDS))
+
+
+def recommended_authors(viewer, exclude=None):
+    if not viewer.is_authenticated:
+        return []
+    return [
+        recommendation.author
+        for recommendation in recommendations(viewer)
+        if recommendation.author_id != exclude
+    ]
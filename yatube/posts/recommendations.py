@@ -0,0 +1,147 @@
+"""
+Подборки авторов «На кого подписаться».
+
+Подборки считаются заранее командой recommend_authors. Подписки
+загружаются в память списками смежности — разреженной матрицей
+читатель × автор. Из неё для каждого автора считаются похожие авторы:
+косинусная мера по общим подписчикам («кто подписан на X, подписан и
+на Y»). Оценка кандидата для читателя — сумма сходств с авторами,
+на которых он уже подписан, плюс вес общих групп: авторы, которые
+больше всех пишут в группах, где читатель публикует посты или
+комментирует.
+
+Лучшие RECOMMENDATIONS_COUNT кандидатов записываются в таблицу
+Recommendation, и страница читает подборку одним запросом по индексу
+(user, rank).
+"""
+import heapq
+import math
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+
+from core.cache import bump
+from . import caching
+from .importing import chunks
+from .models import Comment, Follow, Post, Recommendation
+
+
+def load_follows(chunk_size):
+    """Подписки списками смежности: кто на кого и у кого какие подписчики."""
+    following = defaultdict(list)
+    followers = defaultdict(list)
+    edges = Follow.objects.order_by().values_list('user_id', 'author_id')
+    for user_id, author_id in edges.iterator(chunk_size=chunk_size):
+        following[user_id].append(author_id)
+        followers[author_id].append(user_id)
+    return following, followers
+
+
+def similar_authors(following, followers, limit):
+    """Для каждого автора — до limit похожих авторов со сходством."""
+    similar = {}
+    for author_id, readers in followers.items():
+        shared = Counter()
+        for reader_id in readers:
+            shared.update(following[reader_id])
+        del shared[author_id]
+        scores = (
+            (other_id, count / math.sqrt(
+                len(readers) * len(followers[other_id])
+            ))
+            for other_id, count in shared.items()
+        )
+        similar[author_id] = heapq.nlargest(limit, scores, key=_best)
+    return similar
+
+
+def load_groups(limit):
+    """
+    Группы, в которых пишет или комментирует каждый пользователь,
+    и до limit самых активных авторов каждой группы с долей от лидера.
+    """
+    activity = defaultdict(set)
+    posted = Post.objects.filter(group__isnull=False).order_by().values(
+        'group_id', 'author_id'
+    ).annotate(posts=Count('id'))
+    authors = defaultdict(list)
+    for row in posted.iterator():
+        activity[row['author_id']].add(row['group_id'])
+        authors[row['group_id']].append((row['author_id'], row['posts']))
+    commented = Comment.objects.filter(
+        post__group__isnull=False
+    ).order_by().values_list('author_id', 'post__group_id').distinct()
+    for user_id, group_id in commented.iterator():
+        activity[user_id].add(group_id)
+    leaders = {}
+    for group_id, counts in authors.items():
+        top = heapq.nlargest(limit, counts, key=_best)
+        leaders[group_id] = [(author_id, posts / top[0][1])
+                             for author_id, posts in top]
+    return activity, leaders
+
+
+def recommend(user_id, following, similar, activity, leaders, count):
+    """Лучшие count кандидатов читателя: [(автор, оценка)]."""
+    group_weight = settings.RECOMMENDATIONS_GROUP_WEIGHT
+    scores = Counter()
+    for author_id in following.get(user_id, ()):
+        for other_id, similarity in similar.get(author_id, ()):
+            scores[other_id] += similarity
+    for group_id in activity.get(user_id, ()):
+        for author_id, share in leaders[group_id]:
+            scores[author_id] += group_weight * share
+    del scores[user_id]
+    for author_id in following.get(user_id, ()):
+        del scores[author_id]
+    return heapq.nlargest(count, scores.items(), key=_best)
+
+
+def _best(item):
+    # При равной оценке выше тот, у кого меньше id: подборка
+    # не меняется от пересчёта к пересчёту.
+    author_id, score = item
+    return score, -author_id
+
+
+def rebuild(chunk_size=1000):
+    """
+    Пересчитывает все подборки; каждая пачка читателей заменяется
+    в своей транзакции. Возвращает (число читателей, число строк).
+    """
+    count = settings.RECOMMENDATIONS_COUNT
+    limit = settings.RECOMMENDATIONS_NEIGHBOURS
+    following, followers = load_follows(chunk_size)
+    similar = similar_authors(following, followers, limit)
+    activity, leaders = load_groups(limit)
+    user_ids = sorted(following.keys() | activity.keys())
+    stale = set(Recommendation.objects.values_list(
+        'user_id', flat=True
+    ).distinct()).difference(user_ids)
+    written = 0
+    for chunk in chunks(user_ids, chunk_size):
+        rows = [
+            Recommendation(
+                user_id=user_id,
+                author_id=author_id,
+                rank=rank,
+                score=score,
+            )
+            for user_id in chunk
+            for rank, (author_id, score) in enumerate(recommend(
+                user_id, following, similar, activity, leaders, count
+            ))
+        ]
+        with transaction.atomic():
+            Recommendation.objects.filter(user_id__in=chunk).delete()
+            Recommendation.objects.bulk_create(rows, batch_size=chunk_size)
+        written += len(rows)
+        # Подборка выводится на страницах, зависящих от области подписок.
+        bump(*(caching.follow_scope(user_id) for user_id in chunk))
+    # У читателя больше нет подписок и активности в группах.
+    for chunk in chunks(sorted(stale), chunk_size):
+        Recommendation.objects.filter(user_id__in=chunk).delete()
+        bump(*(caching.follow_scope(user_id) for user_id in chunk))
+    return len(user_ids), written
@@ -0,0 +1,134 @@
+"""
+Полнотекстовый поиск по постам.
+
+Индекс — таблица FTS5 posts_post_fts с внешним содержимым: текст
+хранится только в posts_post, а триггеры обновляют индекс при любом
+изменении постов, в том числе через update() и bulk_create().
+Результаты сортируются по релевантности bm25. На других СУБД поиск
+сводится к icontains без ранжирования.
+
+SQLite выполняет часть миграций пересозданием таблицы, и триггеры
+пропадают вместе со старой таблицей, поэтому install() вызывается
+после каждого migrate и восстанавливает их.
+"""
+import re
+
+from django.db import connection
+from django.db.models import FloatField
+from django.db.models.expressions import RawSQL
+
+TABLE = 'posts_post_fts'
+
+_WORD = re.compile(r'\w+')
+
+TRIGGERS = {
+    'posts_post_fts_insert': f"""
+        CREATE TRIGGER IF NOT EXISTS posts_post_fts_insert
+        AFTER INSERT ON posts_post BEGIN
+            INSERT INTO {TABLE}(rowid, text) VALUES (new.id, new.text);
+        END
+    """,
+    'posts_post_fts_delete': f"""
+        CREATE TRIGGER IF NOT EXISTS posts_post_fts_delete
+        AFTER DELETE ON posts_post BEGIN
+            INSERT INTO {TABLE}({TABLE}, rowid, text)
+            VALUES ('delete', old.id, old.text);
+        END
+    """,
+    'posts_post_fts_update': f"""
+        CREATE TRIGGER IF NOT EXISTS posts_post_fts_update
+        AFTER UPDATE OF text ON posts_post BEGIN
+            INSERT INTO {TABLE}({TABLE}, rowid, text)
+            VALUES ('delete', old.id, old.text);
+            INSERT INTO {TABLE}(rowid, text) VALUES (new.id, new.text);
+        END
+    """,
+}
+
+
+def available(using=None):
+    return (using or connection).vendor == 'sqlite'
+
+
+def install(using=None):
+    """
+    Создаёт индекс и триггеры, которых нет. Если триггеров не было,
+    индекс мог отстать от таблицы — он перестраивается.
+    """
+    using = using or connection
+    if not available(using):
+        return
+    with using.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' "
+            "AND tbl_name = 'posts_post'"
+        )
+        existing = {row[0] for row in cursor.fetchall()}
+        if set(TRIGGERS) <= existing:
+            return
+        cursor.execute(
+            f'CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} USING fts5('
+            "text, content='posts_post', content_rowid='id', "
+            "tokenize='unicode61 remove_diacritics 2')"
+        )
+        for statement in TRIGGERS.values():
+            cursor.execute(statement)
+        cursor.execute(f"INSERT INTO {TABLE}({TABLE}) VALUES ('rebuild')")
+
+
+def uninstall(using=None):
+    using = using or connection
+    if not available(using):
+        return
+    with using.cursor() as cursor:
+        for name in TRIGGERS:
+            cursor.execute(f'DROP TRIGGER IF EXISTS {name}')
+        cursor.execute(f'DROP TABLE IF EXISTS {TABLE}')
+
+
+def match_query(text):
+    """
+    Запрос FTS5 из пользовательской строки: каждое слово в кавычках
+    и с поиском по префиксу, поэтому синтаксис FTS5 в строке не работает.
+    """
+    return ' '.join(f'"{word}"*' for word in _WORD.findall(text))
+
+
+def matching(queryset, text):
+    """
+    Посты из queryset, подходящие под строку поиска, без ранжирования:
+    условие IN по индексу, которое не меняет сортировку набора.
+    """
+    # RawSQL в pk__in оборачивается в лишние скобки, и SQLite
+    # читает такой подзапрос как скалярный: берёт только первую строку.
+    return queryset.extra(
+        where=[
+            f'posts_post.id IN '
+            f'(SELECT rowid FROM {TABLE} WHERE {TABLE} MATCH %s)'
+        ],
+        params=[match_query(text)],
+    )
+
+
+def _no_rank():
+    return RawSQL('0', (), output_field=FloatField())
+
+
+def search(queryset, text):
+    """
+    Посты из queryset, подходящие под строку поиска, с релевантностью
+    в аннотации rank (меньше — лучше).
+    """
+    if not _WORD.search(text):
+        return queryset.annotate(rank=_no_rank()).none()
+    if not available():
+        return queryset.filter(text__icontains=text).annotate(
+            rank=_no_rank()
+        )
+    return queryset.extra(
+        tables=[TABLE],
+        where=[f'{TABLE}.rowid = posts_post.id', f'{TABLE} MATCH %s'],
+        params=[match_query(text)],
+    ).annotate(rank=RawSQL(
+        f'{TABLE}.rank', (), output_field=FloatField()
+    ))
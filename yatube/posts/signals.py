@@ -0,0 +1,251 @@
+import threading
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import (
+    post_delete, post_save, pre_delete, pre_save
+)
+from django.dispatch import receiver
+
+from core.cache import bump
+
+from . import caching, counters, images, thumbnails, timelines
+from .models import (
+    Comment, Follow, Group, Post, Recommendation, UserCounters
+)
+
+User = get_user_model()
+
+# id постов, которые сейчас удаляются вместе с комментариями.
+_deleting = threading.local()
+
+
+def _deleting_posts():
+    if not hasattr(_deleting, 'posts'):
+        _deleting.posts = set()
+    return _deleting.posts
+
+
+@receiver(post_save, sender=User)
+def create_user_counters(sender, instance, created, raw=False, **kwargs):
+    """Заводит счётчики новому пользователю."""
+    if created and not raw:
+        UserCounters.objects.get_or_create(user=instance)
+
+
+@receiver(post_delete, sender=User)
+def invalidate_user(sender, instance, **kwargs):
+    """Сбрасывает кэш профиля и ленты удалённого пользователя."""
+    caching.forget_owner('user', instance.username)
+    bump(caching.author_scope(instance.pk), caching.follow_scope(instance.pk))
+
+
+@receiver(pre_save, sender=Post)
+def remember_previous(sender, instance, raw=False, **kwargs):
+    """Запоминает прежние группу и картинку редактируемого поста."""
+    if instance._state.adding or raw:
+        return
+    previous = Post.objects.filter(pk=instance.pk).values_list(
+        'group_id', 'image'
+    ).first()
+    if previous is not None:
+        instance._previous_group_id, instance._previous_image = previous
+
+
+@receiver(pre_save, sender=Post)
+def store_image_metadata(sender, instance, raw=False, **kwargs):
+    """Записывает метаданные только что загруженной картинки."""
+    if raw:
+        return
+    if not instance.image:
+        values = images.empty()
+    elif not instance.image._committed:
+        values = images.metadata(instance.image.file)
+    else:
+        return
+    for field, value in values.items():
+        setattr(instance, field, value)
+    # Заглушка прежней картинки к новой не подходит; пока она пуста,
+    # шаблон ставит построение вариантов в пул.
+    instance.image_placeholder = ''
+
+
+@receiver(post_save, sender=Post)
+def drop_replaced_variants(sender, instance, created, raw=False, **kwargs):
+    """Удаляет варианты заменённой или удалённой картинки поста."""
+    previous_image = getattr(instance, '_previous_image', '')
+    if raw or created or not previous_image:
+        return
+    if previous_image != instance.image.name:
+        thumbnails.drop_variants(instance.pk)
+
+
+@receiver(post_save, sender=Post)
+def count_post(sender, instance, created, raw=False, **kwargs):
+    """Обновляет счётчики постов автора и группы."""
+    if raw:
+        return
+    with transaction.atomic():
+        if created:
+            counters.change_user(instance.author_id, posts_count=1)
+            counters.change(Group, instance.group_id, posts_count=1)
+            return
+        previous_group_id = getattr(instance, '_previous_group_id', None)
+        if previous_group_id != instance.group_id:
+            counters.change(Group, previous_group_id, posts_count=-1)
+            counters.change(Group, instance.group_id, posts_count=1)
+
+
+@receiver(post_save, sender=Post)
+def fan_out_post(sender, instance, created, raw=False, **kwargs):
+    """Рассылает новый пост по лентам подписчиков."""
+    if created and not raw:
+        timelines.fan_out(instance)
+
+
+@receiver(pre_delete, sender=Post)
+def start_post_delete(sender, instance, **kwargs):
+    """
+    Отмечает удаляемый пост: его комментарии удалятся каскадом,
+    и пересчитывать счётчик и кэш по каждому из них незачем.
+    """
+    _deleting_posts().add(instance.pk)
+
+
+@receiver(post_delete, sender=Post)
+def finish_post_delete(sender, instance, **kwargs):
+    _deleting_posts().discard(instance.pk)
+
+
+@receiver(post_delete, sender=Post)
+def uncount_post(sender, instance, **kwargs):
+    with transaction.atomic():
+        counters.change(UserCounters, instance.author_id, posts_count=-1)
+        counters.change(Group, instance.group_id, posts_count=-1)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post(sender, instance, raw=False, **kwargs):
+    """Сбрасывает кэш страниц, на которых выводится пост."""
+    if not raw:
+        caching.bump_post(
+            instance, getattr(instance, '_previous_group_id', None)
+        )
+
+
+@receiver(post_save, sender=Group)
+def invalidate_group(sender, instance, raw=False, **kwargs):
+    if not raw:
+        bump(
+            caching.INDEX, caching.GROUPS, caching.group_scope(instance.pk)
+        )
+
+
+@receiver(pre_delete, sender=Group)
+def remember_group_authors(sender, instance, **kwargs):
+    """
+    Запоминает авторов постов группы: посты останутся без группы
+    через SET_NULL, без сигналов.
+    """
+    instance._author_ids = list(Post.objects.filter(
+        group=instance
+    ).order_by().values_list('author_id', flat=True).distinct())
+
+
+@receiver(post_delete, sender=Group)
+def invalidate_groups(sender, instance, **kwargs):
+    """Сбрасывает кэш страниц, на которых выводились посты группы."""
+    caching.forget_owner('group', instance.slug)
+    bump(
+        caching.INDEX,
+        caching.GROUPS,
+        caching.group_scope(instance.pk),
+        *(
+            caching.author_scope(author_id)
+            for author_id in getattr(instance, '_author_ids', ())
+        ),
+    )
+
+
+@receiver(post_save, sender=Comment)
+def count_comment(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.change(Post, instance.post_id, comments_count=1)
+
+
+@receiver(pre_delete, sender=Comment)
+def mark_cascade(sender, instance, **kwargs):
+    """
+    Все pre_delete рассылаются до удаления строк, а post_delete поста
+    может прийти раньше, чем у его комментариев, — поэтому каскад
+    отмечается на самом комментарии.
+    """
+    instance._post_deleting = instance.post_id in _deleting_posts()
+
+
+@receiver(post_delete, sender=Comment)
+def uncount_comment(sender, instance, **kwargs):
+    if not getattr(instance, '_post_deleting', False):
+        counters.change(Post, instance.post_id, comments_count=-1)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment(sender, instance, raw=False, **kwargs):
+    """Сбрасывает кэш страниц, на которых виден счётчик комментариев."""
+    if raw or instance.post_id is None:
+        return
+    # Кэш удаляемого поста сбросит invalidate_post.
+    if getattr(instance, '_post_deleting', False):
+        return
+    try:
+        post = instance.post
+    except Post.DoesNotExist:
+        return
+    caching.bump_post(post)
+
+
+@receiver(post_save, sender=Follow)
+def count_follow(sender, instance, created, raw=False, **kwargs):
+    """Обновляет счётчики подписок и добавляет посты автора в ленту."""
+    if not created or raw:
+        return
+    with transaction.atomic():
+        counters.change_user(instance.author_id, followers_count=1)
+        counters.change_user(instance.user_id, following_count=1)
+    timelines.backfill(instance.user_id, instance.author_id)
+
+
+@receiver(post_save, sender=Follow)
+def drop_recommendation(sender, instance, created, raw=False, **kwargs):
+    """Автор, на которого подписались, уходит из подборки подписчика."""
+    if created and not raw:
+        Recommendation.objects.filter(
+            user_id=instance.user_id, author_id=instance.author_id
+        ).delete()
+
+
+@receiver(post_delete, sender=Follow)
+def uncount_follow(sender, instance, **kwargs):
+    """Обновляет счётчики подписок и убирает посты автора из ленты."""
+    with transaction.atomic():
+        counters.change(
+            UserCounters, instance.author_id, followers_count=-1
+        )
+        counters.change(
+            UserCounters, instance.user_id, following_count=-1
+        )
+    timelines.remove(instance.user_id, instance.author_id)
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_follow(sender, instance, raw=False, **kwargs):
+    """Сбрасывает кэш профилей и ленты подписок подписчика."""
+    if not raw:
+        bump(
+            caching.author_scope(instance.author_id),
+            caching.author_scope(instance.user_id),
+            caching.follow_scope(instance.user_id),
+        )
@@ -0,0 +1,41 @@
+from django import template
+
+from .. import thumbnails
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_thumbnail(post, size):
+    """
+    Готовая миниатюра картинки поста. Если её ещё нет, ставит
+    построение в пул и возвращает None, чтобы шаблон вывел заглушку.
+    """
+    if not post.image:
+        return None
+    prefetched = getattr(post, 'thumbnails', {})
+    if size in prefetched:
+        return prefetched[size]
+    thumbnail = thumbnails.lookup(post.image, size)
+    if thumbnail is None:
+        thumbnails.schedule(post, variants=not post.image_placeholder)
+    return thumbnail
+
+
+@register.simple_tag
+def post_image_sources(post):
+    """Источники <picture>: тип и srcset для каждого формата вариантов."""
+    srcsets = {}
+    for variant in post.image_variants.all():
+        srcsets.setdefault(variant.format, []).append(
+            f'{variant.file.url} {variant.width}w'
+        )
+    return [
+        {
+            'type': f'image/{image_format}',
+            'srcset': ', '.join(srcsets[image_format]),
+            'sizes': thumbnails.VARIANT_SIZES,
+        }
+        for image_format in thumbnails.variant_formats()
+        if image_format in srcsets
+    ]
@@ -0,0 +1,107 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post, User
+
+
+class AdminChangelistTests(TestCase):
+    """Проверка списков админки на больших таблицах"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='admin'
+        )
+        cls.user = User.objects.create_user(username='auth')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='Test_slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(author=cls.user, text='Пост')
+        Follow.objects.create(user=cls.reader, author=cls.user)
+        Follow.objects.create(user=cls.user, author=cls.reader)
+        Comment.objects.create(
+            post=cls.post, author=cls.reader, text='Комментарий'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(AdminChangelistTests.admin)
+
+    def changelist_queries(self, model):
+        url = reverse(f'admin:posts_{model}_changelist')
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        return len(queries)
+
+    def test_post_changelist_queries_do_not_grow(self):
+        """Число запросов списка постов не зависит от числа строк"""
+
+        self.changelist_queries('post')
+        first = self.changelist_queries('post')
+        Post.objects.bulk_create(
+            Post(author=AdminChangelistTests.user, text=f'Пост {number}')
+            for number in range(10)
+        )
+        self.assertEqual(self.changelist_queries('post'), first)
+
+    def test_counts_are_cached(self):
+        """Число записей не пересчитывается на каждый запрос"""
+
+        self.changelist_queries('post')
+        url = reverse('admin:posts_post_changelist')
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        self.assertFalse([
+            query for query in queries.captured_queries
+            if 'COUNT(' in query['sql'] and 'posts_post' in query['sql']
+        ])
+
+    def test_group_choices_cached(self):
+        """Список групп для строк берётся из кэша и сбрасывается"""
+
+        response = self.client.get(reverse('admin:posts_post_changelist'))
+        self.assertContains(response, AdminChangelistTests.group.title)
+        Group.objects.create(
+            title='Новая группа', slug='new', description='Описание'
+        )
+        response = self.client.get(reverse('admin:posts_post_changelist'))
+        self.assertContains(response, 'Новая группа')
+
+    def test_exact_search(self):
+        """Подписки и комментарии ищутся по точному имени пользователя"""
+
+        response = self.client.get(
+            reverse('admin:posts_follow_changelist'), {'q': 'reader'}
+        )
+        self.assertEqual(len(response.context['cl'].result_list), 2)
+        response = self.client.get(
+            reverse('admin:posts_follow_changelist'), {'q': 'read'}
+        )
+        self.assertEqual(len(response.context['cl'].result_list), 0)
+        response = self.client.get(
+            reverse('admin:posts_comment_changelist'), {'q': 'auth'}
+        )
+        self.assertEqual(len(response.context['cl'].result_list), 0)
+        response = self.client.get(
+            reverse('admin:posts_group_changelist'), {'q': 'Test_slug'}
+        )
+        self.assertEqual(len(response.context['cl'].result_list), 1)
+
+    def test_changelists_open(self):
+        """Списки и формы с raw_id_fields открываются"""
+
+        for model in ('post', 'group', 'comment', 'follow'):
+            with self.subTest(model=model):
+                self.changelist_queries(model)
+        response = self.client.get(reverse(
+            'admin:posts_post_change', args=(AdminChangelistTests.post.pk,)
+        ))
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,333 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core.cache import generations
+from .. import caching
+from ..models import Comment, Follow, Group, Post, User
+
+
+class FeedCacheTests(TestCase):
+    """Проверка сброса кэша лент по сигналам"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group_1 = Group.objects.create(
+            title='Тестовая группа 1',
+            slug='Test_1',
+            description='Тестовое описание',
+        )
+        cls.group_2 = Group.objects.create(
+            title='Тестовая группа 2',
+            slug='Test_2',
+            description='Тестовое описание',
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(FeedCacheTests.reader)
+
+    def test_generations_are_stable(self):
+        """Поколение не меняется без изменений данных"""
+
+        first = caching.index_version()
+        self.assertEqual(first, caching.index_version())
+        Post.objects.create(author=FeedCacheTests.user, text='Пост')
+        self.assertNotEqual(first, caching.index_version())
+
+    def test_post_moved_to_other_group(self):
+        """Перенос поста сдвигает поколения обеих групп"""
+
+        post = Post.objects.create(
+            author=FeedCacheTests.user,
+            text='Пост',
+            group=FeedCacheTests.group_1,
+        )
+        scopes = (
+            caching.group_scope(FeedCacheTests.group_1.pk),
+            caching.group_scope(FeedCacheTests.group_2.pk),
+        )
+        before = generations(*scopes)
+        post.group = FeedCacheTests.group_2
+        post.save()
+        after = generations(*scopes)
+        self.assertNotEqual(before[0], after[0])
+        self.assertNotEqual(before[1], after[1])
+
+    def test_new_post_shown_immediately(self):
+        """Новый пост сразу виден на закэшированных страницах"""
+
+        Post.objects.create(
+            author=FeedCacheTests.user,
+            text='Старый пост',
+            group=FeedCacheTests.group_1,
+        )
+        Follow.objects.create(
+            user=FeedCacheTests.reader, author=FeedCacheTests.user
+        )
+        addresses = (
+            reverse('posts:index'),
+            reverse('posts:group', kwargs={'slug': 'Test_1'}),
+            reverse('posts:profile', kwargs={'username': 'auth'}),
+            reverse('posts:follow_index'),
+        )
+        for address in addresses:
+            self.client.get(address)
+        Post.objects.create(
+            author=FeedCacheTests.user,
+            text='Свежий пост',
+            group=FeedCacheTests.group_1,
+        )
+        for address in addresses:
+            with self.subTest(address=address):
+                response = self.client.get(address)
+                self.assertContains(response, 'Свежий пост')
+
+    def test_comment_updates_counter_in_feed(self):
+        """Новый комментарий обновляет счётчик в закэшированной ленте"""
+
+        post = Post.objects.create(author=FeedCacheTests.user, text='Пост')
+        address = reverse('posts:index')
+        self.assertContains(self.client.get(address), 'комментариев: 0')
+        Comment.objects.create(
+            post=post, author=FeedCacheTests.reader, text='Комментарий'
+        )
+        self.assertContains(self.client.get(address), 'комментариев: 1')
+
+    def test_follow_updates_follow_feed(self):
+        """Подписка сразу меняет ленту подписок"""
+
+        Post.objects.create(author=FeedCacheTests.user, text='Пост автора')
+        address = reverse('posts:follow_index')
+        self.assertNotContains(self.client.get(address), 'Пост автора')
+        Follow.objects.create(
+            user=FeedCacheTests.reader, author=FeedCacheTests.user
+        )
+        self.assertContains(self.client.get(address), 'Пост автора')
+
+
+class PageCacheTests(TestCase):
+    """Проверка кэша страниц для анонимных посетителей"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.post = Post.objects.create(author=cls.user, text='Пост')
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(PageCacheTests.user)
+
+    def test_anonymous_page_served_from_cache(self):
+        """Повторный анонимный запрос не обращается к базе"""
+
+        address = reverse(
+            'posts:post_detail', kwargs={'post_id': PageCacheTests.post.pk}
+        )
+        response = self.guest_client.get(address)
+        with self.assertNumQueries(0):
+            cached_response = self.guest_client.get(address)
+        self.assertEqual(response.content, cached_response.content)
+        self.assertEqual(
+            response['Content-Type'], cached_response['Content-Type']
+        )
+
+    def test_query_string_is_part_of_key(self):
+        """Страницы с разной строкой запроса кэшируются отдельно"""
+
+        address = reverse('posts:index')
+        self.guest_client.get(address)
+        response = self.guest_client.get(address + '?page=1')
+        self.assertIsNotNone(response.context)
+
+    def test_authenticated_bypass_cache(self):
+        """Авторизованный пользователь получает страницу без кэша"""
+
+        address = reverse('posts:index')
+        self.guest_client.get(address)
+        response = self.authorized_client.get(address)
+        self.assertIsNotNone(response.context)
+
+    def test_comment_invalidates_post_page(self):
+        """Новый комментарий сразу виден на закэшированной странице"""
+
+        address = reverse(
+            'posts:post_detail', kwargs={'post_id': PageCacheTests.post.pk}
+        )
+        self.guest_client.get(address)
+        Comment.objects.create(
+            post=PageCacheTests.post,
+            author=PageCacheTests.user,
+            text='Свежий комментарий',
+        )
+        self.assertContains(self.guest_client.get(address), 'Свежий')
+
+
+class ConditionalGetTests(TestCase):
+    """Проверка условных запросов"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='Test',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user, text='Пост', group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(ConditionalGetTests.reader)
+
+    def addresses(self):
+        return (
+            reverse('posts:index'),
+            reverse('posts:group', kwargs={'slug': 'Test'}),
+            reverse('posts:profile', kwargs={'username': 'auth'}),
+            reverse(
+                'posts:post_detail',
+                kwargs={'post_id': ConditionalGetTests.post.pk},
+            ),
+        )
+
+    def test_not_modified(self):
+        """Актуальная копия клиента получает 304 без шаблона"""
+
+        for address in self.addresses():
+            with self.subTest(address=address):
+                response = self.guest_client.get(address)
+                self.assertTrue(response.has_header('ETag'))
+                self.assertTrue(response.has_header('Last-Modified'))
+                not_modified = self.guest_client.get(
+                    address, HTTP_IF_NONE_MATCH=response['ETag']
+                )
+                self.assertEqual(not_modified.status_code, 304)
+                self.assertIsNone(not_modified.context)
+                since = self.guest_client.get(
+                    address,
+                    HTTP_IF_MODIFIED_SINCE=response['Last-Modified'],
+                )
+                self.assertEqual(since.status_code, 304)
+
+    def test_modified_after_change(self):
+        """После нового комментария страница отдаётся заново"""
+
+        responses = {
+            address: self.guest_client.get(address)
+            for address in self.addresses()
+        }
+        Comment.objects.create(
+            post=ConditionalGetTests.post,
+            author=ConditionalGetTests.reader,
+            text='Комментарий',
+        )
+        for address, response in responses.items():
+            with self.subTest(address=address):
+                response = self.guest_client.get(
+                    address, HTTP_IF_NONE_MATCH=response['ETag']
+                )
+                self.assertEqual(response.status_code, 200)
+
+    def test_etag_depends_on_user(self):
+        """Гость и пользователь получают разные ETag"""
+
+        address = reverse('posts:index')
+        guest_etag = self.guest_client.get(address)['ETag']
+        response = self.authorized_client.get(
+            address, HTTP_IF_NONE_MATCH=guest_etag
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('Last-Modified'))
+
+    def test_etag_changes_after_login(self):
+        """После повторного входа форма с прежним токеном CSRF не отдаётся"""
+
+        address = reverse('posts:post_detail', kwargs={
+            'post_id': ConditionalGetTests.post.pk
+        })
+        client = Client()
+        client.force_login(ConditionalGetTests.reader)
+        etag = client.get(address)['ETag']
+        self.assertEqual(
+            client.get(address, HTTP_IF_NONE_MATCH=etag).status_code, 304
+        )
+        client.logout()
+        client.force_login(ConditionalGetTests.reader)
+        response = client.get(address, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_follow_index_not_modified(self):
+        """Лента подписок поддерживает условные запросы"""
+
+        address = reverse('posts:follow_index')
+        response = self.authorized_client.get(address)
+        response = self.authorized_client.get(
+            address, HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, 304)
+        Follow.objects.create(
+            user=ConditionalGetTests.reader, author=ConditionalGetTests.user
+        )
+        response = self.authorized_client.get(
+            address, HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_deleted_group_not_served(self):
+        """Страницы удалённой группы и её постов отдаются заново"""
+
+        group = Group.objects.create(
+            title='Удаляемая группа',
+            slug='deleted',
+            description='Тестовое описание',
+        )
+        Post.objects.create(
+            author=ConditionalGetTests.user, text='Пост', group=group
+        )
+        group_address = reverse('posts:group', kwargs={'slug': 'deleted'})
+        addresses = (
+            reverse('posts:index'),
+            reverse('posts:profile', kwargs={'username': 'auth'}),
+        )
+        etags = {
+            address: self.guest_client.get(address)['ETag']
+            for address in (group_address, *addresses)
+        }
+        group.delete()
+        self.assertEqual(self.guest_client.get(group_address).status_code, 404)
+        response = self.guest_client.get(
+            group_address, HTTP_IF_NONE_MATCH=etags[group_address]
+        )
+        self.assertEqual(response.status_code, 404)
+        for address in addresses:
+            with self.subTest(address=address):
+                response = self.guest_client.get(
+                    address, HTTP_IF_NONE_MATCH=etags[address]
+                )
+                self.assertEqual(response.status_code, 200)
+                self.assertNotContains(response, 'Удаляемая группа')
+
+    def test_deleted_user_not_served(self):
+        """Профиль удалённого пользователя без постов не отдаётся"""
+
+        User.objects.create_user(username='deleted')
+        address = reverse('posts:profile', kwargs={'username': 'deleted'})
+        etag = self.guest_client.get(address)['ETag']
+        User.objects.filter(username='deleted').delete()
+        self.assertEqual(self.guest_client.get(address).status_code, 404)
+        response = self.guest_client.get(address, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 404)
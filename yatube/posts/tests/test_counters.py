@@ -0,0 +1,135 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.urls import reverse
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+
+from ..models import Comment, Follow, Group, Post, User, UserCounters
+
+
+class CountersTests(TestCase):
+    """Проверка денормализованных счётчиков"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group_1 = Group.objects.create(
+            title='Тестовая группа 1',
+            slug='Test_1',
+            description='Тестовое описание',
+        )
+        cls.group_2 = Group.objects.create(
+            title='Тестовая группа 2',
+            slug='Test_2',
+            description='Тестовое описание',
+        )
+
+    def counters(self, user):
+        return UserCounters.objects.get(user=user)
+
+    def test_post_counters(self):
+        """Счётчики постов автора и группы"""
+
+        post = Post.objects.create(
+            author=CountersTests.user,
+            text='Пост',
+            group=CountersTests.group_1,
+        )
+        self.assertEqual(self.counters(CountersTests.user).posts_count, 1)
+        self.assertEqual(Group.objects.get(slug='Test_1').posts_count, 1)
+
+        post.group = CountersTests.group_2
+        post.save()
+        self.assertEqual(Group.objects.get(slug='Test_1').posts_count, 0)
+        self.assertEqual(Group.objects.get(slug='Test_2').posts_count, 1)
+
+        post.delete()
+        self.assertEqual(self.counters(CountersTests.user).posts_count, 0)
+        self.assertEqual(Group.objects.get(slug='Test_2').posts_count, 0)
+
+    def test_comment_counter(self):
+        """Счётчик комментариев поста"""
+
+        post = Post.objects.create(author=CountersTests.user, text='Пост')
+        comment = Comment.objects.create(
+            post=post, author=CountersTests.reader, text='Комментарий'
+        )
+        self.assertEqual(Post.objects.get(pk=post.pk).comments_count, 1)
+
+        comment.delete()
+        self.assertEqual(Post.objects.get(pk=post.pk).comments_count, 0)
+
+    def test_post_delete_with_comments(self):
+        """Удаление поста не обходит его комментарии по одному"""
+
+        def delete_post(comments):
+            post = Post.objects.create(author=CountersTests.user, text='Пост')
+            Comment.objects.bulk_create(
+                Comment(post=post, author=CountersTests.reader, text='Текст')
+                for _ in range(comments)
+            )
+            with CaptureQueriesContext(connection) as queries:
+                post.delete()
+            return len(queries)
+
+        self.assertEqual(delete_post(1), delete_post(10))
+        self.assertFalse(Comment.objects.exists())
+
+    def test_profile_without_counters(self):
+        """Профиль пользователя без строки счётчиков открывается"""
+
+        Post.objects.create(author=CountersTests.user, text='Пост')
+        UserCounters.objects.filter(user=CountersTests.user).delete()
+        cache.clear()
+        address = reverse('posts:profile', kwargs={'username': 'auth'})
+        for params in ({}, {'page': 1}):
+            with self.subTest(params=params):
+                response = Client().get(address, params)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(
+                    response.context['page_obj'][0].text, 'Пост'
+                )
+
+    def test_follow_counters(self):
+        """Счётчики подписчиков и подписок"""
+
+        follow = Follow.objects.create(
+            user=CountersTests.reader, author=CountersTests.user
+        )
+        self.assertEqual(self.counters(CountersTests.user).followers_count, 1)
+        self.assertEqual(
+            self.counters(CountersTests.reader).following_count, 1
+        )
+
+        follow.delete()
+        self.assertEqual(self.counters(CountersTests.user).followers_count, 0)
+        self.assertEqual(
+            self.counters(CountersTests.reader).following_count, 0
+        )
+
+    def test_recount_repairs_drift(self):
+        """Команда recount_counters исправляет расхождения"""
+
+        Post.objects.create(
+            author=CountersTests.user,
+            text='Пост',
+            group=CountersTests.group_1,
+        )
+        UserCounters.objects.filter(user=CountersTests.user).update(
+            posts_count=10
+        )
+        Group.objects.filter(slug='Test_1').update(posts_count=0)
+        UserCounters.objects.filter(user=CountersTests.reader).delete()
+
+        call_command('recount_counters', chunk_size=1, stdout=StringIO())
+
+        self.assertEqual(self.counters(CountersTests.user).posts_count, 1)
+        self.assertEqual(Group.objects.get(slug='Test_1').posts_count, 1)
+        self.assertTrue(
+            UserCounters.objects.filter(user=CountersTests.reader).exists()
+        )
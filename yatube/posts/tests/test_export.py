@@ -0,0 +1,106 @@
+import json
+import os
+import shutil
+import tempfile
+import zipfile
+from io import BytesIO, StringIO
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from .test_forms import SMALL_GIF
+from ..models import Comment, Follow, Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, EXPORT_CHUNK_SIZE=2)
+class ExportArchiveTests(TestCase):
+    """Проверка архива данных пользователя"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.other = User.objects.create_user(username='other')
+        cls.posts = [
+            Post.objects.create(author=cls.user, text=f'Пост {number}')
+            for number in range(5)
+        ]
+        cls.image_post = Post.objects.create(
+            author=cls.user,
+            text='Пост с картинкой',
+            image=SimpleUploadedFile(
+                'small.gif', SMALL_GIF, content_type='image/gif'
+            ),
+        )
+        Post.objects.create(author=cls.other, text='Чужой пост')
+        Comment.objects.create(
+            post=cls.posts[0], author=cls.user, text='Комментарий'
+        )
+        Follow.objects.create(user=cls.user, author=cls.other)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(ExportArchiveTests.user)
+
+    def read_lines(self, archive, name):
+        return [
+            json.loads(line) for line in archive.read(name).splitlines()
+        ]
+
+    def test_download(self):
+        """Архив отдаётся потоком и содержит только данные пользователя"""
+
+        response = self.client.get(reverse('posts:export'))
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        self.assertIn('yatube-auth.zip', response['Content-Disposition'])
+        archive = zipfile.ZipFile(BytesIO(b''.join(
+            response.streaming_content
+        )))
+        self.assertIsNone(archive.testzip())
+        posts = self.read_lines(archive, 'posts.jsonl')
+        self.assertEqual(len(posts), 6)
+        self.assertNotIn('Чужой пост', [post['text'] for post in posts])
+        self.assertEqual(
+            self.read_lines(archive, 'comments.jsonl')[0]['text'],
+            'Комментарий',
+        )
+        self.assertEqual(
+            self.read_lines(archive, 'follows.jsonl')[0]['author'], 'other'
+        )
+        image = os.path.join(
+            'images', ExportArchiveTests.image_post.image.name
+        )
+        self.assertEqual(archive.read(image), SMALL_GIF)
+
+    def test_anonymous_redirected(self):
+        """Гость отправляется на страницу входа"""
+
+        response = Client().get(reverse('posts:export'))
+        self.assertEqual(response.status_code, 302)
+
+    def test_command(self):
+        """Команда записывает тот же архив в файл"""
+
+        path = os.path.join(TEMP_MEDIA_ROOT, 'archive.zip')
+        call_command(
+            'export_archive', 'auth', output=path,
+            stdout=StringIO(), stderr=StringIO(),
+        )
+        with zipfile.ZipFile(path) as archive:
+            self.assertEqual(
+                len(self.read_lines(archive, 'posts.jsonl')), 6
+            )
+        with self.assertRaises(CommandError):
+            call_command('export_archive', 'nobody', stderr=StringIO())
@@ -0,0 +1,101 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import Group, Post, User
+
+
+class FeedsTests(TestCase):
+    """Проверка RSS и Atom лент"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.other = User.objects.create_user(username='other')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='Test_slug',
+            description='Тестовое описание',
+        )
+        cls.group_post = Post.objects.create(
+            author=cls.user, text='Пост группы', group=cls.group
+        )
+        cls.other_post = Post.objects.create(
+            author=cls.other, text='Пост без группы'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def test_feeds(self):
+        """Ленты содержат свои посты"""
+
+        feeds = (
+            ('posts:index_rss', {}, ('Пост группы', 'Пост без группы'), ()),
+            ('posts:index_atom', {}, ('Пост группы', 'Пост без группы'), ()),
+            ('posts:group_rss', {'slug': 'Test_slug'},
+             ('Пост группы',), ('Пост без группы',)),
+            ('posts:group_atom', {'slug': 'Test_slug'},
+             ('Пост группы',), ('Пост без группы',)),
+            ('posts:profile_rss', {'username': 'other'},
+             ('Пост без группы',), ('Пост группы',)),
+            ('posts:profile_atom', {'username': 'other'},
+             ('Пост без группы',), ('Пост группы',)),
+        )
+        for name, kwargs, present, absent in feeds:
+            with self.subTest(name=name):
+                response = self.client.get(reverse(name, kwargs=kwargs))
+                self.assertEqual(response.status_code, 200)
+                for text in present:
+                    self.assertContains(response, text)
+                for text in absent:
+                    self.assertNotContains(response, text)
+        self.assertEqual(
+            self.client.get(reverse(
+                'posts:group_rss', kwargs={'slug': 'missing'}
+            )).status_code,
+            404,
+        )
+
+    def test_cached_until_new_post(self):
+        """Лента берётся из кэша, пока не появится новый пост"""
+
+        url = reverse('posts:group_rss', kwargs={'slug': 'Test_slug'})
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        self.assertEqual(len(queries), 0)
+        Post.objects.create(
+            author=self.user, text='Свежий пост', group=self.group
+        )
+        self.assertContains(self.client.get(url), 'Свежий пост')
+
+    def test_conditional_get(self):
+        """Повторный опрос с ETag получает 304"""
+
+        url = reverse('posts:index_atom')
+        response = self.client.get(url)
+        self.assertTrue(response.has_header('Last-Modified'))
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_if_modified_since(self):
+        """Опрос с одним If-Modified-Since получает 304"""
+
+        # Дата последнего поста раньше поколения ленты.
+        Post.objects.update(created=timezone.now() - timedelta(days=1))
+        for name in ('posts:index_rss', 'posts:index_atom'):
+            with self.subTest(name=name):
+                url = reverse(name)
+                last_modified = self.client.get(url)['Last-Modified']
+                response = self.client.get(
+                    url, HTTP_IF_MODIFIED_SINCE=last_modified
+                )
+                self.assertEqual(response.status_code, 304)
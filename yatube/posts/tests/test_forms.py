@@ -1,13 +1,26 @@
 import shutil
+from unittest import mock
 
 from django.conf import settings
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test import Client, TestCase
+from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 
+from core.models import Job
+from core.testing import ImmediateExecutor
 from ..models import Post, Group, User, Comment
 
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
 
+
+@mock.patch('posts.thumbnails.executor', ImmediateExecutor)
 class PostCreateFormTests(TestCase):
     @classmethod
     def setUpClass(cls):
@@ -79,6 +92,49 @@ class PostCreateFormTests(TestCase):
                 image='posts/small.gif',
             ).exists()
         )
+        self.assertTrue(
+            Job.objects.filter(task='posts.thumbnails.build').exists()
+        )
+
+    def upload_post(self, name):
+        uploaded = SimpleUploadedFile(
+            name=name,
+            content=SMALL_GIF,
+            content_type='image/gif'
+        )
+        return PostCreateFormTests.authorized_client.post(
+            reverse('posts:create'),
+            data={'text': 'Пост с большой картинкой', 'image': uploaded},
+        )
+
+    @override_settings(POST_IMAGE_MAX_BYTES=16)
+    def test_create_post_image_too_large(self):
+        """Картинка больше лимита в байтах отклоняется"""
+
+        response = self.upload_post('large.gif')
+        self.assertEqual(Post.objects.count(), self.posts_count)
+        self.assertIn(
+            'Файл больше', response.context['form'].errors['image'][0]
+        )
+
+    @override_settings(POST_IMAGE_MAX_PIXELS=1)
+    def test_create_post_image_too_many_pixels(self):
+        """Картинка больше лимита в пикселях отклоняется по заголовку"""
+
+        response = self.upload_post('wide.gif')
+        self.assertEqual(Post.objects.count(), self.posts_count)
+        self.assertIn('2x1', response.context['form'].errors['image'][0])
+
+    def test_create_post_csrf_checked(self):
+        """Проверка CSRF сохраняется при своём обработчике загрузки"""
+
+        client = Client(enforce_csrf_checks=True)
+        client.force_login(PostCreateFormTests.user)
+        response = client.post(
+            reverse('posts:create'), data={'text': 'Без токена'}
+        )
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(Post.objects.count(), self.posts_count)
 
     def test_create_guest_post(self):
         """Проверка создания поста неавторизированым"""
@@ -0,0 +1,152 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from ..models import (
+    Comment, Follow, Group, Post, TimelineEntry, User, UserCounters
+)
+
+
+class ImportContentTests(TestCase):
+    """Проверка команды import_content"""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def write(self, name, content):
+        path = os.path.join(self.directory.name, name)
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(content)
+        return path
+
+    def write_jsonl(self, name, rows):
+        return self.write(name, ''.join(
+            json.dumps(row, ensure_ascii=False) + '\n' for row in rows
+        ))
+
+    def run_import(self, kind, path, **options):
+        out = StringIO()
+        call_command(
+            'import_content', kind, path, stdout=out, stderr=out, **options
+        )
+        return out.getvalue()
+
+    def import_all(self):
+        self.run_import('users', self.write(
+            'users.csv',
+            'username,email,date_joined\n'
+            'leo,leo@example.com,2010-01-01T10:00:00\n'
+            'anna,anna@example.com,2011-01-01T10:00:00\n',
+        ))
+        self.run_import('groups', self.write_jsonl('groups.jsonl', [
+            {'title': 'Книги', 'slug': 'books', 'description': 'О книгах'},
+        ]))
+        self.run_import('follows', self.write_jsonl('follows.jsonl', [
+            {'user': 'anna', 'author': 'leo'},
+        ]))
+        return self.run_import('posts', self.write_jsonl('posts.jsonl', [
+            {
+                'id': 500,
+                'text': 'Старый пост',
+                'author': 'leo',
+                'group': 'books',
+                'created': '2012-05-01T12:00:00+00:00',
+            },
+            {'text': 'Пост без автора', 'author': 'nobody'},
+        ]), chunk_size=1)
+
+    def test_import(self):
+        """Строки записываются с исходными датами и ссылками"""
+
+        output = self.import_all()
+        post = Post.objects.get(pk=500)
+        self.assertEqual(post.created.year, 2012)
+        self.assertEqual(post.author.username, 'leo')
+        self.assertEqual(post.group.slug, 'books')
+        self.assertEqual(User.objects.get(username='leo').date_joined.year,
+                         2010)
+        self.assertEqual(Post.objects.count(), 1)
+        self.assertIn('Пропущена строка: Не найден автор: nobody', output)
+        self.assertIn('строк/с', output)
+
+    def test_finalize(self):
+        """После импорта пересчитаны счётчики и разосланы ленты"""
+
+        self.import_all()
+        self.run_import('comments', self.write_jsonl('comments.jsonl', [
+            {'post': 500, 'author': 'anna', 'text': 'Комментарий',
+             'created': '2013-01-01T00:00:00'},
+        ]))
+        self.assertEqual(Post.objects.get(pk=500).comments_count, 1)
+        self.assertEqual(Group.objects.get(slug='books').posts_count, 1)
+        leo = User.objects.get(username='leo')
+        self.assertEqual(leo.counters.posts_count, 1)
+        self.assertEqual(leo.counters.followers_count, 1)
+        self.assertTrue(TimelineEntry.objects.filter(
+            user__username='anna', post_id=500
+        ).exists())
+        self.assertEqual(Comment.objects.get().created.year, 2013)
+
+    def test_follow_after_posts(self):
+        """Подписка, импортированная после постов, получает их в ленту"""
+
+        self.import_all()
+        self.run_import('users', self.write_jsonl('users.jsonl', [
+            {'username': 'ivan'},
+        ]))
+        self.run_import('follows', self.write_jsonl('follows.jsonl', [
+            {'user': 'ivan', 'author': 'leo'},
+            {'user': 'ivan', 'author': 'ivan'},
+        ]))
+        self.assertEqual(Follow.objects.filter(user__username='ivan').count(),
+                         1)
+        self.assertTrue(TimelineEntry.objects.filter(
+            user__username='ivan', post_id=500
+        ).exists())
+
+    def test_bad_id_skipped(self):
+        """Строка с нечисловым id пропускается, остальные импортируются"""
+
+        self.import_all()
+        output = self.run_import('posts', self.write(
+            'posts.csv',
+            'id,text,author\n'
+            'abc,Пост с испорченным id,leo\n'
+            ',Новый пост,leo\n',
+        ))
+
+        self.assertIn('Неверный id: abc', output)
+        self.assertTrue(Post.objects.filter(text='Новый пост').exists())
+        self.assertIn('Разослано постов', output)
+
+    def test_counters_without_finalize(self):
+        """Импорт без финализации всё равно заводит счётчики"""
+
+        self.run_import('users', self.write(
+            'users.csv', 'username\nleo\nanna\n'
+        ), skip_finalize=True)
+        self.assertEqual(UserCounters.objects.filter(
+            user__username__in=['leo', 'anna']
+        ).count(), 2)
+
+    def test_repeated_import(self):
+        """Повторный импорт не создаёт дубликатов"""
+
+        self.import_all()
+        self.import_all()
+        self.assertEqual(User.objects.filter(username='leo').count(), 1)
+        self.assertEqual(Post.objects.count(), 1)
+
+    def test_created_restored(self):
+        """После импорта auto_now_add снова работает"""
+
+        self.import_all()
+        post = Post.objects.create(
+            author=User.objects.get(username='leo'), text='Новый пост'
+        )
+        self.assertGreater(post.created.year, 2012)
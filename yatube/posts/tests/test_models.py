@@ -1,6 +1,11 @@
+from io import StringIO
+
 from django.conf import settings
+from django.core.management import call_command
+from django.db import IntegrityError, transaction
 from django.test import TestCase
 
+from .. import benchmark
 from ..models import Group, Post, User, Comment, Follow
 
 
@@ -166,3 +171,56 @@ class FollowModelTest(TestCase):
                     FollowModelTest.follow._meta.get_field(field).verbose_name,
                     expected_value
                 )
+
+    def test_follow_unique(self):
+        """Повторная подписка на того же автора невозможна"""
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Follow.objects.create(
+                user=FollowModelTest.user1, author=FollowModelTest.user2
+            )
+
+
+class QueryIndexesTest(TestCase):
+    """Проверка того, что запросы лент идут по индексам"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='Test_slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user, text='Пост', group=cls.group
+        )
+        Comment.objects.create(post=cls.post, author=cls.reader, text='Т')
+        Follow.objects.create(user=cls.reader, author=cls.user)
+
+    def test_feed_plans(self):
+        """План каждого запроса ленты использует индекс"""
+
+        expected = {
+            'follow': 'timeline_user_created_idx',
+            'follow_pulled': 'post_pulled_author_idx',
+            'group': 'post_group_created_idx',
+            'profile': 'post_author_created_idx',
+            'comments': 'comment_post_created_idx',
+            'followers': 'follow_author_user_idx',
+        }
+        for name, queryset in benchmark.feed_queries().items():
+            with self.subTest(name=name):
+                plan = queryset.explain()
+                self.assertEqual(benchmark.problems(plan), [])
+                if name in expected:
+                    self.assertIn(expected[name], benchmark.indexes(plan))
+
+    def test_benchmark_command(self):
+        """Команда выводит планы и время запросов"""
+
+        out = StringIO()
+        call_command('benchmark_queries', repeat=1, stdout=out)
+        self.assertIn('post_group_created_idx', out.getvalue())
@@ -0,0 +1,143 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from .. import queries, recommendations
+from ..models import Comment, Follow, Group, Post, Recommendation, User
+
+
+def usernames(authors):
+    return [author.username for author in authors]
+
+
+class RecommendationTests(TestCase):
+    """Проверка подборок «На кого подписаться»"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        names = ('reader', 'a', 'b', 'c', 'writer', 'f1', 'f2', 'f3')
+        cls.users = {
+            name: User.objects.create_user(username=name) for name in names
+        }
+        follows = (
+            ('reader', 'a'),
+            ('f1', 'a'), ('f1', 'b'),
+            ('f2', 'a'), ('f2', 'b'),
+            ('f3', 'a'), ('f3', 'c'),
+        )
+        for user, author in follows:
+            Follow.objects.create(
+                user=cls.users[user], author=cls.users[author]
+            )
+        group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        post = Post.objects.create(
+            author=cls.users['writer'], text='Пост', group=group
+        )
+        Comment.objects.create(
+            post=post, author=cls.users['reader'], text='Комментарий'
+        )
+
+    def setUp(self):
+        cache.clear()
+        recommendations.rebuild()
+        self.reader = self.users['reader']
+
+    def names(self, **kwargs):
+        return [
+            author.username
+            for author in queries.recommended_authors(self.reader, **kwargs)
+        ]
+
+    def test_ranking(self):
+        """Общие подписчики важнее общей группы; свои подписки не в счёт"""
+
+        self.assertEqual(self.names(), ['b', 'c', 'writer'])
+
+    def test_single_query(self):
+        """Подборка читается одним запросом"""
+
+        with self.assertNumQueries(1):
+            self.names()
+
+    def test_follow_drops_recommendation(self):
+        """Автор, на которого подписались, уходит из подборки"""
+
+        Follow.objects.create(user=self.reader, author=self.users['b'])
+        self.assertEqual(self.names(), ['c', 'writer'])
+
+    def test_stale_recommendations_removed(self):
+        """Подборки читателей без подписок и активности удаляются"""
+
+        Recommendation.objects.create(
+            user=self.users['c'], author=self.users['a'], rank=0, score=1
+        )
+        recommendations.rebuild()
+        self.assertFalse(
+            Recommendation.objects.filter(user=self.users['c']).exists()
+        )
+
+    def test_pages_show_recommendations(self):
+        """Подборка выводится в ленте подписок и в профиле"""
+
+        client = Client()
+        client.force_login(self.reader)
+        response = client.get(reverse('posts:follow_index'))
+        self.assertEqual(
+            usernames(response.context['recommendations']),
+            ['b', 'c', 'writer'],
+        )
+        self.assertContains(response, 'На кого подписаться')
+        response = client.get(
+            reverse('posts:profile', kwargs={'username': 'b'})
+        )
+        self.assertEqual(
+            usernames(response.context['recommendations']),
+            ['c', 'writer'],
+        )
+        response = Client().get(
+            reverse('posts:profile', kwargs={'username': 'b'})
+        )
+        self.assertEqual(response.context['recommendations'], [])
+
+    def test_rebuild_changes_etag(self):
+        """Пересчёт подборки сбрасывает ETag профиля читателя"""
+
+        client = Client()
+        client.force_login(self.reader)
+        url = reverse('posts:profile', kwargs={'username': 'a'})
+        etag = client.get(url)['ETag']
+        recommendations.rebuild()
+        self.assertNotEqual(client.get(url)['ETag'], etag)
+
+    def test_command(self):
+        """Команда пересчитывает подборки"""
+
+        Recommendation.objects.all().delete()
+        out = StringIO()
+        call_command('recommend_authors', stdout=out)
+        self.assertIn('5 читателей', out.getvalue())
+        self.assertEqual(self.names(), ['b', 'c', 'writer'])
+
+    def test_command_warns_about_local_cache(self):
+        """Команда предупреждает, что кэш процесса не виден сайту"""
+
+        err = StringIO()
+        locmem = 'django.core.cache.backends.locmem.LocMemCache'
+        with override_settings(CACHES={'default': {'BACKEND': locmem}}):
+            call_command('recommend_authors', stdout=StringIO(), stderr=err)
+        self.assertIn('LocMemCache', err.getvalue())
+        err = StringIO()
+        shared = {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'test_cache_table',
+        }
+        with override_settings(CACHES={'default': shared}):
+            call_command('createcachetable', verbosity=0)
+            call_command('recommend_authors', stdout=StringIO(), stderr=err)
+        self.assertEqual(err.getvalue(), '')
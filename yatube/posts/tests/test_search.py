@@ -0,0 +1,119 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from .. import search
+from ..models import Group, Post, User
+
+
+class SearchTests(TestCase):
+    """Проверка полнотекстового поиска постов"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.other = User.objects.create_user(username='other')
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='admin'
+        )
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='Test_slug',
+            description='Тестовое описание',
+        )
+        cls.best = Post.objects.create(
+            author=cls.user,
+            text='Кошка кошка кошка',
+            group=cls.group,
+        )
+        cls.worse = Post.objects.create(
+            author=cls.other,
+            text='Кошка и очень длинный текст про собаку и не только',
+        )
+        cls.missing = Post.objects.create(author=cls.user, text='Собака')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def found(self, **params):
+        response = self.client.get(reverse('posts:search'), params)
+        return [post.pk for post in response.context['page_obj']]
+
+    def test_ranked_results(self):
+        """Посты ищутся по префиксу слова, лучшие совпадения первыми"""
+
+        self.assertEqual(
+            self.found(q='кошк'),
+            [SearchTests.best.pk, SearchTests.worse.pk],
+        )
+
+    def test_filters(self):
+        """Поиск ограничивается группой и автором"""
+
+        self.assertEqual(
+            self.found(q='кошка', group=SearchTests.group.slug),
+            [SearchTests.best.pk],
+        )
+        self.assertEqual(
+            self.found(q='кошка', author=SearchTests.other.username),
+            [SearchTests.worse.pk],
+        )
+
+    def test_empty_query(self):
+        """Пустая строка и знаки препинания ничего не находят"""
+
+        self.assertEqual(self.found(q=''), [])
+        self.assertEqual(self.found(q='"*)'), [])
+
+    def test_index_follows_changes(self):
+        """Индекс обновляется при изменении и удалении постов"""
+
+        Post.objects.filter(pk=SearchTests.missing.pk).update(text='Зебра')
+        self.assertEqual(self.found(q='зебра'), [SearchTests.missing.pk])
+        self.assertEqual(self.found(q='собак'), [SearchTests.worse.pk])
+        Post.objects.filter(pk=SearchTests.missing.pk).delete()
+        self.assertEqual(self.found(q='зебра'), [])
+
+    def test_triggers_restored(self):
+        """install() восстанавливает потерянные триггеры и индекс"""
+
+        with connection.cursor() as cursor:
+            for name in search.TRIGGERS:
+                cursor.execute(f'DROP TRIGGER {name}')
+        Post.objects.create(author=SearchTests.user, text='Жираф')
+        search.install()
+        self.assertEqual(len(self.found(q='жираф')), 1)
+
+    def test_pagination_keeps_query(self):
+        """Ссылки на следующую страницу сохраняют строку поиска"""
+
+        Post.objects.bulk_create(
+            Post(author=SearchTests.user, text=f'Кошка {number}')
+            for number in range(15)
+        )
+        response = self.client.get(reverse('posts:search'), {'q': 'кошка'})
+        page_obj = response.context['page_obj']
+        self.assertEqual(len(page_obj), 10)
+        self.assertContains(
+            response, f'?q=%D0%BA%D0%BE%D1%88%D0%BA%D0%B0&amp;after='
+            f'{page_obj.paginator.next_cursor}'
+        )
+        response = self.client.get(reverse('posts:search'), {
+            'q': 'кошка', 'after': page_obj.paginator.next_cursor
+        })
+        self.assertEqual(len(response.context['page_obj']), 7)
+
+    def test_admin_search(self):
+        """Поиск в админке идёт по тому же индексу"""
+
+        self.client.force_login(SearchTests.admin)
+        response = self.client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'кошк'}
+        )
+        self.assertEqual(
+            {post.pk for post in response.context['cl'].result_list},
+            {SearchTests.best.pk, SearchTests.worse.pk},
+        )
@@ -0,0 +1,267 @@
+import hashlib
+import shutil
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase
+from django.urls import reverse
+from sorl.thumbnail.models import KVStore
+
+from core.testing import ImmediateExecutor
+from .. import thumbnails
+from ..models import Post, PostImageVariant, User
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@mock.patch('posts.thumbnails.executor', ImmediateExecutor)
+class ThumbnailsTests(TestCase):
+    """Проверка построения миниатюр вне запроса"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='Пост с картинкой',
+            image=SimpleUploadedFile(
+                name='thumbnail.gif',
+                content=SMALL_GIF,
+                content_type='image/gif',
+            ),
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(settings.MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def create_post_with_variants(self, name):
+        post = Post.objects.create(
+            author=ThumbnailsTests.user,
+            text='Пост',
+            image=SimpleUploadedFile(
+                name=name, content=SMALL_GIF, content_type='image/gif'
+            ),
+        )
+        result = thumbnails.process(post.image.name)
+        thumbnails.save_variants(post.pk, post.image.name, result)
+        post.refresh_from_db()
+        return post
+
+    def test_lookup_does_not_generate(self):
+        """Поиск миниатюры не строит её"""
+
+        self.assertIsNone(
+            thumbnails.lookup(ThumbnailsTests.post.image, 'feed')
+        )
+        self.assertIsNone(
+            thumbnails.lookup(ThumbnailsTests.post.image, 'feed')
+        )
+        thumbnails.generate(ThumbnailsTests.post.image.name)
+        thumbnail = thumbnails.lookup(ThumbnailsTests.post.image, 'feed')
+        self.assertEqual((thumbnail.width, thumbnail.height), (960, 339))
+
+    def test_placeholder_until_generated(self):
+        """Пока миниатюры нет, лента выводит заглушку"""
+
+        address = reverse('posts:index')
+        response = self.guest_client.get(address)
+        self.assertContains(response, 'img/placeholder.svg')
+        self.assertIsNotNone(
+            thumbnails.lookup(ThumbnailsTests.post.image, 'feed')
+        )
+        response = self.guest_client.get(address)
+        self.assertNotContains(response, 'img/placeholder.svg')
+
+    def test_prefetch_page(self):
+        """Миниатюры страницы находятся без запросов к базе"""
+
+        posts = [
+            Post.objects.create(
+                author=ThumbnailsTests.user,
+                text=f'Пост {number}',
+                image=SimpleUploadedFile(
+                    name=f'prefetch_{number}.gif',
+                    content=SMALL_GIF,
+                    content_type='image/gif',
+                ),
+            )
+            for number in range(3)
+        ]
+        posts.append(
+            Post.objects.create(author=ThumbnailsTests.user, text='Без')
+        )
+        for post in posts[:2]:
+            thumbnails.generate(post.image.name)
+        self.assertFalse(KVStore.objects.exists())
+
+        # Построение третьей миниатюры уже стоит в очереди.
+        cache.set(thumbnails.PENDING_KEY.format(posts[2].image.name), 1)
+        with self.assertNumQueries(0):
+            thumbnails.prefetch(posts, 'feed')
+        self.assertIsNotNone(posts[0].thumbnails['feed'])
+        self.assertIsNotNone(posts[1].thumbnails['feed'])
+        self.assertIsNone(posts[2].thumbnails['feed'])
+        self.assertIsNone(posts[3].thumbnails['feed'])
+
+    def test_variants_and_placeholder(self):
+        """Варианты картинки и заглушка выводятся в ленте"""
+
+        post = ThumbnailsTests.post
+        result = thumbnails.process(post.image.name)
+        thumbnails.save_variants(post.pk, post.image.name, result)
+        post.refresh_from_db()
+        self.assertTrue(
+            post.image_placeholder.startswith('data:image/jpeg;base64,')
+        )
+        variants = PostImageVariant.objects.filter(post=post)
+        self.assertEqual(
+            {variant.format for variant in variants},
+            set(thumbnails.variant_formats()),
+        )
+        for variant in variants:
+            self.assertEqual((variant.width, variant.height), (320, 113))
+
+        for address in (
+            reverse('posts:index'),
+            reverse('posts:post_detail', kwargs={'post_id': post.pk}),
+        ):
+            with self.subTest(address=address):
+                response = self.guest_client.get(address)
+                self.assertContains(response, 'loading="lazy"')
+                self.assertContains(response, f'{variants[0].file.url} 320w')
+
+    def test_variants_of_replaced_image_dropped(self):
+        """Варианты заменённой картинки не сохраняются"""
+
+        post = ThumbnailsTests.post
+        result = thumbnails.build_variants(post.image.name)
+        thumbnails.save_variants(post.pk, 'posts/other.gif', result)
+        self.assertFalse(PostImageVariant.objects.filter(post=post).exists())
+        for variant in result['variants']:
+            self.assertFalse(default_storage.exists(variant['file']))
+
+    def test_edited_image_variants_dropped(self):
+        """После замены картинки пост не ссылается на прежние варианты"""
+
+        post = self.create_post_with_variants('before.gif')
+        old_files = list(PostImageVariant.objects.filter(
+            post=post
+        ).values_list('file', flat=True))
+        self.assertTrue(old_files)
+        authorized_client = Client()
+        authorized_client.force_login(ThumbnailsTests.user)
+        authorized_client.post(
+            reverse('posts:post_edit', kwargs={'post_id': post.pk}),
+            data={
+                'text': 'Пост',
+                'image': SimpleUploadedFile(
+                    name='after.gif',
+                    content=SMALL_GIF,
+                    content_type='image/gif',
+                ),
+            },
+        )
+        post.refresh_from_db()
+        self.assertIn('after', post.image.name)
+        self.assertEqual(post.image_placeholder, '')
+        self.assertFalse(PostImageVariant.objects.filter(
+            file__in=old_files
+        ).exists())
+        response = self.guest_client.get(
+            reverse('posts:post_detail', kwargs={'post_id': post.pk})
+        )
+        for file_name in old_files:
+            self.assertFalse(default_storage.exists(file_name))
+            self.assertNotContains(response, file_name)
+        self.assertTrue(PostImageVariant.objects.filter(post=post).exists())
+
+    def test_cleared_image_variants_dropped(self):
+        """Удаление картинки удаляет её варианты и заглушку"""
+
+        post = self.create_post_with_variants('cleared.gif')
+        old_files = list(PostImageVariant.objects.filter(
+            post=post
+        ).values_list('file', flat=True))
+        post.image = None
+        post.save()
+        post.refresh_from_db()
+        self.assertEqual(post.image_placeholder, '')
+        self.assertFalse(PostImageVariant.objects.filter(post=post).exists())
+        for file_name in old_files:
+            self.assertFalse(default_storage.exists(file_name))
+
+
+class ImageMetadataTests(TestCase):
+    """Проверка метаданных картинок постов"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(settings.MEDIA_ROOT, ignore_errors=True)
+
+    def create_post(self):
+        return Post.objects.create(
+            author=ImageMetadataTests.user,
+            text='Пост с картинкой',
+            image=SimpleUploadedFile(
+                name='metadata.gif',
+                content=SMALL_GIF,
+                content_type='image/gif',
+            ),
+        )
+
+    def assertMetadata(self, post):
+        post.refresh_from_db()
+        self.assertEqual((post.image_width, post.image_height), (2, 1))
+        self.assertEqual(post.image_size, len(SMALL_GIF))
+        self.assertEqual(
+            post.image_hash, hashlib.sha256(SMALL_GIF).hexdigest()
+        )
+
+    def test_metadata_on_upload(self):
+        """Метаданные записываются при загрузке и стираются без картинки"""
+
+        post = self.create_post()
+        self.assertMetadata(post)
+        post.image = None
+        post.save()
+        post.refresh_from_db()
+        self.assertIsNone(post.image_width)
+        self.assertEqual(post.image_hash, '')
+
+    def test_backfill_command(self):
+        """Команда заполняет метаданные старых постов"""
+
+        post = self.create_post()
+        Post.objects.update(
+            image_width=None, image_height=None, image_size=None,
+            image_hash='',
+        )
+        out = StringIO()
+        call_command('backfill_image_metadata', stdout=out)
+        self.assertIn('Заполнено постов: 1', out.getvalue())
+        self.assertMetadata(post)
@@ -0,0 +1,125 @@
+from django.test import TestCase, override_settings
+
+from .. import timelines
+from ..models import Follow, Post, TimelineEntry, User
+
+
+def timeline(user, per_page=100, **cursor):
+    return list(timelines.paginator(
+        user, timelines.timeline_sources(user), per_page
+    ).get_page(**cursor))
+
+
+class TimelineTests(TestCase):
+    """Проверка материализованных лент подписок"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='author')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def test_post_fanned_out_to_followers(self):
+        """Новый пост записывается в ленты подписчиков"""
+
+        post = Post.objects.create(author=TimelineTests.author, text='Пост')
+
+        self.assertTrue(
+            TimelineEntry.objects.filter(
+                user=TimelineTests.reader, post=post
+            ).exists()
+        )
+        self.assertIn(post, timeline(TimelineTests.reader))
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=0)
+    def test_big_author_pulled_on_read(self):
+        """Посты автора с множеством подписчиков подтягиваются при чтении"""
+
+        post = Post.objects.create(author=TimelineTests.author, text='Пост')
+
+        self.assertFalse(TimelineEntry.objects.filter(post=post).exists())
+        self.assertIn(post, timeline(TimelineTests.reader))
+
+    def test_backfill_and_remove(self):
+        """Подписка дополняет ленту, отписка очищает её"""
+
+        other = User.objects.create_user(username='other')
+        post = Post.objects.create(author=other, text='Пост')
+        self.assertNotIn(post, timeline(TimelineTests.reader))
+
+        Follow.objects.create(user=TimelineTests.reader, author=other)
+        self.assertTrue(
+            TimelineEntry.objects.filter(
+                user=TimelineTests.reader, post=post
+            ).exists()
+        )
+
+        Follow.objects.filter(user=TimelineTests.reader, author=other).delete()
+        self.assertNotIn(post, timeline(TimelineTests.reader))
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=0)
+    def test_pulled_authors_merged(self):
+        """Посты нескольких крупных авторов сливаются по курсору"""
+
+        other = User.objects.create_user(username='other')
+        Follow.objects.create(user=TimelineTests.reader, author=other)
+        posts = [
+            Post.objects.create(
+                author=(TimelineTests.author, other)[number % 2],
+                text=f'Пост {number}',
+            )
+            for number in range(5)
+        ]
+        pages = []
+        cursor = {}
+        while True:
+            paginator = timelines.paginator(
+                TimelineTests.reader,
+                timelines.timeline_sources(TimelineTests.reader),
+                2,
+            )
+            pages.append(list(paginator.get_page(**cursor)))
+            if paginator.next_cursor is None:
+                break
+            cursor = {'after': paginator.next_cursor}
+        self.assertEqual(pages, [posts[:2:-1], posts[2:0:-1], posts[:1]])
+
+    @override_settings(TIMELINE_MAX_LENGTH=3)
+    def test_timeline_trimmed(self):
+        """Лента обрезается до TIMELINE_MAX_LENGTH записей"""
+
+        for n in range(5):
+            Post.objects.create(author=TimelineTests.author, text=f'Пост {n}')
+
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=TimelineTests.reader).count(), 3
+        )
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=0)
+    def test_merged_pages(self):
+        """Лента и посты крупного автора идут одной лентой по дате"""
+
+        pulled = Post.objects.create(author=TimelineTests.author, text='1')
+        other = User.objects.create_user(username='other')
+        with self.settings(TIMELINE_FANOUT_LIMIT=1000):
+            Follow.objects.create(user=TimelineTests.reader, author=other)
+            fanned = Post.objects.create(author=other, text='2')
+        newest = Post.objects.create(author=TimelineTests.author, text='3')
+
+        self.assertEqual(
+            timeline(TimelineTests.reader), [newest, fanned, pulled]
+        )
+        paginator = timelines.paginator(
+            TimelineTests.reader,
+            timelines.timeline_sources(TimelineTests.reader),
+            2,
+        )
+        self.assertEqual(list(paginator.get_page()), [newest, fanned])
+        self.assertEqual(
+            timeline(
+                TimelineTests.reader, per_page=2,
+                after=paginator.next_cursor,
+            ),
+            [pulled],
+        )
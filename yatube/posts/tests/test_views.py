@@ -1,12 +1,20 @@
 import shutil
+from unittest import mock
 
 from django import forms
 from django.conf import settings
 from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
 from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
+from core.paginators import EstimatedCountPaginator, encode_cursor
+from core.query_budget import (
+    assert_view_budget, QueryBudget, QueryBudgetExceeded
+)
+from core.testing import ImmediateExecutor
 from ..models import Post, Group, User, Comment, Follow
 
 
@@ -46,6 +54,7 @@ class PaginatorTests(TestCase):
             ))
 
     def setUp(self):
+        cache.clear()
         self.MAX_POSTS_ON_PAGE = settings.MAX_COUNT_POST
         self.guest_client = Client()
         self.page_2 = '?page=2'
@@ -135,6 +144,253 @@ class PaginatorTests(TestCase):
                 )
 
 
+class CursorPaginatorTests(TestCase):
+    """Проверка постраничного вывода по курсору"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.LEN_POSTS = 23
+        for n in range(cls.LEN_POSTS):
+            Post.objects.create(author=cls.user, text=f'Пост {n}')
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_walk_all_pages(self):
+        """Проход по курсорам выдаёт все посты по порядку без повторов"""
+
+        seen = []
+        query = ''
+        while True:
+            response = self.guest_client.get(reverse('posts:index') + query)
+            page_obj = response.context['page_obj']
+            seen.extend(post.pk for post in page_obj)
+            if not page_obj.has_next():
+                break
+            query = f'?after={page_obj.paginator.next_cursor}'
+
+        expected = list(
+            Post.objects.order_by('-created', '-pk').values_list(
+                'pk', flat=True
+            )
+        )
+        self.assertEqual(seen, expected)
+
+    def test_before_returns_previous_page(self):
+        """Курсор before возвращает предыдущую страницу"""
+
+        first = self.guest_client.get(reverse('posts:index'))
+        next_cursor = first.context['page_obj'].paginator.next_cursor
+        second = self.guest_client.get(
+            reverse('posts:index') + f'?after={next_cursor}'
+        )
+        previous_cursor = second.context['page_obj'].paginator.previous_cursor
+        back = self.guest_client.get(
+            reverse('posts:index') + f'?before={previous_cursor}'
+        )
+        self.assertEqual(
+            list(back.context['page_obj']), list(first.context['page_obj'])
+        )
+        self.assertFalse(back.context['page_obj'].has_previous())
+
+    def test_broken_cursor_returns_first_page(self):
+        """Испорченный курсор возвращает первую страницу"""
+
+        response = self.guest_client.get(
+            reverse('posts:index') + '?after=broken'
+        )
+        self.assertEqual(
+            list(response.context['page_obj']),
+            list(Post.objects.order_by('-created', '-pk')[
+                :settings.MAX_COUNT_POST
+            ])
+        )
+
+    def test_forged_cursor_returns_first_page(self):
+        """Подделанный курсор с не-скалярами возвращает первую страницу"""
+
+        post = Post.objects.first()
+        addresses = (
+            reverse('posts:index'),
+            reverse('posts:search') + '?q=Пост',
+            reverse('posts:post_comments', kwargs={'post_id': post.pk}),
+            reverse('api:post_list'),
+        )
+        cursors = ([{}, 1], [None, 1], [[1], 1], ['', 1], [1, {}])
+        for address in addresses:
+            for values in cursors:
+                with self.subTest(address=address, values=values):
+                    separator = '&' if '?' in address else '?'
+                    response = self.guest_client.get(
+                        f'{address}{separator}after={encode_cursor(values)}'
+                    )
+                    self.assertEqual(response.status_code, 200)
+
+        cache.clear()
+        response = self.guest_client.get(
+            reverse('posts:index') + f'?after={encode_cursor([{}, 1])}'
+        )
+        self.assertFalse(response.context['page_obj'].has_previous())
+
+    def test_no_count_query(self):
+        """Страница по курсору не выполняет COUNT(*)"""
+
+        first = self.guest_client.get(reverse('posts:index'))
+        next_cursor = first.context['page_obj'].paginator.next_cursor
+        with CaptureQueriesContext(connection) as queries:
+            self.guest_client.get(
+                reverse('posts:index') + f'?after={next_cursor}'
+            )
+        for query in queries.captured_queries:
+            self.assertNotIn('COUNT(', query['sql'].upper())
+
+
+class EstimatedCountPaginatorTests(TestCase):
+    """Проверка нумерованного паджинатора с сохранённым числом постов"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='Test',
+            description='Тестовое описание',
+        )
+        for n in range(settings.MAX_COUNT_POST * 2):
+            Post.objects.create(author=cls.user, text='Пост', group=cls.group)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def count_queries(self, address):
+        with CaptureQueriesContext(connection) as queries:
+            self.guest_client.get(address)
+        return [
+            query for query in queries.captured_queries
+            if 'COUNT(' in query['sql'].upper()
+        ]
+
+    def test_elided_page_range(self):
+        """Навигация выводит окно страниц вокруг текущей"""
+
+        paginator = EstimatedCountPaginator(
+            Post.objects.all(), 1, count=200
+        )
+        ellipsis = EstimatedCountPaginator.ELLIPSIS
+        self.assertEqual(
+            list(paginator.get_elided_page_range(50)),
+            [1, ellipsis, 47, 48, 49, 50, 51, 52, 53, ellipsis, 200]
+        )
+        self.assertEqual(
+            list(paginator.get_elided_page_range(2)),
+            [1, 2, 3, 4, 5, ellipsis, 200]
+        )
+
+    def test_counter_used_instead_of_count(self):
+        """Страницы группы и профиля берут число постов из счётчиков"""
+
+        addresses = (
+            reverse('posts:group', kwargs={'slug': 'Test'}) + '?page=2',
+            reverse('posts:profile', kwargs={'username': 'auth'}) + '?page=2',
+        )
+        for address in addresses:
+            with self.subTest(address=address):
+                self.assertEqual(self.count_queries(address), [])
+
+    def test_index_count_cached(self):
+        """Число постов главной страницы считается один раз"""
+
+        address = reverse('posts:index') + '?page=2'
+        self.assertEqual(len(self.count_queries(address)), 1)
+        self.assertEqual(self.count_queries(address), [])
+
+
+class QueryBudgetTests(TestCase):
+    """Проверка бюджетов запросов лент и страницы поста"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='Test',
+            description='Тестовое описание',
+        )
+        Follow.objects.create(user=cls.reader, author=cls.user)
+        for n in range(settings.MAX_COUNT_POST + 1):
+            cls.post = Post.objects.create(
+                author=cls.user, text=f'Пост {n}', group=cls.group
+            )
+        for n in range(5):
+            Comment.objects.create(
+                post=cls.post, author=cls.reader, text=f'Комментарий {n}'
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(QueryBudgetTests.reader)
+
+    def test_views_within_budget(self):
+        """Число запросов страниц не зависит от размера страницы"""
+
+        addresses = (
+            reverse('posts:index'),
+            reverse('posts:group', kwargs={'slug': 'Test'}),
+            reverse('posts:profile', kwargs={'username': 'auth'}),
+            reverse(
+                'posts:post_detail',
+                kwargs={'post_id': QueryBudgetTests.post.pk}
+            ),
+            reverse('posts:follow_index'),
+        )
+        for page_size in (1, settings.MAX_COUNT_POST):
+            for address in addresses:
+                with self.subTest(address=address, page_size=page_size):
+                    cache.clear()
+                    with self.settings(MAX_COUNT_POST=page_size):
+                        assert_view_budget(self.authorized_client, address)
+
+    def test_follow_index_with_pulled_authors(self):
+        """Число запросов ленты не зависит от числа крупных авторов"""
+
+        address = reverse('posts:follow_index')
+        counts = []
+        with self.settings(TIMELINE_FANOUT_LIMIT=0):
+            for number in range(5):
+                author = User.objects.create_user(username=f'big_{number}')
+                Follow.objects.create(
+                    user=QueryBudgetTests.reader, author=author
+                )
+                for n in range(2):
+                    Post.objects.create(author=author, text=f'Пост {n}')
+                if number in (0, 4):
+                    cache.clear()
+                    with CaptureQueriesContext(connection) as queries:
+                        assert_view_budget(self.authorized_client, address)
+                    counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_report_duplicated_queries(self):
+        """Отчёт о превышении бюджета показывает повторяющиеся запросы"""
+
+        with self.assertRaises(QueryBudgetExceeded) as error:
+            with QueryBudget(1, label='N+1'):
+                for post in Post.objects.all()[:3]:
+                    post.author.username
+
+        self.assertIn('Повторяющиеся запросы', str(error.exception))
+        self.assertIn('3x SELECT', str(error.exception))
+
+
+@mock.patch('posts.thumbnails.executor', ImmediateExecutor)
 class PostViewsTests(TestCase):
 
     @classmethod
@@ -532,6 +788,7 @@ class ShowPostAfterCreate(TestCase):
     def test_show_post_in_index_after_create_and_delete(self):
         """Проверка кэширования поста - до удаления и после"""
 
+        cache.clear()
         test_post2 = Post.objects.create(
             author=ShowPostAfterCreate.user_1,
             text='Проверка кэширования',
@@ -540,13 +797,150 @@ class ShowPostAfterCreate(TestCase):
         response = self.authorized_client.get(reverse('posts:index'))
         posts_object = response.context['page_obj'][0]
         self.assertEqual(test_post2, posts_object)
+        cached_response = self.authorized_client.get(reverse('posts:index'))
+        self.assertEqual(response.content, cached_response.content)
         test_post2.delete()
         after_del_response = self.authorized_client.get(reverse('posts:index'))
-        self.assertEqual(
+        self.assertNotEqual(
             response.content, after_del_response.content
         )
+
+
+class CommentsPaginationTests(TestCase):
+    """Проверка постраничного вывода комментариев"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.post = Post.objects.create(author=cls.user, text='Пост')
+        cls.LEN_COMMENTS = settings.COMMENTS_PER_PAGE + 5
+        for number in range(cls.LEN_COMMENTS):
+            Comment.objects.create(
+                post=cls.post, author=cls.user, text=f'Комментарий {number}'
+            )
+
+    def setUp(self):
         cache.clear()
-        update_response = self.authorized_client.get(reverse('posts:index'))
-        self.assertNotEqual(
-            after_del_response.content, update_response.content
+        self.client = Client()
+
+    def test_first_page(self):
+        """На странице поста первая порция комментариев, новые первыми"""
+
+        response = self.client.get(reverse(
+            'posts:post_detail', kwargs={'post_id': self.post.pk}
+        ))
+        comments = response.context['comments']
+        self.assertEqual(len(comments), settings.COMMENTS_PER_PAGE)
+        self.assertEqual(
+            list(comments),
+            list(Comment.objects.filter(post=self.post).order_by(
+                '-created', '-pk'
+            )[:settings.COMMENTS_PER_PAGE]),
+        )
+        self.assertContains(response, 'data-comments-more')
+        self.assertContains(response, f'<span >{self.LEN_COMMENTS}</span>')
+
+    def test_fragment(self):
+        """Фрагмент отдаёт остаток комментариев без кнопки"""
+
+        response = self.client.get(reverse(
+            'posts:post_detail', kwargs={'post_id': self.post.pk}
+        ))
+        cursor = response.context['comments'].paginator.next_cursor
+        fragment = self.client.get(
+            reverse('posts:post_comments', kwargs={'post_id': self.post.pk}),
+            {'after': cursor},
+        )
+        self.assertEqual(
+            len(fragment.context['comments']),
+            self.LEN_COMMENTS - settings.COMMENTS_PER_PAGE,
         )
+        self.assertNotContains(fragment, '<html')
+        self.assertNotContains(fragment, 'data-comments-more')
+        self.assertTemplateUsed(fragment, 'posts/includes/comments.html')
+
+    def test_fragment_unknown_post(self):
+        """Фрагмент несуществующего поста отдаёт 404"""
+
+        response = self.client.get(reverse(
+            'posts:post_comments', kwargs={'post_id': self.post.pk + 100}
+        ))
+        self.assertEqual(response.status_code, 404)
+
+    def test_new_comment_invalidates_fragment(self):
+        """Новый комментарий виден во фрагменте сразу"""
+
+        url = reverse('posts:post_comments', kwargs={'post_id': self.post.pk})
+        self.client.get(url)
+        Comment.objects.create(
+            post=self.post, author=self.user, text='Свежий комментарий'
+        )
+        self.assertContains(self.client.get(url), 'Свежий комментарий')
+
+
+class FollowListsTests(TestCase):
+    """Проверка страниц подписчиков и подписок"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.LEN_FOLLOWERS = settings.FOLLOWS_PER_PAGE + 3
+        cls.followers = [
+            User.objects.create_user(username=f'reader_{number}')
+            for number in range(cls.LEN_FOLLOWERS)
+        ]
+        for follower in cls.followers:
+            Follow.objects.create(user=follower, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def test_followers_pages(self):
+        """Подписчики выводятся страницами по курсору"""
+
+        url = reverse('posts:followers', kwargs={'username': 'author'})
+        response = self.client.get(url)
+        people = response.context['people']
+        self.assertEqual(len(people), settings.FOLLOWS_PER_PAGE)
+        self.assertEqual(people[0], self.followers[-1])
+        self.assertContains(response, f'Подписчиков: {self.LEN_FOLLOWERS}')
+        cursor = response.context['page_obj'].paginator.next_cursor
+        response = self.client.get(url, {'after': cursor})
+        self.assertEqual(
+            response.context['people'], self.followers[2::-1]
+        )
+
+    def test_following_page(self):
+        """Подписки пользователя"""
+
+        response = self.client.get(reverse(
+            'posts:following', kwargs={'username': 'reader_0'}
+        ))
+        self.assertEqual(response.context['people'], [self.author])
+
+    def test_query_budget(self):
+        """Страница подписчиков не делает запрос на каждого пользователя"""
+
+        assert_view_budget(self.client, reverse(
+            'posts:followers', kwargs={'username': 'author'}
+        ))
+
+    def test_unknown_user(self):
+        """Несуществующий пользователь — 404"""
+
+        response = self.client.get(reverse(
+            'posts:followers', kwargs={'username': 'nobody'}
+        ))
+        self.assertEqual(response.status_code, 404)
+
+    def test_new_follower_invalidates(self):
+        """Новый подписчик сразу виден"""
+
+        url = reverse('posts:followers', kwargs={'username': 'author'})
+        self.client.get(url)
+        newcomer = User.objects.create_user(username='newcomer')
+        Follow.objects.create(user=newcomer, author=self.author)
+        self.assertEqual(self.client.get(url).context['people'][0], newcomer)
@@ -0,0 +1,281 @@
+"""
+Миниатюры картинок постов.
+
+Миниатюры всех размеров из шаблонов строятся вне запроса: для новой
+картинки — задачей build из очереди core.jobs, а если шаблон не нашёл
+миниатюру (например, у старого поста) — в пуле процессов, ведь
+декодирование и масштабирование занимают процессор. Шаблон только ищет
+готовую миниатюру в хранилище sorl и, пока её нет, выводит заглушку.
+
+Там же строятся варианты картинки разной ширины в современных форматах
+(для srcset) и размытая заглушка, которая видна, пока картинка грузится.
+"""
+import base64
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, connections, transaction
+from PIL import Image, ImageFilter, ImageOps, features
+from sorl.thumbnail import default
+from sorl.thumbnail.base import ThumbnailBackend
+from sorl.thumbnail.conf import defaults, settings as sorl_settings
+from sorl.thumbnail.images import ImageFile
+
+from core import jobs
+from . import caching, images
+from .models import Post, PostImageVariant
+
+logger = logging.getLogger(__name__)
+
+# Размеры, которые выводят шаблоны: имя -> (геометрия, опции sorl).
+THUMBNAILS = {
+    'feed': ('960x339', {'crop': 'center', 'upscale': True}),
+}
+
+# Ширины вариантов картинки ленты и атрибут sizes для них.
+VARIANT_WIDTHS = (320, 640, 960)
+VARIANT_SIZES = '(max-width: 992px) 100vw, 960px'
+VARIANT_QUALITY = 75
+PLACEHOLDER_WIDTH = 16
+
+PENDING_KEY = 'thumbnail-pending:{}'
+PENDING_SECONDS = 60
+
+_executor = None
+
+
+class LookupBackend(ThumbnailBackend):
+    """Бэкенд sorl, умеющий искать миниатюру, не создавая её."""
+
+    def thumbnail_file(self, file_, geometry_string, **options):
+        source = ImageFile(file_)
+        # Опции дополняются так же, как в ThumbnailBackend.get_thumbnail,
+        # иначе имя файла миниатюры не совпадёт.
+        if sorl_settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault('format', self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(sorl_settings, attr)
+            if value != getattr(defaults, attr):
+                options.setdefault(key, value)
+        name = self._get_thumbnail_filename(source, geometry_string, options)
+        return ImageFile(name, default.storage)
+
+    def get_existing(self, file_, geometry_string, **options):
+        """Готовая миниатюра из хранилища sorl или None."""
+        thumbnail = self.thumbnail_file(file_, geometry_string, **options)
+        return default.kvstore.get(thumbnail)
+
+
+backend = LookupBackend()
+
+
+def lookup(image, size):
+    geometry, options = THUMBNAILS[size]
+    return backend.get_existing(image, geometry, **options)
+
+
+def prefetch(posts, size):
+    """
+    Находит готовые миниатюры для всех постов страницы одним запросом
+    к хранилищу и запоминает их у постов; недостающие ставит в пул.
+    """
+    geometry, options = THUMBNAILS[size]
+    files = {
+        post.pk: backend.thumbnail_file(post.image, geometry, **options)
+        for post in posts
+        if post.image
+    }
+    found = default.kvstore.get_many(files.values())
+    for post in posts:
+        if not hasattr(post, 'thumbnails'):
+            post.thumbnails = {}
+        if post.pk not in files:
+            post.thumbnails[size] = None
+            continue
+        post.thumbnails[size] = found.get(files[post.pk].key)
+        if post.thumbnails[size] is None:
+            schedule(post, variants=not post.image_placeholder)
+
+
+def generate(name, size=None):
+    """
+    Строит все миниатюры картинки. Известные размеры исходника
+    записываются в хранилище sorl, чтобы оно не открывало файл ради них.
+    """
+    if size is not None:
+        source = ImageFile(name)
+        source.set_size(size)
+        default.kvstore.get_or_set(source)
+    for geometry, options in THUMBNAILS.values():
+        backend.get_thumbnail(name, geometry, **options)
+    return name
+
+
+def variant_formats():
+    """Форматы вариантов, которые умеет сохранять установленный Pillow."""
+    formats = []
+    if 'AVIF' in Image.SAVE:
+        formats.append('avif')
+    if features.check('webp'):
+        formats.append('webp')
+    return formats
+
+
+def _encode(image, image_format, **options):
+    buffer = BytesIO()
+    image.save(buffer, image_format, **options)
+    return buffer.getvalue()
+
+
+def build_variants(name):
+    """
+    Строит варианты картинки с пропорциями ленты и размытую заглушку.
+    Возвращает заглушку и описания сохранённых файлов.
+    """
+    width, height = map(int, THUMBNAILS['feed'][0].split('x'))
+    with default_storage.open(name) as source:
+        image = ImageOps.exif_transpose(Image.open(source)).convert('RGB')
+    widths = [
+        variant_width for variant_width in VARIANT_WIDTHS
+        if variant_width <= image.width
+    ] or VARIANT_WIDTHS[:1]
+    stem = os.path.splitext(os.path.basename(name))[0]
+    variants = []
+    for variant_width in widths:
+        size = (variant_width, round(variant_width * height / width))
+        resized = ImageOps.fit(image, size, Image.LANCZOS)
+        for image_format in variant_formats():
+            file_name = default_storage.save(
+                f'posts/variants/{stem}_{variant_width}.{image_format}',
+                ContentFile(_encode(
+                    resized, image_format.upper(), quality=VARIANT_QUALITY
+                )),
+            )
+            variants.append({
+                'format': image_format,
+                'width': size[0],
+                'height': size[1],
+                'file': file_name,
+            })
+    tiny = ImageOps.fit(image, (
+        PLACEHOLDER_WIDTH, max(1, round(PLACEHOLDER_WIDTH * height / width))
+    ))
+    tiny = tiny.filter(ImageFilter.GaussianBlur(1))
+    placeholder = base64.b64encode(_encode(tiny, 'JPEG', quality=50))
+    return {
+        'placeholder': 'data:image/jpeg;base64,' + placeholder.decode(),
+        'variants': variants,
+    }
+
+
+def process(name, variants=True, size=None):
+    """Задача пула: миниатюры sorl и, если нужно, варианты картинки."""
+    generate(name, size)
+    return build_variants(name) if variants else None
+
+
+def save_variants(post_id, name, result):
+    """Записывает варианты, если у поста всё ещё та же картинка."""
+    new_files = {variant['file'] for variant in result['variants']}
+    with transaction.atomic():
+        old_files = set(PostImageVariant.objects.filter(
+            post_id=post_id
+        ).values_list('file', flat=True))
+        updated = Post.objects.filter(pk=post_id, image=name).update(
+            image_placeholder=result['placeholder']
+        )
+        if updated:
+            PostImageVariant.objects.filter(post_id=post_id).delete()
+            PostImageVariant.objects.bulk_create(
+                PostImageVariant(post_id=post_id, **variant)
+                for variant in result['variants']
+            )
+    # Картинку успели сменить или удалить пост: новые файлы не нужны.
+    for file_name in (old_files - new_files if updated else new_files):
+        default_storage.delete(file_name)
+
+
+def drop_variants(post_id):
+    """Удаляет варианты картинки поста вместе с файлами."""
+    variants = PostImageVariant.objects.filter(post_id=post_id)
+    files = list(variants.values_list('file', flat=True))
+    if not files:
+        return
+    variants.delete()
+    for file_name in files:
+        default_storage.delete(file_name)
+
+
+def _init_worker():
+    # Соединения унаследованы от родительского процесса: закрывать их
+    # нельзя, сокет общий, поэтому процесс просто открывает свои.
+    for conn in connections.all():
+        conn.connection = None
+
+
+def executor():
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.THUMBNAIL_WORKERS,
+            initializer=_init_worker,
+        )
+    return _executor
+
+
+def _finished(post, future):
+    # Вызывается в служебном потоке пула: его соединение с базой
+    # закрывается здесь же.
+    try:
+        cache.delete(PENDING_KEY.format(post.image.name))
+        if future.exception() is not None:
+            logger.error(
+                'Не удалось построить миниатюры %s', post.image.name,
+                exc_info=future.exception(),
+            )
+            return
+        if future.result() is not None:
+            save_variants(post.pk, post.image.name, future.result())
+        # Страницы с заглушкой лежат в кэше: сбрасываем их.
+        caching.bump_post(post)
+    finally:
+        connection.close()
+
+
+def schedule(post, variants=True):
+    """Ставит построение миниатюр поста в пул, если оно ещё не стоит."""
+    if not post.image:
+        return
+    pending = PENDING_KEY.format(post.image.name)
+    if not cache.add(pending, 1, PENDING_SECONDS):
+        return
+    future = executor().submit(
+        process, post.image.name, variants, images.dimensions(post)
+    )
+    future.add_done_callback(lambda future: _finished(post, future))
+
+
+def build(post_id):
+    """Задача очереди: миниатюры и варианты картинки поста."""
+    post = Post.objects.filter(pk=post_id).only(
+        'pk', 'author_id', 'group_id', 'image', 'image_width', 'image_height'
+    ).first()
+    if post is None or not post.image:
+        return
+    result = process(post.image.name, True, images.dimensions(post))
+    save_variants(post.pk, post.image.name, result)
+    caching.bump_post(post)
+
+
+def enqueue(post):
+    """Ставит построение миниатюр загруженной картинки в очередь задач."""
+    if post.image:
+        jobs.enqueue(build, key=f'thumbnails:{post.pk}', post_id=post.pk)
@@ -0,0 +1,144 @@
+"""
+Материализованные ленты подписок.
+
+Новый пост записывается в ленты всех подписчиков автора (fan-out on
+write). Посты авторов, у которых подписчиков больше
+TIMELINE_FANOUT_LIMIT, не рассылаются: такие посты остаются с
+in_timelines=False и подтягиваются в ленту при чтении.
+
+Страница ленты собирается из материализованной ленты и постов таких
+авторов из подписок читателя (MergedCursorPaginator): каждая выборка
+идёт по своему индексу с LIMIT, посты всех крупных авторов читаются
+одним запросом, и объединение целиком не сортируется.
+"""
+from django.conf import settings
+from django.db.models import Exists, F, OuterRef, Subquery
+
+from core.paginators import MergedCursorPaginator
+
+from .models import Follow, Post, TimelineEntry, UserCounters
+
+
+def is_fanout_author(author_id):
+    """Рассылаются ли посты автора по лентам подписчиков."""
+    followers = UserCounters.objects.filter(
+        pk=author_id
+    ).values_list('followers_count', flat=True).first() or 0
+    return followers <= settings.TIMELINE_FANOUT_LIMIT
+
+
+def trim(user_ids):
+    """Обрезает ленты пользователей до TIMELINE_MAX_LENGTH записей."""
+    boundary = TimelineEntry.objects.filter(
+        user_id=OuterRef('user_id')
+    ).order_by('-created').values('created')[
+        settings.TIMELINE_MAX_LENGTH - 1:settings.TIMELINE_MAX_LENGTH
+    ]
+    TimelineEntry.objects.filter(
+        user_id__in=user_ids,
+        created__lt=Subquery(boundary),
+    ).delete()
+
+
+def fan_out(post):
+    """Записывает новый пост в ленты подписчиков автора."""
+    if not is_fanout_author(post.author_id):
+        return
+    # Флаг ставится до выборки подписчиков: тот, кто подпишется после
+    # этого, получит пост через backfill.
+    Post.objects.filter(pk=post.pk).update(in_timelines=True)
+    post.in_timelines = True
+    followers = Follow.objects.filter(
+        author_id=post.author_id
+    ).values_list('user_id', flat=True)
+    batch_size = settings.TIMELINE_BATCH_SIZE
+    batch = []
+    for user_id in followers.iterator(chunk_size=batch_size):
+        batch.append(user_id)
+        if len(batch) == batch_size:
+            _write(post, batch)
+            batch = []
+    if batch:
+        _write(post, batch)
+
+
+def _write(post, user_ids):
+    TimelineEntry.objects.bulk_create(
+        (
+            TimelineEntry(user_id=user_id, post=post, created=post.created)
+            for user_id in user_ids
+        ),
+        ignore_conflicts=True,
+    )
+    trim(user_ids)
+
+
+def backfill(user_id, author_id):
+    """Добавляет в ленту последние разосланные посты нового автора."""
+    posts = Post.objects.filter(
+        author_id=author_id, in_timelines=True
+    ).values_list('pk', 'created')[:settings.TIMELINE_BACKFILL]
+    TimelineEntry.objects.bulk_create(
+        (
+            TimelineEntry(user_id=user_id, post_id=post_id, created=created)
+            for post_id, created in posts
+        ),
+        ignore_conflicts=True,
+    )
+    trim([user_id])
+
+
+def remove(user_id, author_id):
+    """Убирает из ленты посты автора после отписки."""
+    TimelineEntry.objects.filter(
+        user_id=user_id, post__author_id=author_id
+    ).delete()
+
+
+# Ключ сортировки ленты: дата записи и id поста. У записей ленты
+# это поля TimelineEntry (индекс timeline_user_created_idx), у
+# подтянутых постов — поля самого поста (индекс post_pulled_author_idx).
+ORDERING = ('-timeline_created', '-timeline_post')
+
+
+def pulled_authors(user):
+    """Авторы из подписок читателя, чьи посты не разосланы по лентам."""
+    pulled = Post.objects.filter(
+        author_id=OuterRef('author_id'), in_timelines=False
+    )
+    return Follow.objects.filter(user=user).annotate(
+        pulled=Exists(pulled)
+    ).filter(pulled=True).order_by().values_list('author_id', flat=True)
+
+
+def entry_posts(user):
+    """Посты материализованной ленты читателя."""
+    return Post.objects.filter(timeline_entries__user=user).annotate(
+        timeline_created=F('timeline_entries__created'),
+        timeline_post=F('timeline_entries__post_id'),
+    )
+
+
+def pulled_posts():
+    """
+    Посты, которые подтягиваются в ленты при чтении. Паджинатор ленты
+    читает их по частям на автора из pulled_authors читателя, каждую —
+    по индексу post_pulled_author_idx.
+    """
+    return Post.objects.filter(in_timelines=False).annotate(
+        timeline_created=F('created'),
+        timeline_post=F('id'),
+    )
+
+
+def timeline_sources(user):
+    """Наборы постов ленты подписок с общим ключом ORDERING."""
+    return [entry_posts(user), pulled_posts()]
+
+
+def paginator(user, sources, per_page):
+    """Паджинатор ленты читателя по наборам из timeline_sources."""
+    return MergedCursorPaginator(
+        sources, per_page, ordering=ORDERING,
+        partitions={1: ('author_id', list(pulled_authors(user)))},
+    )
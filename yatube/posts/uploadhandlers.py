@@ -0,0 +1,104 @@
+"""
+Загрузка картинок постов с ограничением памяти.
+
+Файл пишется во временный файл на диске, а не в память. Размер в байтах
+проверяется по мере загрузки, размер в пикселях — по заголовку картинки,
+без декодирования: слишком большая картинка отбрасывается раньше,
+чем её откроет проверка ImageField.
+"""
+from functools import wraps
+
+from django.conf import settings
+from django.core.files.uploadhandler import (
+    SkipFile, TemporaryFileUploadHandler
+)
+from django.template.defaultfilters import filesizeformat
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
+from PIL import Image
+
+TOO_LARGE = 'Файл больше {limit}.'
+TOO_MANY_PIXELS = (
+    'Картинка {width}x{height} слишком большая: '
+    'допускается не больше {limit} пикселей.'
+)
+
+
+class LimitedImageUploadHandler(TemporaryFileUploadHandler):
+    """
+    Обработчик загрузки с ограничениями из POST_IMAGE_MAX_BYTES
+    и POST_IMAGE_MAX_PIXELS. Причины отказа складываются
+    в request.upload_errors: {поле формы: сообщение}.
+    """
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        if request is not None and not hasattr(request, 'upload_errors'):
+            request.upload_errors = {}
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+        self.header_checked = False
+
+    def reject(self, message):
+        self.request.upload_errors[self.field_name] = message
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > settings.POST_IMAGE_MAX_BYTES:
+            self.reject(TOO_LARGE.format(
+                limit=filesizeformat(settings.POST_IMAGE_MAX_BYTES)
+            ))
+            raise SkipFile
+        super().receive_data_chunk(raw_data, start)
+        if not self.header_checked and not self.check_header():
+            raise SkipFile
+
+    def file_complete(self, file_size):
+        if not self.header_checked and not self.check_header(complete=True):
+            self.file.close()
+            return None
+        return super().file_complete(file_size)
+
+    def check_header(self, complete=False):
+        """
+        Сверяет размер картинки из заголовка с лимитом. Пока заголовок
+        не пришёл целиком, проверка откладывается до следующего куска.
+        """
+        position = self.file.tell()
+        self.file.seek(0)
+        try:
+            with Image.open(self.file) as image:
+                width, height = image.size
+        except Exception:
+            # Не картинка или заголовок ещё не дочитан: окончательное
+            # решение за ImageField.
+            self.header_checked = complete
+            return True
+        finally:
+            self.file.seek(position)
+        self.header_checked = True
+        if width * height > settings.POST_IMAGE_MAX_PIXELS:
+            self.reject(TOO_MANY_PIXELS.format(
+                width=width,
+                height=height,
+                limit=settings.POST_IMAGE_MAX_PIXELS,
+            ))
+            return False
+        return True
+
+
+def limited_image_uploads(view_func):
+    """
+    Подключает LimitedImageUploadHandler к представлению. Обработчики
+    можно менять только до чтения request.POST, которое делает проверка
+    CSRF, поэтому она переносится внутрь.
+    """
+    protected_view = csrf_protect(view_func)
+
+    @wraps(view_func)
+    @csrf_exempt
+    def wrapper(request, *args, **kwargs):
+        request.upload_handlers = [LimitedImageUploadHandler(request)]
+        return protected_view(request, *args, **kwargs)
+    return wrapper
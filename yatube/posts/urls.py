@@ -1,6 +1,6 @@
 from django.urls import path
 
-from . import views
+from . import feeds, views
 
 app_name = 'posts'
 
@@ -26,6 +26,47 @@ urlpatterns = [
     path(
         'posts/<int:post_id>/comment/', views.add_comment, name='add_comment'
     ),
+    path(
+        'posts/<int:post_id>/comments/',
+        views.post_comments,
+        name='post_comments'
+    ),
+    path(
+        'search/', views.search, name='search'
+    ),
+    path(
+        'rss/', feeds.index_rss, name='index_rss'
+    ),
+    path(
+        'atom/', feeds.index_atom, name='index_atom'
+    ),
+    path(
+        'group/<slug:slug>/rss/', feeds.group_rss, name='group_rss'
+    ),
+    path(
+        'group/<slug:slug>/atom/', feeds.group_atom, name='group_atom'
+    ),
+    path(
+        'profile/<str:username>/followers/',
+        views.followers,
+        name='followers'
+    ),
+    path(
+        'profile/<str:username>/following/',
+        views.following,
+        name='following'
+    ),
+    path(
+        'profile/<str:username>/rss/', feeds.author_rss, name='profile_rss'
+    ),
+    path(
+        'profile/<str:username>/atom/',
+        feeds.author_atom,
+        name='profile_atom'
+    ),
+    path(
+        'export/', views.export_archive, name='export'
+    ),
     path(
         'follow/', views.follow_index, name='follow_index'
     ),
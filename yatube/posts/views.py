@@ -1,66 +1,115 @@
 from django.conf import settings
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
+from django.db import transaction
+from django.http import StreamingHttpResponse
 from django.shortcuts import render, get_object_or_404, redirect, reverse
 
+from core.decorators import cache_for_anonymous, conditional_on
+from core.paginators import CursorPaginator, EstimatedCountPaginator
+from core.query_budget import query_budget
+from . import (
+    caching, export, queries, search as post_search, thumbnails, timelines
+)
 from .models import Post, Group, User, Follow
 from .forms import PostForm, CommentForm
+from .uploadhandlers import limited_image_uploads
 
 
-def paginator(request, post_list):
-    paginator = Paginator(post_list, settings.MAX_COUNT_POST)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+def cursor_page(request, paginator):
+    page_obj = paginator.get_page(
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+    )
+    thumbnails.prefetch(page_obj, 'feed')
     return page_obj
 
 
+def paginator(request, post_list, count=None):
+    if 'page' not in request.GET:
+        return cursor_page(
+            request, CursorPaginator(post_list, settings.MAX_COUNT_POST)
+        )
+    paginator = EstimatedCountPaginator(
+        post_list, settings.MAX_COUNT_POST, count=count
+    )
+    page_obj = paginator.get_page(request.GET.get('page'))
+    thumbnails.prefetch(page_obj, 'feed')
+    return page_obj
+
+
+@conditional_on(caching.index_scopes)
+@cache_for_anonymous
+@query_budget(4)
 def index(request):
 
-    post_list = Post.objects.all()
+    post_list = queries.index_posts()
     page_obj = paginator(request, post_list)
 
     context = {
         'page_obj': page_obj,
-        'index': True
+        'index': True,
+        'cache_seconds': settings.CASH_SECONDS,
+        'cache_version': caching.index_version(),
     }
-    return render(request, 'posts/index.html', context)
+    response = render(request, 'posts/index.html', context)
+    response.cache_scopes = (caching.INDEX,)
+    return response
 
 
+@conditional_on(caching.group_scopes)
+@cache_for_anonymous
+@query_budget(6)
 def group_posts(request, slug):
 
     group = get_object_or_404(Group, slug=slug)
-    post_list = group.posts.all()
-    page_obj = paginator(request, post_list)
+    post_list = queries.group_posts(group)
+    page_obj = paginator(request, post_list, count=group.posts_count)
 
     context = {
         'group': group,
         'page_obj': page_obj,
+        'cache_seconds': settings.CASH_SECONDS,
+        'cache_version': caching.group_version(group),
     }
-    return render(request, 'posts/group_list.html', context)
+    response = render(request, 'posts/group_list.html', context)
+    response.cache_scopes = (caching.group_scope(group.pk),)
+    return response
 
 
+@conditional_on(caching.profile_page_scopes)
+@cache_for_anonymous
+@query_budget(7)
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    user = request.user
-    follow = (
-        request.user.is_authenticated
-        and user != author
-        and Follow.objects.filter(user=user, author=author).exists()
-    )
-    post_list = author.posts.all()
-    page_obj = paginator(request, post_list)
+    author = queries.profile_author(username, request.user)
+    follow = getattr(author, 'is_followed', False) and request.user != author
+    post_list = queries.author_posts(author)
+    # Без строки счётчиков число постов возьмётся из cached_count.
+    counters = getattr(author, 'counters', None)
+    page_obj = paginator(
+        request, post_list, count=getattr(counters, 'posts_count', None)
+    )
 
     context = {
         'author': author,
         'page_obj': page_obj,
         'following': follow,
+        'recommendations': queries.recommended_authors(
+            request.user, exclude=author.pk
+        ),
+        'cache_seconds': settings.CASH_SECONDS,
+        'cache_version': caching.profile_version(author),
     }
-    return render(request, 'posts/profile.html', context)
+    response = render(request, 'posts/profile.html', context)
+    response.cache_scopes = (caching.author_scope(author.pk),)
+    return response
 
 
+@conditional_on(caching.post_scopes)
+@cache_for_anonymous
+@query_budget(6)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
-    comments = post.comments.all()
+    post = queries.post_detail(post_id)
+    comments = comments_page(request, post.pk)
     comment_form = CommentForm()
 
     context = {
@@ -68,19 +117,126 @@ def post_detail(request, post_id):
         'comments': comments,
         'form': comment_form,
     }
-    return render(request, 'posts/post_detail.html', context)
+    response = render(request, 'posts/post_detail.html', context)
+    response.cache_scopes = (
+        caching.post_scope(post.pk),
+        caching.author_scope(post.author_id),
+    )
+    return response
+
+
+@conditional_on(caching.index_scopes)
+@cache_for_anonymous
+@query_budget(5)
+def search(request):
+    query = request.GET.get('q', '').strip()
+    group = request.GET.get('group', '')
+    author = request.GET.get('author', '')
+    post_list = Post.objects.all()
+    if group:
+        post_list = post_list.filter(group__slug=group)
+    if author:
+        post_list = post_list.filter(author__username=author)
+    post_list = queries.feed(post_search.search(post_list, query))
+    paginator = CursorPaginator(
+        post_list, settings.MAX_COUNT_POST, ordering=('rank', 'pk')
+    )
+    page_obj = paginator.get_page(
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+    )
+    thumbnails.prefetch(page_obj, 'feed')
+
+    context = {
+        'page_obj': page_obj,
+        'query': query,
+        'group_slug': group,
+        'author_username': author,
+        'groups': Group.objects.only('slug', 'title'),
+    }
+    response = render(request, 'posts/search.html', context)
+    response.cache_scopes = (caching.INDEX,)
+    return response
+
+
+def comments_page(request, post_id):
+    paginator = CursorPaginator(
+        queries.post_comments(post_id), settings.COMMENTS_PER_PAGE
+    )
+    return paginator.get_page(after=request.GET.get('after'))
+
+
+@conditional_on(caching.post_scopes)
+@cache_for_anonymous
+@query_budget(3)
+def post_comments(request, post_id):
+    """Следующая порция комментариев поста фрагментом HTML."""
+    post = get_object_or_404(Post.objects.only('pk'), pk=post_id)
+    context = {
+        'post': post,
+        'comments': comments_page(request, post.pk),
+    }
+    response = render(request, 'posts/includes/comments.html', context)
+    response.cache_scopes = (caching.post_scope(post.pk),)
+    return response
+
+
+def follow_list(request, username, relation, follows, title):
+    author = get_object_or_404(
+        User.objects.select_related('counters'), username=username
+    )
+    paginator = CursorPaginator(
+        follows(author),
+        settings.FOLLOWS_PER_PAGE,
+        ordering=(f'-{relation}_id',),
+    )
+    page_obj = paginator.get_page(
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+    )
+    context = {
+        'author': author,
+        'page_obj': page_obj,
+        'people': [getattr(follow, relation) for follow in page_obj],
+        'title': title,
+    }
+    response = render(request, 'posts/follow_list.html', context)
+    response.cache_scopes = (caching.author_scope(author.pk),)
+    return response
+
+
+@conditional_on(caching.profile_scopes)
+@cache_for_anonymous
+@query_budget(3)
+def followers(request, username):
+    return follow_list(
+        request, username, 'user', queries.followers, 'Подписчики'
+    )
+
+
+@conditional_on(caching.profile_scopes)
+@cache_for_anonymous
+@query_budget(3)
+def following(request, username):
+    return follow_list(
+        request, username, 'author', queries.following, 'Подписки'
+    )
 
 
 @login_required
+@limited_image_uploads
+@transaction.atomic
 def post_create(request):
     form = PostForm(
         request.POST or None,
         files=request.FILES or None,
+        upload_errors=getattr(request, 'upload_errors', None),
     )
     if form.is_valid():
         post = form.save(commit=False)
         post.author = request.user
         post.save()
+        thumbnails.enqueue(post)
         return redirect('posts:profile', post.author)
 
     context = {
@@ -90,6 +246,7 @@ def post_create(request):
 
 
 @login_required
+@limited_image_uploads
 def post_edit(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
     post_url = reverse('posts:post_detail', kwargs={'post_id': post.id})
@@ -98,9 +255,12 @@ def post_edit(request, post_id):
     form = PostForm(
         request.POST or None,
         files=request.FILES or None,
-        instance=post)
+        instance=post,
+        upload_errors=getattr(request, 'upload_errors', None),
+    )
     if form.is_valid():
-        form.save()
+        post = form.save()
+        thumbnails.enqueue(post)
         return redirect(post_url)
 
     context = {'form': form,
@@ -109,6 +269,7 @@ def post_edit(request, post_id):
 
 
 @login_required
+@transaction.atomic
 def add_comment(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
     form = CommentForm(request.POST or None)
@@ -121,18 +282,42 @@ def add_comment(request, post_id):
 
 
 @login_required
+@conditional_on(caching.follow_scopes)
+@query_budget(7)
 def follow_index(request):
-    posts = Post.objects.filter(author__following__user=request.user)
-
-    page_obj = paginator(request, posts)
+    """
+    Лента подписок только по курсору: номер страницы потребовал бы
+    сортировать всю ленту.
+    """
+    page_obj = cursor_page(request, timelines.paginator(
+        request.user,
+        queries.follow_posts(request.user),
+        settings.MAX_COUNT_POST,
+    ))
     context = {
         'page_obj': page_obj,
         'follow': True,
+        'recommendations': queries.recommended_authors(request.user),
+        'cache_seconds': settings.CASH_SECONDS,
+        'cache_version': caching.follow_version(request.user),
     }
     return render(request, 'posts/follow.html', context)
 
 
 @login_required
+def export_archive(request):
+    """Архив постов, комментариев, подписок и картинок пользователя."""
+    response = StreamingHttpResponse(
+        export.archive(request.user), content_type='application/zip'
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="yatube-{request.user.username}.zip"'
+    )
+    return response
+
+
+@login_required
+@transaction.atomic
 def profile_follow(request, username):
     follow_user = request.user
     follow_author = User.objects.get(username=username)
@@ -146,6 +331,7 @@ def profile_follow(request, username):
 
 
 @login_required
+@transaction.atomic
 def profile_unfollow(request, username):
     unfollow_user = request.user
     unfollow_author = get_object_or_404(User, username=username)
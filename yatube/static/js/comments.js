@@ -0,0 +1,24 @@
+// Кнопка «Показать ещё» подгружает следующую порцию комментариев
+// фрагментом и вставляет её на место кнопки. Без скрипта кнопка
+// остаётся обычной ссылкой на страницу поста.
+document.addEventListener('click', function (event) {
+  var link = event.target.closest('[data-comments-more]');
+  if (!link) {
+    return;
+  }
+  event.preventDefault();
+  link.classList.add('disabled');
+  fetch(link.dataset.commentsMore, {credentials: 'same-origin'})
+    .then(function (response) {
+      if (!response.ok) {
+        throw new Error(response.status);
+      }
+      return response.text();
+    })
+    .then(function (html) {
+      link.closest('.comments-more').outerHTML = html;
+    })
+    .catch(function () {
+      window.location = link.href;
+    });
+});
@@ -1,4 +1,5 @@
 import os
+import sys
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 STATICFILES_DIRS = (os.path.join(BASE_DIR, 'static'),)
@@ -25,6 +26,7 @@ INSTALLED_APPS = [
     'users.apps.UsersConfig',
     'core.apps.CoreConfig',
     'about.apps.AboutConfig',
+    'api.apps.ApiConfig',
     'sorl.thumbnail',
 ]
 
@@ -96,10 +98,21 @@ STATIC_URL = '/static/'
 
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
-EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+EMAIL_BACKEND = 'core.mail.QueuedEmailBackend'
+QUEUED_EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 MAX_COUNT_POST = 10
+COMMENTS_PER_PAGE = 20
+FOLLOWS_PER_PAGE = 30
+EXPORT_CHUNK_SIZE = 500
+FEED_ITEMS = 20
+FEED_TITLE_WORDS = 8
+API_PAGE_SIZE = 20
+API_BATCH_LIMIT = 100
+RECOMMENDATIONS_COUNT = 5
+RECOMMENDATIONS_NEIGHBOURS = 50
+RECOMMENDATIONS_GROUP_WEIGHT = 0.5
 MAX_SYMBOLS_IN_TAB = 15
 CASH_SECONDS = 60 * 20
 
@@ -107,8 +120,53 @@ CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Кэш общий для всех процессов: веб-сервера, jobworker, пула миниатюр
+# и команд. Поколения областей, записи миниатюр sorl и страницы,
+# записанные одним процессом, видны остальным. Таблица кэша создаётся
+# командой createcachetable; add() в ней атомарен за счёт первичного
+# ключа, на этом держатся блокировки cached_count и очереди миниатюр.
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'cache_table',
+        'OPTIONS': {
+            # Страницы, поколения и миниатюры не должны вытеснять
+            # друг друга уже на сотне постов.
+            'MAX_ENTRIES': 100000,
+        },
     }
 }
+
+# Тесты не трогают кэш работающего сайта, а запросы к таблице кэша
+# не попадают в бюджеты запросов представлений.
+if sys.argv[1:2] == ['test'] or 'pytest' in sys.modules:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Авторы, у которых подписчиков больше этого числа, не рассылают посты
+# по лентам: их посты подтягиваются в ленту подписчика при чтении.
+TIMELINE_FANOUT_LIMIT = 1000
+TIMELINE_MAX_LENGTH = 1000
+TIMELINE_BACKFILL = 100
+TIMELINE_BATCH_SIZE = 500
+
+COUNT_CACHE_SECONDS = 60
+
+# Процессы пула, строящие миниатюры картинок вне запроса.
+THUMBNAIL_WORKERS = 2
+
+# Метаданные миниатюр хранятся в кэше, а не в базе.
+THUMBNAIL_KVSTORE = 'core.kvstore.KVStore'
+
+# Ограничения загружаемых картинок постов.
+POST_IMAGE_MAX_BYTES = 5 * 1024 * 1024
+POST_IMAGE_MAX_PIXELS = 4096 * 4096
+
+# Очередь фоновых задач (core.jobs).
+JOB_MAX_ATTEMPTS = 5
+JOB_RETRY_BACKOFF = 10
+JOB_RETRY_BACKOFF_MAX = 60 * 60
+JOB_LOCK_TIMEOUT = 60 * 10